@@ -14,4 +14,8 @@ app.conf.broker_transport_options = {
     "queue_order_strategy": "priority",
 }
 app.conf.task_track_started = True
+# Only reserve one task at a time so the priority of the queued plugins is honoured.
+app.conf.worker_prefetch_multiplier = 1
+# Every worker also consumes its own queue, the analyses of a staged image are routed to the worker holding the copy.
+app.conf.worker_direct = True
 app.autodiscover_tasks()
@@ -10,7 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/3.2/ref/settings/
 """
 
-import os
+import os, tempfile
 from datetime import timedelta
 from pathlib import Path
 from VolWeb.keyconfig import Database, Secrets
@@ -178,6 +178,51 @@ DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 MEDIA_ROOT = os.path.join(BASE_DIR, "media/")
 MEDIA_URL = "/media/"
 
+# Worker-local cache of the memory image blocks read from the object storage, disabled by default.
+# Each worker can use up to BLOCK_CACHE_SIZE bytes of disk under BLOCK_CACHE_PATH once it is enabled.
+BLOCK_CACHE_PATH = os.getenv(
+    "BLOCK_CACHE_PATH", os.path.join(tempfile.gettempdir(), "volweb-blocks")
+)
+BLOCK_CACHE_SIZE = int(os.getenv("BLOCK_CACHE_SIZE", 0))
+BLOCK_CACHE_BLOCK_SIZE = int(os.getenv("BLOCK_CACHE_BLOCK_SIZE", 1024**2))
+# Local copies of the images analysed with the "stage locally" option, on the disk of the worker staging them.
+# The plugins of a staged image are routed to that worker, the other workers are left to the other analyses.
+STAGING_PATH = os.getenv(
+    "STAGING_PATH", os.path.join(tempfile.gettempdir(), "volweb-staging")
+)
+# Free space to keep on the staging disk, staged images are evicted to honour it.
+STAGING_MIN_FREE = int(os.getenv("STAGING_MIN_FREE", 10 * 1024**3))
+STAGING_WORKERS = int(os.getenv("STAGING_WORKERS", 8))
+STAGING_CHUNK_SIZE = int(os.getenv("STAGING_CHUNK_SIZE", 16 * 1024**2))
+# Size of the connection pool of each S3 client kept by a worker.
+S3_MAX_POOL_CONNECTIONS = int(os.getenv("S3_MAX_POOL_CONNECTIONS", 50))
+# Larger network graphs have their remote addresses aggregated ("subnet" or "port") then folded.
+NETWORK_GRAPH_MAX_NODES = int(os.getenv("NETWORK_GRAPH_MAX_NODES", 300))
+NETWORK_GRAPH_AGGREGATE = os.getenv("NETWORK_GRAPH_AGGREGATE", "subnet")
+
+# Run all the plugins of an evidence in one task with a pool of this many forked processes (0 dispatches a task per plugin).
+PLUGIN_BATCH_WORKERS = int(os.getenv("PLUGIN_BATCH_WORKERS", 0))
+# Plugins whose usual peak memory is above this are never run at the same time for an evidence.
+PLUGIN_HEAVY_MEMORY = int(os.getenv("PLUGIN_HEAVY_MEMORY", 2 * 1024**3))
+# Comma-separated plugins left out of the analysis and only run the first time their results are requested.
+LAZY_PLUGINS = [
+    name.strip() for name in os.getenv("LAZY_PLUGINS", "").split(",") if name.strip()
+]
+# Seconds after which a lazy plugin still pending is enqueued again, in case its worker died.
+LAZY_PLUGIN_TIMEOUT = int(os.getenv("LAZY_PLUGIN_TIMEOUT", 2 * 3600))
+# Comma-separated plugins whose results are stored as zstd-compressed columnar chunks instead of indexed rows.
+ARTEFACT_COMPRESSED_PLUGINS = [
+    name.strip()
+    for name in os.getenv(
+        "ARTEFACT_COMPRESSED_PLUGINS", "MFTScan,VadWalk,LdrModules"
+    ).split(",")
+    if name.strip()
+]
+# Artefact rows fetched from the database at once when a plugin result is streamed or searched.
+ARTEFACT_READ_CHUNK_SIZE = int(os.getenv("ARTEFACT_READ_CHUNK_SIZE", 2000))
+# Uncompressed ISF bytes each worker process keeps parsed across plugin runs (0 disables the cache).
+SYMBOL_TABLE_CACHE_SIZE = int(os.getenv("SYMBOL_TABLE_CACHE_SIZE", 512 * 1024**2))
+
 CELERY_BROKER_URL = f"redis://{Secrets.BROKER_HOST}:{Secrets.BROKER_PORT}"
 CELERY_RESULT_BACKEND = "django-db"
 CELERY_RESULT_EXTENDED = True
@@ -0,0 +1,397 @@
+import fcntl, hashlib, io, logging, math, mmap, os, shutil, tempfile, threading, s3fs
+from concurrent.futures import ThreadPoolExecutor
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+
+class BlockCache:
+    """Worker-local, size-bounded on-disk cache of fixed-size blocks of remote objects.
+    Blocks are stored as <path>/<object key>/<block index> and evicted in LRU order.
+    """
+
+    def __init__(self, path, max_bytes, block_size):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.block_size = block_size
+        # Only walk the cache directory once enough new data was written to matter.
+        self._written = max_bytes
+
+    def _block_path(self, key, index):
+        digest = hashlib.sha256(key.encode()).hexdigest()
+        return os.path.join(self.path, digest, str(index))
+
+    def get(self, key, index):
+        """Return the cached block or None, marking it as recently used."""
+        path = self._block_path(key, index)
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+            os.utime(path)
+            return data
+        except FileNotFoundError:
+            return None
+
+    def put(self, key, index, data):
+        """Store a block. The file is written aside and renamed so readers never see a partial block."""
+        path = self._block_path(key, index)
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.warning(f"Could not cache block {index} of {key}: {e}")
+            return
+        self._written += len(data)
+        if self._written >= self.max_bytes // 16:
+            self.evict()
+
+    def evict(self):
+        """Delete the least recently used blocks until the cache is back under budget."""
+        self._written = 0
+        entries = []
+        total = 0
+        for root, _, files in os.walk(self.path):
+            for name in files:
+                path = os.path.join(root, name)
+                try:
+                    st = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                entries.append((st.st_mtime, st.st_size, path))
+                total += st.st_size
+        if total <= self.max_bytes:
+            return
+        entries.sort()
+        target = self.max_bytes * 9 // 10
+        for _, size, path in entries:
+            if total <= target:
+                break
+            try:
+                os.remove(path)
+                total -= size
+            except FileNotFoundError:
+                pass
+
+
+class CachedFile(io.RawIOBase):
+    """Read-only file object serving the reads of a remote file through a BlockCache."""
+
+    def __init__(self, fileobj, key, size, cache):
+        super().__init__()
+        self._file = fileobj
+        self._key = key
+        self._size = size
+        self._cache = cache
+        self._position = 0
+        self._block_index = None
+        self._block = b""
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def tell(self):
+        return self._position
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        if whence == io.SEEK_SET:
+            position = offset
+        elif whence == io.SEEK_CUR:
+            position = self._position + offset
+        elif whence == io.SEEK_END:
+            position = self._size + offset
+        else:
+            raise ValueError(f"Invalid whence: {whence}")
+        if position < 0:
+            raise ValueError(f"Negative seek position: {position}")
+        self._position = position
+        return position
+
+    def _get_block(self, index):
+        if index != self._block_index:
+            block = self._cache.get(self._key, index)
+            if block is None:
+                offset = index * self._cache.block_size
+                self._file.seek(offset)
+                block = self._file.read(self._cache.block_size)
+                # Never cache a short read that is not the end of the object.
+                if len(block) == min(self._cache.block_size, self._size - offset):
+                    self._cache.put(self._key, index, block)
+            self._block_index = index
+            self._block = memoryview(block)
+        return self._block
+
+    def readinto(self, buffer):
+        view = memoryview(buffer).cast("B")
+        length = min(len(view), max(self._size - self._position, 0))
+        done = 0
+        while done < length:
+            index, start = divmod(self._position, self._cache.block_size)
+            chunk = self._get_block(index)[start : start + length - done]
+            if not chunk:
+                break
+            view[done : done + len(chunk)] = chunk
+            done += len(chunk)
+            self._position += len(chunk)
+        return done
+
+    def close(self):
+        if not self.closed:
+            self._file.close()
+            self._block = b""
+        super().close()
+
+
+_block_cache = None
+
+
+def get_block_cache():
+    """Return the block cache of this worker, or None when it is disabled."""
+    global _block_cache
+    if _block_cache is None and settings.BLOCK_CACHE_SIZE > 0:
+        _block_cache = BlockCache(
+            settings.BLOCK_CACHE_PATH,
+            settings.BLOCK_CACHE_SIZE,
+            settings.BLOCK_CACHE_BLOCK_SIZE,
+        )
+    return _block_cache
+
+
+def open_cached(fs, path, etag=None):
+    """Open a remote object, serving its reads through the block cache when enabled.
+    The blocks are keyed by the ETag of the object so a replaced object is never served stale data.
+    """
+    cache = get_block_cache()
+    if cache is None:
+        return fs.open(path)
+    fileobj = fs.open(path, block_size=cache.block_size, cache_type="none")
+    etag = (fileobj.details.get("ETag") or etag or "").strip('"')
+    if not etag:
+        fileobj.close()
+        return fs.open(path)
+    return CachedFile(fileobj, etag, fileobj.size, cache)
+
+
+_filesystems = {}
+_filesystems_lock = threading.Lock()
+# The clients hold sockets and an event loop thread that must not be shared with forked children.
+os.register_at_fork(after_in_child=_filesystems.clear)
+
+
+def get_filesystem(key=None, secret=None, region=None, endpoint_url=None):
+    """Return the S3 client of this worker for the given endpoint and credentials.
+    Clients are kept for the lifetime of the process so their pooled keep-alive connections are reused.
+    """
+    registry_key = (endpoint_url, region, key, secret)
+    with _filesystems_lock:
+        fs = _filesystems.get(registry_key)
+        if fs is None:
+            fs = s3fs.S3FileSystem(
+                key=key,
+                secret=secret,
+                client_kwargs={"region_name": region, "endpoint_url": endpoint_url},
+                config_kwargs={"max_pool_connections": settings.S3_MAX_POOL_CONNECTIONS},
+                skip_instance_cache=True,
+            )
+            _filesystems[registry_key] = fs
+    return fs
+
+
+class StagedFile:
+    """Read-only memory map of a staged image.
+    A shared lock is held on the image until it is closed so it cannot be evicted while in use.
+    """
+
+    def __init__(self, path):
+        self._lock = open(f"{path}.lock", "a+b")
+        try:
+            # Do not wait for an image being staged or evicted, the caller streams it instead.
+            fcntl.flock(self._lock, fcntl.LOCK_SH | fcntl.LOCK_NB)
+            with open(f"{path}.raw", "rb") as f:
+                self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except OSError:
+            self._lock.close()
+            raise
+        self.closed = False
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def writable(self):
+        return False
+
+    def read(self, size=-1):
+        return self._map.read(size)
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        self._map.seek(offset, whence)
+        return self._map.tell()
+
+    def tell(self):
+        return self._map.tell()
+
+    def close(self):
+        if not self.closed:
+            self._map.close()
+            self._lock.close()
+            self.closed = True
+
+
+def _staged_path(etag):
+    digest = hashlib.sha256(etag.strip('"').encode()).hexdigest()
+    return os.path.join(settings.STAGING_PATH, digest)
+
+
+def open_staged(etag):
+    """Return the staged copy of an image, or None when it is not available locally."""
+    if not etag:
+        return None
+    try:
+        return StagedFile(_staged_path(etag))
+    except OSError:
+        return None
+
+
+def _try_remove_staged(path):
+    """Delete a staged image unless it is in use. Return the number of bytes freed."""
+    with open(f"{path}.lock", "a+b") as lock:
+        try:
+            fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            return 0
+        try:
+            size = os.path.getsize(f"{path}.raw")
+            os.remove(f"{path}.raw")
+            return size
+        except FileNotFoundError:
+            return 0
+
+
+def release_staged(etag):
+    """Delete the staged copy of an image once nothing reads it anymore."""
+    if etag and os.path.isdir(settings.STAGING_PATH):
+        _try_remove_staged(_staged_path(etag))
+
+
+def _make_room(size):
+    """Evict the least recently staged images that are not in use until the image fits on disk.
+    Return : True if there is enough free space.
+    """
+    def available():
+        return shutil.disk_usage(settings.STAGING_PATH).free - settings.STAGING_MIN_FREE
+
+    if available() >= size:
+        return True
+    images = []
+    for name in os.listdir(settings.STAGING_PATH):
+        if name.endswith(".raw"):
+            path = os.path.join(settings.STAGING_PATH, name)
+            try:
+                images.append((os.path.getmtime(path), path[: -len(".raw")]))
+            except FileNotFoundError:
+                continue
+    for _, path in sorted(images):
+        _try_remove_staged(path)
+        if available() >= size:
+            return True
+    return False
+
+
+def _part_sizes(fs, path):
+    """Guess the part size of a multipart upload, asking the storage for the size of the first part."""
+    bucket, key, _ = fs.split_path(path)
+    try:
+        response = fs.call_s3("head_object", Bucket=bucket, Key=key, PartNumber=1)
+        return [response["ContentLength"]]
+    except Exception:
+        # The VolWeb upload uses 5 MiB parts, most other clients 8 or 16 MiB parts.
+        return [5 * 1024**2, 8 * 1024**2, 16 * 1024**2]
+
+
+def _md5_parts(local_path, part_size):
+    digests = []
+    with open(local_path, "rb") as f:
+        while True:
+            digest = hashlib.md5()
+            remaining = part_size
+            while remaining:
+                chunk = f.read(min(remaining, 1024**2))
+                if not chunk:
+                    break
+                digest.update(chunk)
+                remaining -= len(chunk)
+            if remaining == part_size:
+                return digests
+            digests.append(digest.digest())
+
+
+def _verify_etag(fs, path, local_path, etag):
+    """Check a downloaded image against the ETag of the object.
+    The ETag is the md5 of the object, or the md5 of the md5s of its parts for a multipart upload.
+    """
+    etag = etag.strip('"')
+    size = os.path.getsize(local_path)
+    if "-" not in etag:
+        digests = _md5_parts(local_path, max(size, 1))
+        return bool(digests) and digests[0].hex() == etag
+    digest, parts = etag.split("-")
+    for part_size in _part_sizes(fs, path):
+        if math.ceil(size / part_size) != int(parts):
+            continue
+        digests = _md5_parts(local_path, part_size)
+        if hashlib.md5(b"".join(digests)).hexdigest() == digest:
+            return True
+    return False
+
+
+def stage_image(fs, path, etag):
+    """Download an image to the local staging directory with parallel ranged requests.
+    Only one worker downloads a given image, the others wait for it and reuse the copy.
+    Return : True if a verified copy of the image is available locally.
+    """
+    if not etag:
+        return False
+    os.makedirs(settings.STAGING_PATH, exist_ok=True)
+    local_path = _staged_path(etag)
+    with open(f"{local_path}.lock", "a+b") as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        if os.path.exists(f"{local_path}.raw"):
+            os.utime(f"{local_path}.raw")
+            return True
+        size = fs.size(path)
+        if not _make_room(size):
+            logger.warning(f"Not enough free space to stage {path}")
+            return False
+        part_path = f"{local_path}.part"
+        chunk_size = settings.STAGING_CHUNK_SIZE
+        fd = os.open(part_path, os.O_CREAT | os.O_TRUNC | os.O_WRONLY, 0o600)
+        try:
+            os.ftruncate(fd, size)
+
+            def fetch(start):
+                data = fs.cat_file(path, start=start, end=min(start + chunk_size, size))
+                os.pwrite(fd, data, start)
+
+            with ThreadPoolExecutor(settings.STAGING_WORKERS) as executor:
+                for _ in executor.map(fetch, range(0, size, chunk_size)):
+                    pass
+        except Exception as e:
+            logger.warning(f"Could not stage {path}: {e}")
+            os.remove(part_path)
+            return False
+        finally:
+            os.close(fd)
+        if not _verify_etag(fs, path, part_path, etag):
+            logger.warning(f"The staged copy of {path} does not match its ETag {etag}")
+            os.remove(part_path)
+            return False
+        os.replace(part_path, f"{local_path}.raw")
+    return True
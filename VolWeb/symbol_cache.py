@@ -0,0 +1,322 @@
+import fcntl, json, logging, lzma, os, sqlite3, tempfile
+from collections import OrderedDict
+from urllib import parse, request
+from celery.signals import task_postrun
+from celery.worker.control import inspect_command
+from django.conf import settings
+from volatility3 import symbols
+from volatility3.framework import constants
+from volatility3.framework.automagic.symbol_cache import SqliteCache, SymbolCacheMagic
+from volatility3.framework.symbols import intermed
+from volatility3.framework.symbols.windows import pdbconv
+from symbols.isf import isf_location
+from symbols.models import UPLOAD_PATH, Symbol
+
+logger = logging.getLogger(__name__)
+
+# Statistics of the symbol table cache of each worker process, one file per process.
+SYMBOL_TABLE_STATS_PATH = os.path.join(tempfile.gettempdir(), "volweb-symbol-tables")
+
+# Hash of the indexed ISF files by location, refreshed by sync_identifier_cache.
+_isf_hashes = {}
+
+
+def symbols_path():
+    """Return the symbol directory shared by the platform and every worker."""
+    return os.path.abspath(f"media/{UPLOAD_PATH}")
+
+
+def find_isf(pdb_name, guid, age):
+    """Return the location of the ISF of a PDB in the symbol directories, or None."""
+    filter_string = os.path.join(pdb_name, f"{guid}-{age}")
+    for location in intermed.IntermediateSymbolTable.file_symbol_url(
+        "windows", filter_string
+    ):
+        return location
+    return None
+
+
+def download_pdb_isf(cls, context, guid, age, pdb_name, progress_callback=None):
+    """Download a PDB and convert it to an ISF in the shared symbol directory, once for all the workers.
+    Replaces PDBUtility.download_pdb_isf, which writes the ISF in place: concurrent analyses of
+    images with the same kernel could read a partial file or have it truncated under them.
+    The fetch of a PDB holds an exclusive lock, the other workers wait for it and use its ISF.
+    The ISF is written aside and renamed so it is never seen partially written.
+    """
+    output_dir = os.path.join(symbols_path(), "windows", pdb_name)
+    os.makedirs(output_dir, exist_ok=True)
+    with open(os.path.join(output_dir, f"{guid}-{age}.lock"), "a+b") as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        if find_isf(pdb_name, guid, age):
+            return
+        fd, tmp_path = tempfile.mkstemp(dir=output_dir, suffix=".tmp")
+        os.close(fd)
+        tmp_files = [tmp_path]
+        try:
+            filename = pdbconv.PdbRetreiver().retreive_pdb(
+                guid + str(age), file_name=pdb_name, progress_callback=progress_callback
+            )
+            if not filename:
+                logger.warning(f"Could not download the PDB {pdb_name} {guid}-{age}")
+                return
+            url = parse.urlparse(filename, scheme="file")
+            if url.scheme == "file" or len(url.scheme) == 1:
+                tmp_files.append(filename)
+                location = "file:" + request.pathname2url(os.path.abspath(filename))
+            else:
+                location = filename
+            isf = pdbconv.PdbReader(
+                context, location, pdb_name, progress_callback
+            ).get_json()
+            with lzma.open(tmp_path, "w") as f:
+                f.write(json.dumps(isf, indent=2, sort_keys=True).encode())
+            os.replace(tmp_path, os.path.join(output_dir, f"{guid}-{age}.json.xz"))
+        finally:
+            for path in tmp_files:
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+                except OSError as e:
+                    logger.warning(f"Could not remove {path}: {e}")
+
+
+def sync_identifier_cache():
+    """Register the ISF files indexed in the Symbol table in the volatility3 identifier cache.
+    The automagics find the ISF of an image through this cache. volatility3 fills it by walking the
+    symbol directories and parsing every new ISF on each run, the Symbol index makes both unnecessary.
+    Only the entries of the shared symbol directory are managed, the others are left untouched.
+    """
+    global _isf_hashes
+    expected = {}
+    for symbol in Symbol.objects.filter(status="Ready").exclude(isf_hash=None):
+        operating_system, identifier = symbol.identifier()
+        if identifier is not None:
+            expected[isf_location(symbol.symbols_file.path)] = (
+                symbol,
+                operating_system,
+                identifier,
+            )
+    _isf_hashes = {location: value[0].isf_hash for location, value in expected.items()}
+    os.makedirs(constants.CACHE_PATH, exist_ok=True)
+    cache = SqliteCache(os.path.join(constants.CACHE_PATH, constants.IDENTIFIERS_FILENAME))
+    # The cache has no public API to add entries, its table is written the way SqliteCache.update does.
+    database = cache._database
+    try:
+        prefix = isf_location(symbols_path())
+        cached = {
+            row["location"]: row["hash"]
+            for row in database.execute(
+                "SELECT location, hash FROM cache WHERE location LIKE ?", (f"{prefix}/%",)
+            )
+        }
+        removed = [location for location in cached if location not in expected]
+        database.executemany(
+            "DELETE FROM cache WHERE location = ?", [(location,) for location in removed]
+        )
+        database.executemany(
+            "INSERT OR REPLACE INTO cache (location, identifier, operating_system, hash,"
+            "stats_base_types, stats_types, stats_enums, stats_symbols, local, cached)"
+            " VALUES (?, ?, ?, ?, ?, ?, ?, ?, 1, datetime('now'))",
+            [
+                (location, identifier, operating_system, symbol.isf_hash, *symbol.isf_stats)
+                for location, (symbol, operating_system, identifier) in expected.items()
+                if cached.get(location) != symbol.isf_hash
+            ],
+        )
+        database.commit()
+    except sqlite3.Error as e:
+        logger.warning(f"Could not update the symbol identifier cache: {e}")
+    finally:
+        database.close()
+
+
+
+class IndexedSymbolCacheMagic(SymbolCacheMagic):
+    """SymbolCacheMagic leaving the shared symbol directory to the Symbol index.
+    The other symbol directories and the bundled symbol packs are scanned as volatility3 does, the ISF
+    uploaded to VolWeb are registered from the index instead of being parsed again.
+    """
+
+    def __call__(self, context, config_path, configurable, progress_callback=None):
+        paths = symbols.__path__
+        symbols.__path__ = [
+            path for path in paths if os.path.abspath(path) != symbols_path()
+        ]
+        try:
+            self._cache.update(progress_callback)
+        finally:
+            symbols.__path__ = paths
+        # The scan drops the entries of the directories it did not walk, they are registered again.
+        sync_identifier_cache()
+
+class SymbolTableCache:
+    """Size-bounded LRU of the ISF parsed by this process, shared by the contexts of every plugin run.
+    The size of an entry is the size of its uncompressed JSON, the parsed table takes a few times more memory.
+    """
+
+    def __init__(self, max_size):
+        self.max_size = max_size
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+
+    def get(self, key):
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry[0]
+
+    def put(self, key, json_object, size):
+        if size > self.max_size:
+            return
+        previous = self._entries.pop(key, None)
+        if previous is not None:
+            self.size -= previous[1]
+        self._entries[key] = (json_object, size)
+        self.size += size
+        while self.size > self.max_size:
+            _, (_, evicted_size) = self._entries.popitem(last=False)
+            self.size -= evicted_size
+
+    def stats(self):
+        return {
+            "pid": os.getpid(),
+            "tables": len(self._entries),
+            "size": self.size,
+            "max_size": self.max_size,
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+    def write_stats(self):
+        """Publish the statistics of the cache for the symbol_tables inspect command of the worker."""
+        try:
+            os.makedirs(SYMBOL_TABLE_STATS_PATH, exist_ok=True)
+            path = os.path.join(SYMBOL_TABLE_STATS_PATH, f"{os.getpid()}.json")
+            with open(f"{path}.tmp", "w") as f:
+                json.dump(self.stats(), f)
+            os.replace(f"{path}.tmp", path)
+        except OSError as e:
+            logger.warning(f"Could not write the symbol table cache statistics: {e}")
+
+
+_symbol_tables = None
+
+
+def get_symbol_table_cache():
+    """Return the symbol table cache of this process, or None when SYMBOL_TABLE_CACHE_SIZE disables it."""
+    global _symbol_tables
+    if _symbol_tables is None and settings.SYMBOL_TABLE_CACHE_SIZE > 0:
+        _symbol_tables = SymbolTableCache(settings.SYMBOL_TABLE_CACHE_SIZE)
+    return _symbol_tables
+
+
+def isf_key(isf_url):
+    """Return the cache key of an ISF: the hash of the indexed ones, the location and modification time
+    of the other local files. Remote ISF are not cached.
+    """
+    isf_hash = _isf_hashes.get(isf_url)
+    if isf_hash:
+        return isf_hash
+    url = parse.urlparse(isf_url)
+    if url.scheme != "file":
+        return None
+    try:
+        st = os.stat(request.url2pathname(url.path))
+    except OSError:
+        return None
+    return f"{isf_url}:{st.st_mtime_ns}:{st.st_size}"
+
+
+# volatility3 constructor of the symbol tables, wrapped by load_symbol_table.
+_load_symbol_table = intermed.IntermediateSymbolTable.__init__
+
+
+class ISFLoader:
+    """Stands for the json module of volatility3's intermed module while a symbol table is built.
+    It hands the cached ISF to the constructor instead of parsing the file, or keeps the ISF it parses.
+    """
+
+    def __init__(self, json_object=None):
+        self.json_object = json_object
+        self.loaded = None
+
+    def load(self, fp, **kwargs):
+        if self.json_object is not None:
+            return self.json_object
+        data = fp.read()
+        self.loaded = (json.loads(data, **kwargs), len(data))
+        return self.loaded[0]
+
+    def __getattr__(self, name):
+        return getattr(json, name)
+
+
+def load_symbol_table(self, context, config_path, name, isf_url, *args, **kwargs):
+    """Build an IntermediateSymbolTable from the ISF parsed by a previous plugin run of this process.
+    Wraps IntermediateSymbolTable.__init__, which parses and validates the whole ISF for every context.
+    The symbol tables never modify the parsed ISF, so every context can share it. Only the ISF that passed
+    the validation are cached, the cached ones are not validated again.
+    """
+    # validate is the third optional argument of the constructor.
+    validate = args[2] if len(args) > 2 else kwargs.get("validate", True)
+    cache = get_symbol_table_cache()
+    key = isf_key(isf_url) if cache is not None else None
+    loader = ISFLoader(cache.get(key) if key is not None else None)
+    if loader.json_object is not None:
+        if len(args) > 2:
+            args = (*args[:2], False, *args[3:])
+        else:
+            kwargs["validate"] = False
+    previous = intermed.json
+    intermed.json = loader
+    try:
+        _load_symbol_table(self, context, config_path, name, isf_url, *args, **kwargs)
+    finally:
+        intermed.json = previous
+    if key is not None and validate and loader.loaded is not None:
+        cache.put(key, *loader.loaded)
+
+
+@task_postrun.connect
+def publish_symbol_table_stats(**kwargs):
+    """Publish the statistics of the symbol table cache of this process once a task is done."""
+    if _symbol_tables is not None:
+        _symbol_tables.write_stats()
+
+
+@inspect_command()
+def symbol_tables(state):
+    """Report the symbol table cache of every process of the worker: celery -A VolWeb inspect symbol_tables"""
+    processes = []
+    try:
+        names = os.listdir(SYMBOL_TABLE_STATS_PATH)
+    except FileNotFoundError:
+        names = []
+    for filename in names:
+        if not filename.endswith(".json"):
+            continue
+        path = os.path.join(SYMBOL_TABLE_STATS_PATH, filename)
+        try:
+            os.kill(int(filename[: -len(".json")]), 0)
+        except ProcessLookupError:
+            # The process exited, its cache is gone with it.
+            os.remove(path)
+            continue
+        except (PermissionError, ValueError):
+            pass
+        try:
+            with open(path) as f:
+                processes.append(json.load(f))
+        except (OSError, ValueError):
+            continue
+    return {
+        "size": sum(process["size"] for process in processes),
+        "tables": sum(process["tables"] for process in processes),
+        "processes": processes,
+    }
@@ -1,5 +1,11 @@
+import hashlib, io, os, tempfile
+from unittest import mock
 from django.test import TestCase
+from volatility3.framework import renderers
 from VolWeb.keyconfig import Database, Secrets
+from VolWeb.storage import BlockCache, CachedFile, _verify_etag, get_filesystem
+from VolWeb.voltools import NetworkGraph, StreamingDictRenderer
+
 
 class EnvVariablesTestCase(TestCase):
 
@@ -12,3 +18,235 @@ class EnvVariablesTestCase(TestCase):
         self.assertNotEqual(Database.PORT, None)
         self.assertNotEqual(Database.PASSWORD, None)
         self.assertNotEqual(Database.USER, None)
+
+
+class BlockCacheTestCase(TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.cache = BlockCache(self.directory.name, 100, 10)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_put_get(self):
+        self.assertIsNone(self.cache.get("image", 0))
+        self.cache.put("image", 0, b"0123456789")
+        self.assertEqual(self.cache.get("image", 0), b"0123456789")
+        self.assertIsNone(self.cache.get("other", 0))
+
+    def test_evict_least_recently_used(self):
+        for index in range(10):
+            self.cache.put("image", index, bytes(10))
+            mtime = 1000 + index
+            os.utime(self.cache._block_path("image", index), (mtime, mtime))
+        # Reading a block makes it the most recently used one.
+        self.cache.get("image", 0)
+        self.cache.put("image", 10, bytes(10))
+        self.assertIsNotNone(self.cache.get("image", 0))
+        self.assertIsNone(self.cache.get("image", 1))
+        self.assertIsNone(self.cache.get("image", 2))
+        self.assertIsNotNone(self.cache.get("image", 3))
+        self.assertIsNotNone(self.cache.get("image", 10))
+
+
+class CachedFileTestCase(TestCase):
+
+    data = bytes(range(25))
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.cache = BlockCache(self.directory.name, 1024, 10)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_readinto_across_blocks(self):
+        f = CachedFile(io.BytesIO(self.data), "image", len(self.data), self.cache)
+        f.seek(5)
+        self.assertEqual(f.read(12), self.data[5:17])
+        self.assertEqual(f.tell(), 17)
+        self.assertEqual(f.read(), self.data[17:])
+        self.assertEqual(f.read(1), b"")
+        f.seek(-3, io.SEEK_END)
+        buffer = bytearray(10)
+        self.assertEqual(f.readinto(buffer), 3)
+        self.assertEqual(bytes(buffer[:3]), self.data[22:])
+
+    def test_readinto_from_cache(self):
+        f = CachedFile(io.BytesIO(self.data), "image", len(self.data), self.cache)
+        self.assertEqual(f.read(), self.data)
+        # Every block, the short last one included, is now served from the cache.
+        remote = mock.Mock(spec=io.BytesIO)
+        f = CachedFile(remote, "image", len(self.data), self.cache)
+        self.assertEqual(f.read(), self.data)
+        remote.read.assert_not_called()
+
+
+class GetFilesystemTestCase(TestCase):
+
+    def test_reuse(self):
+        endpoint = "http://minio:9000"
+        fs = get_filesystem("key", "secret", "us-east-1", endpoint)
+        self.assertIs(get_filesystem("key", "secret", "us-east-1", endpoint), fs)
+        self.assertIsNot(get_filesystem("other", "secret", "us-east-1", endpoint), fs)
+        self.assertIsNot(get_filesystem("key", "secret", "eu-west-1", endpoint), fs)
+
+
+class VerifyEtagTestCase(TestCase):
+
+    data = b"volweb image"
+
+    def setUp(self):
+        fd, self.path = tempfile.mkstemp()
+        with os.fdopen(fd, "wb") as f:
+            f.write(self.data)
+        self.fs = mock.Mock()
+        self.fs.split_path.return_value = ("bucket", "image", None)
+
+    def tearDown(self):
+        os.remove(self.path)
+
+    def verify(self, etag):
+        return _verify_etag(self.fs, "bucket/image", self.path, etag)
+
+    def multipart_etag(self, part_size):
+        parts = [
+            self.data[i : i + part_size] for i in range(0, len(self.data), part_size)
+        ]
+        digest = hashlib.md5(b"".join(hashlib.md5(part).digest() for part in parts))
+        return f'"{digest.hexdigest()}-{len(parts)}"'
+
+    def test_single_part(self):
+        self.assertTrue(self.verify(hashlib.md5(self.data).hexdigest()))
+        self.assertFalse(self.verify("0" * 32))
+
+    def test_multipart(self):
+        self.fs.call_s3.return_value = {"ContentLength": 5}
+        self.assertTrue(self.verify(self.multipart_etag(5)))
+        self.assertFalse(self.verify(self.multipart_etag(4)))
+
+    def test_multipart_default_part_sizes(self):
+        # Without the size of the first part, the usual part sizes are tried.
+        self.fs.call_s3.side_effect = OSError
+        self.assertTrue(self.verify(self.multipart_etag(5 * 1024**2)))
+
+
+class NetworkGraphTestCase(TestCase):
+
+    def test_add(self):
+        graph = NetworkGraph()
+        graph.add(4, "System", "10.0.0.1", 445, "10.0.0.2", 50000)
+        graph.add(4, "System", "10.0.0.1", 445, "10.0.0.3", 50001)
+        graph.add(8, "svchost.exe", "10.0.0.1", 135, "10.0.0.2", 50002)
+        self.assertEqual(len(graph), 4)
+        self.assertEqual(
+            graph.to_dict(),
+            {
+                "nodes": [
+                    {
+                        "id": 4,
+                        "Process": "System",
+                        "LocalAddr": "10.0.0.1",
+                        "LocalPorts": [445],
+                    },
+                    {
+                        "id": 8,
+                        "Process": "svchost.exe",
+                        "LocalAddr": "10.0.0.1",
+                        "LocalPorts": [135],
+                    },
+                    {"id": "10.0.0.2", "ForeignPorts": [50000, 50002]},
+                    {"id": "10.0.0.3", "ForeignPorts": [50001]},
+                ],
+                "edges": [
+                    {"from": 4, "to": "10.0.0.2"},
+                    {"from": 8, "to": "10.0.0.2"},
+                    {"from": 4, "to": "10.0.0.3"},
+                ],
+            },
+        )
+
+    def test_collapse_subnets(self):
+        graph = NetworkGraph()
+        graph.add(4, "System", "10.0.0.1", 1000, "8.8.8.8", 53)
+        graph.add(4, "System", "10.0.0.1", 1001, "8.8.8.4", 53)
+        graph.add(8, "svchost.exe", "10.0.0.1", 1002, "2001:db8::1", 443)
+        graph.add(8, "svchost.exe", "10.0.0.1", 1003, "*", 0)
+        graph.collapse_subnets()
+        self.assertEqual(
+            graph.remotes,
+            {
+                "8.8.8.0/24": {53: {4: None}},
+                "2001:db8::/64": {443: {8: None}},
+                "*": {0: {8: None}},
+            },
+        )
+
+    def test_fold(self):
+        graph = NetworkGraph()
+        for pid in (1, 2, 3):
+            graph.add(pid, "process", "10.0.0.1", 1000, "1.1.1.1", 80)
+        graph.add(1, "process", "10.0.0.1", 1000, "2.2.2.2", 443)
+        graph.add(2, "process", "10.0.0.1", 1000, "3.3.3.3", 22)
+        graph.fold(5)
+        self.assertEqual(len(graph), 5)
+        self.assertEqual(graph.remotes["1.1.1.1"], {80: {1: None, 2: None, 3: None}})
+        self.assertEqual(
+            graph.remotes[NetworkGraph.OTHERS], {443: {1: None}, 22: {2: None}}
+        )
+
+    def test_reduce(self):
+        graph = NetworkGraph()
+        for address in range(1, 20):
+            graph.add(4, "System", "10.0.0.1", 1000, f"10.1.{address}.1", 80)
+            graph.add(4, "System", "10.0.0.1", 1000, f"10.2.{address}.1", 443)
+        graph.reduce(5, "port")
+        self.assertEqual(list(graph.remotes), ["*:80", "*:443"])
+        graph = NetworkGraph()
+        for address in range(1, 20):
+            graph.add(address, "process", "10.0.0.1", 1000, f"10.1.{address}.1", 80)
+        graph.reduce(25)
+        self.assertEqual(len(graph), 25)
+        graph.reduce(22, "subnet")
+        self.assertLessEqual(len(graph), 22)
+        self.assertIn(NetworkGraph.OTHERS, graph.remotes)
+
+
+class StreamingDictRendererTestCase(TestCase):
+
+    rows = [
+        (0, (4, "System")),
+        (1, (88, "Registry")),
+        (2, (92, "smss.exe")),
+        (0, (500, "csrss.exe")),
+    ]
+
+    expected = [
+        {"__id": 0, "__parent": None, "PID": 4, "Name": "System"},
+        {"__id": 1, "__parent": 0, "PID": 88, "Name": "Registry"},
+        {"__id": 2, "__parent": 1, "PID": 92, "Name": "smss.exe"},
+        {"__id": 3, "__parent": None, "PID": 500, "Name": "csrss.exe"},
+    ]
+
+    def grid(self):
+        return renderers.TreeGrid([("PID", int), ("Name", str)], iter(self.rows))
+
+    def render(self, grid):
+        batches = []
+        count = StreamingDictRenderer(batches.append, batch_size=3).render(grid)
+        self.assertEqual(count, 4)
+        self.assertEqual([len(batch) for batch in batches], [3, 1])
+        return [row for batch in batches for row in batch]
+
+    def test_render(self):
+        grid = self.grid()
+        self.assertEqual(self.render(grid), self.expected)
+        # The rows were not kept by the grid.
+        self.assertTrue(grid.populated)
+        self.assertEqual(grid.children(None), [])
+
+    def test_render_populated(self):
+        grid = self.grid()
+        grid.populate()
+        self.assertEqual(self.render(grid), self.expected)
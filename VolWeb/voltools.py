@@ -1,16 +1,36 @@
-import datetime, hashlib, io, tempfile, os, vt, stat, logging, volatility3, urllib.parse, s3fs
+import datetime, hashlib, io, ipaddress, tempfile, os, resource, time, vt, stat, logging, volatility3, urllib.parse
 from typing import Dict, Any, List, Tuple
-from volatility3.framework import interfaces
+from volatility3.framework import interfaces, contexts
+from volatility3.framework.exceptions import UnsatisfiedException
+from volatility3.framework.configuration.requirements import ModuleRequirement
 from volatility3.cli import text_renderer
 from volatility3.framework.renderers import format_hints
 from VolWeb.keyconfig import Secrets
-from evidences.models import Evidence
+from evidences.models import (
+    Artefact,
+    ArtefactChunk,
+    Evidence,
+    PluginStatistic,
+    TimelineEvent,
+)
 from volatility3.framework.plugins import construct_plugin
 from volatility3.framework import automagic, constants
+from volatility3.framework.automagic.symbol_cache import SymbolCacheMagic
 from volatility3.cli import MuteProgress
 from volatility3.framework.layers.cloudstorage import S3FileSystemHandler
+from volatility3.framework.symbols.intermed import IntermediateSymbolTable
+from volatility3.framework.symbols.windows.pdbutil import PDBUtility
 from typing import Optional
-from symbols.models import UPLOAD_PATH
+from VolWeb.symbol_cache import (
+    IndexedSymbolCacheMagic,
+    download_pdb_isf,
+    load_symbol_table,
+    symbols_path,
+)
+from VolWeb.storage import get_filesystem, open_cached, open_staged, stage_image
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count
 
 
 logging.basicConfig(level=logging.INFO)
@@ -104,6 +124,29 @@ def file_handler(output_dir):
     return CLIDirectFileHandler
 
 
+def column_renderers(type_renderers, grid):
+    """Resolve the renderer of each column once per grid instead of once per cell.
+    Return : A list of (column name, renderer) in column order.
+    """
+    return [
+        (column.name, type_renderers.get(column.type, type_renderers["default"]))
+        for column in grid.columns
+    ]
+
+
+def render_row(columns, values):
+    """Convert the values of a single row.
+    Return : Dict of the rendered row.
+    """
+    row = {}
+    for (name, renderer), value in zip(columns, values):
+        data = renderer(value)
+        if isinstance(data, interfaces.renderers.BaseAbsentValue):
+            data = None
+        row[name] = data
+    return row
+
+
 # Inspired by the JsonRenderer class.
 class DictRendererPsTree(text_renderer.CLIRenderer):
     """Directly inspired by the JsonRenderer rendered
@@ -136,6 +179,7 @@ class DictRendererPsTree(text_renderer.CLIRenderer):
         pass
 
     def render(self, grid: interfaces.renderers.TreeGrid):
+        columns = column_renderers(self._type_renderers, grid)
         final_output: Tuple[
             Dict[str, List[interfaces.renderers.TreeNode]],
             List[interfaces.renderers.TreeNode],
@@ -152,15 +196,7 @@ class DictRendererPsTree(text_renderer.CLIRenderer):
                 "" if (node.path_depth <= 1) else " "
             )
             node_dict["level"] = depth
-            for column_index in range(len(grid.columns)):
-                column = grid.columns[column_index]
-                renderer = self._type_renderers.get(
-                    column.type, self._type_renderers["default"]
-                )
-                data = renderer(list(node.values)[column_index])
-                if isinstance(data, interfaces.renderers.BaseAbsentValue):
-                    data = None
-                node_dict[column.name] = data
+            node_dict.update(render_row(columns, node.values))
             if node.parent:
                 acc_map[node.parent.path]["__children"].append(node_dict)
             else:
@@ -205,6 +241,7 @@ class DictRenderer(text_renderer.CLIRenderer):
         pass
 
     def render(self, grid: interfaces.renderers.TreeGrid):
+        columns = column_renderers(self._type_renderers, grid)
         final_output: Tuple[
             Dict[str, List[interfaces.renderers.TreeNode]],
             List[interfaces.renderers.TreeNode],
@@ -217,15 +254,7 @@ class DictRenderer(text_renderer.CLIRenderer):
             # Nodes always have a path value, giving them a path_depth of at least 1, we use max just in case
             acc_map, final_tree = accumulator
             node_dict: Dict[str, Any] = {"__children": []}
-            for column_index in range(len(grid.columns)):
-                column = grid.columns[column_index]
-                renderer = self._type_renderers.get(
-                    column.type, self._type_renderers["default"]
-                )
-                data = renderer(list(node.values)[column_index])
-                if isinstance(data, interfaces.renderers.BaseAbsentValue):
-                    data = None
-                node_dict[column.name] = data
+            node_dict.update(render_row(columns, node.values))
             if node.parent:
                 acc_map[node.parent.path]["__children"].append(node_dict)
             else:
@@ -242,6 +271,61 @@ class DictRenderer(text_renderer.CLIRenderer):
         return final_output[1]
 
 
+class StreamingDictRenderer(DictRenderer):
+    """Render the rows of a plugin as they are produced and hand them to a sink in batches.
+    The rendered rows are never all kept in memory, every row carries an "__id" and the
+    "__parent" id (or None) instead of nested "__children".
+    Return : The number of rendered rows.
+    """
+
+    def __init__(self, sink, batch_size=1000, options=None):
+        super().__init__(options)
+        self.sink = sink
+        self.batch_size = batch_size
+
+    @staticmethod
+    def grid_rows(grid: interfaces.renderers.TreeGrid):
+        """Yield the (level, values) of every row of the grid, in order.
+        An unpopulated grid is read from its construction generator rather than populated,
+        populating it would keep a TreeNode for every row until the grid is released.
+        """
+        if grid.populated:
+
+            def walk(node, level):
+                for child in grid.children(node):
+                    yield level, child.values
+                    yield from walk(child, level + 1)
+
+            yield from walk(None, 0)
+            return
+        for level, values in grid._generator:
+            yield level, values
+        grid._populated = True
+
+    def render(self, grid: interfaces.renderers.TreeGrid):
+        columns = column_renderers(self._type_renderers, grid)
+        batch = []
+        ancestors = []
+        count = 0
+        for level, values in self.grid_rows(grid):
+            # Same parent resolution as TreeGrid.populate.
+            level = min(len(ancestors), level)
+            row = {
+                "__id": count,
+                "__parent": ancestors[level - 1] if level > 0 else None,
+            }
+            row.update(render_row(columns, values))
+            batch.append(row)
+            if len(batch) >= self.batch_size:
+                self.sink(batch)
+                batch = []
+            ancestors = ancestors[0:level] + [count]
+            count += 1
+        if batch:
+            self.sink(batch)
+        return count
+
+
 def file_sha256(path):
     """Compute memory image signature.
     Args:
@@ -262,100 +346,133 @@ def file_sha256(path):
         return "error"
 
 
-def generate_windows_network_graph(data):
-    graph_data = {"nodes": [], "edges": []}
-    node_id_map = {}
+def subnet(address):
+    """This function is used to get the /24 (IPv4) or /64 (IPv6) network of an address
+    Return : The network, or the address itself when it is not an IP address.
+    """
+    try:
+        ip = ipaddress.ip_address(address)
+    except ValueError:
+        return address
+    prefix = 24 if ip.version == 4 else 64
+    return str(ipaddress.ip_network(f"{ip}/{prefix}", strict=False))
 
-    for entry in data:
-        pid = entry["PID"]
-        local_address = entry["LocalAddr"]
-        local_port = entry["LocalPort"]
-        foreign_address = entry["ForeignAddr"]
-        foreign_port = entry["ForeignPort"]
-
-        # Node data for the process
-        if pid not in node_id_map:
-            node_data_1 = {
+
+class NetworkGraph:
+    """Graph of the processes and of the remote addresses they are connected to.
+    Nodes, ports and edges are kept in dicts used as ordered sets, so the graph is built in a single pass.
+    """
+
+    OTHERS = "Others"
+
+    def __init__(self):
+        # pid -> process node, its local ports are the keys of "LocalPorts"
+        self.processes = {}
+        # remote node id -> {foreign port: {pid: None}}
+        self.remotes = {}
+
+    def __len__(self):
+        return len(self.processes) + len(self.remotes)
+
+    def add(self, pid, process, local_address, local_port, foreign_address, foreign_port):
+        node = self.processes.get(pid)
+        if node is None:
+            node = self.processes[pid] = {
                 "id": pid,
-                "Process": entry["Owner"],
+                "Process": process,
                 "LocalAddr": local_address,
-                "LocalPorts": [local_port],
-            }
-            graph_data["nodes"].append(node_data_1)
-            node_id_map[pid] = node_data_1
-        else:
-            # If the process is already a node, just add the local port if it's not already there
-            if local_port not in node_id_map[pid]["LocalPorts"]:
-                node_id_map[pid]["LocalPorts"].append(local_port)
-
-        # Node data for the foreign address
-        if foreign_address not in node_id_map:
-            node_data_2 = {
-                "id": foreign_address,
-                "ForeignPorts": [foreign_port],
+                "LocalPorts": {},
             }
-            graph_data["nodes"].append(node_data_2)
-            node_id_map[foreign_address] = node_data_2
-        else:
-            if "ForeignPorts" not in node_id_map[foreign_address]:
-                node_id_map[foreign_address]["ForeignPorts"] = []
-            if foreign_port not in node_id_map[foreign_address]["ForeignPorts"]:
-                node_id_map[foreign_address]["ForeignPorts"].append(foreign_port)
+        node["LocalPorts"][local_port] = None
+        ports = self.remotes.setdefault(foreign_address, {})
+        ports.setdefault(foreign_port, {})[pid] = None
+
+    def _group(self, key):
+        """Merge the remote nodes sharing the same key(node id, port)."""
+        remotes = {}
+        for address, ports in self.remotes.items():
+            for port, pids in ports.items():
+                group = remotes.setdefault(key(address, port), {})
+                group.setdefault(port, {}).update(pids)
+        self.remotes = remotes
+
+    def collapse_subnets(self):
+        self._group(lambda address, port: subnet(address))
+
+    def collapse_ports(self):
+        self._group(lambda address, port: f"*:{port}")
+
+    def fold(self, max_nodes):
+        """Merge the least connected remote nodes into a single node so the graph has at most max_nodes nodes."""
+        budget = max(max_nodes - len(self.processes), 1)
+        if len(self.remotes) <= budget:
+            return
+        ranked = sorted(
+            self.remotes,
+            key=lambda address: sum(len(pids) for pids in self.remotes[address].values()),
+            reverse=True,
+        )
+        kept = set(ranked[: budget - 1])
+        self._group(lambda address, port: address if address in kept else self.OTHERS)
+
+    def reduce(self, max_nodes, aggregate="subnet"):
+        """Aggregate the remote nodes of a graph larger than max_nodes, then fold what is left over."""
+        if len(self) <= max_nodes:
+            return
+        if aggregate == "subnet":
+            self.collapse_subnets()
+        elif aggregate == "port":
+            self.collapse_ports()
+        if len(self) > max_nodes:
+            self.fold(max_nodes)
+
+    def to_dict(self):
+        nodes = [
+            dict(node, LocalPorts=list(node["LocalPorts"]))
+            for node in self.processes.values()
+        ]
+        edges = []
+        for address, ports in self.remotes.items():
+            nodes.append({"id": address, "ForeignPorts": list(ports)})
+            pids = {}
+            for port_pids in ports.values():
+                pids.update(port_pids)
+            edges.extend({"from": pid, "to": address} for pid in pids)
+        return {"nodes": nodes, "edges": edges}
+
+
+def build_network_graph(graph):
+    graph.reduce(settings.NETWORK_GRAPH_MAX_NODES, settings.NETWORK_GRAPH_AGGREGATE)
+    return graph.to_dict()
 
-        # Edge data
-        edge_data = {"from": pid, "to": foreign_address}
-        if edge_data not in graph_data["edges"]:
-            graph_data["edges"].append(edge_data)
 
-    return graph_data
+def generate_windows_network_graph(data):
+    graph = NetworkGraph()
+    for entry in data:
+        graph.add(
+            entry["PID"],
+            entry["Owner"],
+            entry["LocalAddr"],
+            entry["LocalPort"],
+            entry["ForeignAddr"],
+            entry["ForeignPort"],
+        )
+    return build_network_graph(graph)
 
 
 def generate_linux_network_graph(data):
-    graph_data = {"nodes": [], "edges": []}
-    node_id_map = {}
+    graph = NetworkGraph()
     for entry in data:
         if "AF_INET" in entry["Family"]:
-            pid = entry["Pid"]
-            local_address = entry["Source Addr"]
-            local_port = entry["Source Port"]
-            foreign_address = entry["Destination Addr"]
-            foreign_port = entry["Destination Port"]
-
-            # Node data for the process
-            if pid not in node_id_map:
-                node_data_1 = {
-                    "id": pid,
-                    "Process": pid,
-                    "LocalAddr": local_address,
-                    "LocalPorts": [local_port],
-                }
-                graph_data["nodes"].append(node_data_1)
-                node_id_map[pid] = node_data_1
-            else:
-                # If the process is already a node, just add the local port if it's not already there
-                if local_port not in node_id_map[pid]["LocalPorts"]:
-                    node_id_map[pid]["LocalPorts"].append(local_port)
-
-            # Node data for the foreign address
-            if foreign_address not in node_id_map:
-                node_data_2 = {
-                    "id": foreign_address,
-                    "ForeignPorts": [foreign_port],
-                }
-                graph_data["nodes"].append(node_data_2)
-                node_id_map[foreign_address] = node_data_2
-            else:
-                if "ForeignPorts" not in node_id_map[foreign_address]:
-                    node_id_map[foreign_address]["ForeignPorts"] = []
-                if foreign_port not in node_id_map[foreign_address]["ForeignPorts"]:
-                    node_id_map[foreign_address]["ForeignPorts"].append(foreign_port)
-
-            # Edge data
-            edge_data = {"from": pid, "to": foreign_address}
-            if edge_data not in graph_data["edges"]:
-                graph_data["edges"].append(edge_data)
-
-    return graph_data
+            graph.add(
+                entry["Pid"],
+                entry["Pid"],
+                entry["Source Addr"],
+                entry["Source Port"],
+                entry["Destination Addr"],
+                entry["Destination Port"],
+            )
+    return build_network_graph(graph)
 
 
 def vt_check_file_hash(hash):
@@ -386,26 +503,21 @@ def vt_check_file_hash(hash):
         return None, "Unknown Error"
 
 
-def build_timeline(data):
-    timeline = []
-    nb_event = 1
-    actual_date = ""
-    try:
-        saved_date = data[0]["Created Date"]
-    except:
+def build_timeline(evidence_id):
+    """This function is used to count the timeline events of an evidence per creation date
+    Return : The list of [date, number of events] pairs in chronological order.
+    """
+    events = (
+        TimelineEvent.objects.filter(evidence_id=evidence_id, created__isnull=False)
+        .exclude(plugin="MFTScan")
+        .values("created")
+        .annotate(count=Count("row"))
+        .order_by("created")
+        .values_list("created", "count")
+    )
+    timeline = [[created.isoformat(), count] for created, count in events.iterator()]
+    if not timeline:
         raise GraphException("Could not generate timeline graph")
-    for i in data:
-        if i["Plugin"] != "MFTScan":
-            try:
-                actual_date = str(i["Created Date"])
-                if actual_date != saved_date:
-                    timeline.append([saved_date, nb_event])
-                    saved_date = actual_date
-                    nb_event = 1
-                else:
-                    nb_event += 1
-            except:
-                raise GraphException("Could not generate timeline graph")
     return timeline
 
 
@@ -414,15 +526,37 @@ def build_context(evidence_data, context, base_config_path, plugin):
     Return : The contructed plugin.
     """
     S3FileSystemHandler.default_open = volweb_open
-    volatility3.symbols.__path__ = [
-        os.path.abspath(f"media/{UPLOAD_PATH}")
-    ] + constants.SYMBOL_BASEPATHS
-    available_automagics = automagic.available(context)
+    _opened_evidences[evidence_data["bucket"]] = evidence_data.get("dump_id")
+    PDBUtility.download_pdb_isf = classmethod(download_pdb_isf)
+    # The parsed symbol tables are kept by the worker process and shared by the plugin runs.
+    IntermediateSymbolTable.__init__ = load_symbol_table
+    volatility3.symbols.__path__ = [symbols_path()] + constants.SYMBOL_BASEPATHS
+    os.makedirs(constants.CACHE_PATH, exist_ok=True)
+    # IndexedSymbolCacheMagic fills the identifier cache from the Symbol index for the shared symbol
+    # directory and scans the other ones, it replaces SymbolCacheMagic.
+    available_automagics = [
+        magic
+        for magic in automagic.available(context)
+        if type(magic) is not SymbolCacheMagic
+    ]
     automagics = automagic.choose_automagic(available_automagics, plugin)
     context.config[
         "automagic.LayerStacker.stackers"
     ] = automagic.stacker.choose_os_stackers(plugin)
     context.config["automagic.LayerStacker.single_location"] = evidence_data["bucket"]
+    kernel_config_path = interfaces.configuration.path_join(
+        base_config_path, plugin.__name__, "kernel"
+    )
+    use_kernel = any(
+        isinstance(requirement, ModuleRequirement) and requirement.name == "kernel"
+        for requirement in plugin.get_requirements()
+    )
+    # Reuse the layer stack and symbol table found during a previous run so the automagics have nothing left to scan.
+    if use_kernel and evidence_data.get("config"):
+        context.config.splice(
+            kernel_config_path,
+            interfaces.configuration.HierarchicalDict(evidence_data["config"]),
+        )
     constructed = construct_plugin(
         context,
         automagics,
@@ -431,23 +565,216 @@ def build_context(evidence_data, context, base_config_path, plugin):
         MuteProgress(),
         file_handler(evidence_data["output_path"]),
     )
+    if use_kernel and not evidence_data.get("config") and evidence_data.get("dump_id"):
+        config = dict(constructed.build_configuration().branch("kernel"))
+        Evidence.objects.filter(dump_id=evidence_data["dump_id"]).update(
+            dump_config=config
+        )
+        evidence_data["config"] = config
     return constructed
 
+
+def get_evidence_data(evidence, output_path=None):
+    """This function is used to build the evidence data given to the plugins
+    Return : The location, output path, cached kernel configuration and OS of the evidence.
+    """
+    if evidence.dump_url:
+        bucket = evidence.dump_url
+    else:
+        case_bucket = str(evidence.dump_linked_case.case_bucket_id)
+        bucket = f"s3://{case_bucket}/{evidence.dump_name}"
+    return {
+        "dump_id": evidence.dump_id,
+        "bucket": bucket,
+        "output_path": output_path,
+        "config": evidence.dump_config,
+        "os": evidence.dump_os,
+    }
+
+
+def get_evidence_size(evidence_data):
+    """This function is used to get the size of the image of an evidence
+    Return : The size in bytes, or None when the object storage cannot tell.
+    """
+    credentials = dict(get_storage_credentials(evidence_data["dump_id"]))
+    credentials.pop("etag", None)
+    credentials.pop("stage_local", None)
+    try:
+        return get_filesystem(**credentials).size(
+            evidence_data["bucket"].split("://", 1)[-1]
+        )
+    except Exception as e:
+        logger.warning(f"Could not get the size of {evidence_data['bucket']}: {e}")
+        return None
+
+
+def reset_peak_memory():
+    """Reset the peak resident memory of this process (Linux only)."""
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+    except OSError:
+        pass
+
+
+def get_peak_memory():
+    """This function is used to get the peak resident memory of this process since the last reset
+    Return : The peak memory in bytes.
+    """
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    # Without procfs only the peak since the start of the process is known.
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+ARTEFACT_BATCH_SIZE = 1000
+# Compressed chunks are larger so the repeated values are shared by more rows.
+ARTEFACT_CHUNK_SIZE = 10000
+
+
+def run_plugin(
+    model,
+    evidence_data,
+    base_config_path,
+    plugin,
+    config=None,
+    post_process=None,
+    row_model=Artefact,
+):
+    """Run a plugin against the evidence and save its result in the given model.
+    The rows are rendered and written to the database in batches as the plugin produces them,
+    so the result never has to be held in memory or go through the result backend.
+    post_process is applied to each batch of rows, row_model is the table the rows are written to.
+    The rows of the plugins listed in ARTEFACT_COMPRESSED_PLUGINS are written as compressed chunks instead.
+    Return : A small status record of the plugin run.
+    """
+    evidence_id = evidence_data["dump_id"]
+    label = model._meta.label_lower
+    batch_size = ARTEFACT_BATCH_SIZE
+    if row_model is Artefact and model.__name__ in settings.ARTEFACT_COMPRESSED_PLUGINS:
+        row_model = ArtefactChunk
+        batch_size = ARTEFACT_CHUNK_SIZE
+    started = time.monotonic()
+    reset_peak_memory()
+    with transaction.atomic():
+        model.objects.filter(evidence_id=evidence_id).delete()
+        row_model.for_plugin(evidence_id, label).delete()
+        if row_model is not TimelineEvent:
+            # The storage of the plugin may have changed since its previous run.
+            Artefact.for_plugin(evidence_id, label).delete()
+            ArtefactChunk.for_plugin(evidence_id, label).delete()
+
+    def save_rows(rows):
+        if post_process:
+            rows = post_process(rows)
+        row_model.save_rows(evidence_id, label, rows)
+
+    try:
+        context = contexts.Context()
+        for key, value in (config or {}).items():
+            context.config[key] = value
+        constructed = build_context(evidence_data, context, base_config_path, plugin)
+        count = 0
+        if constructed:
+            count = StreamingDictRenderer(save_rows, batch_size).render(
+                constructed.run()
+            )
+        status = "Success" if count else "Failed"
+        # Keep the empty result inline so the plugin reads as ran without output.
+        result = None if count else []
+    except UnsatisfiedException:
+        result = None
+        status = "Unsatisfied"
+    except:
+        result = None
+        status = "Failed"
+
+    if status != "Success":
+        row_model.for_plugin(evidence_id, label).delete()
+    model(evidence_id=evidence_id, artefacts=result).save()
+    if evidence_data.get("os"):
+        PluginStatistic(
+            evidence_id=evidence_id,
+            os=evidence_data["os"],
+            plugin=label,
+            image_size=evidence_data.get("size"),
+            status=status,
+            runtime=time.monotonic() - started,
+            peak_memory=get_peak_memory(),
+        ).save()
+    return {"plugin": model.__name__, "status": status}
+
+
+_storage_credentials = {}
+STORAGE_CREDENTIALS_TTL = 300
+
+
+def get_storage_credentials(dump_id):
+    """This function is used to find the object storage credentials of the image of an evidence, cached for a few minutes
+    Return : The client arguments (empty when the image is stored in the VolWeb bucket), the ETag and staging option of the image.
+    """
+    cached = _storage_credentials.get(dump_id)
+    if cached and cached[0] > time.monotonic():
+        return cached[1]
+    instance = Evidence.objects.filter(dump_id=dump_id).first()
+    credentials = {}
+    if instance and instance.dump_url:
+        if instance.dump_source == "AWS":
+            endpoint_url = f"https://s3.dualstack.{instance.dump_region}.amazonaws.com"
+        else:
+            endpoint_url = instance.dump_endpoint
+        credentials = {
+            "key": instance.dump_access_key_id,
+            "secret": instance.dump_access_key,
+            "region": instance.dump_region,
+            "endpoint_url": endpoint_url,
+        }
+    if instance:
+        credentials["etag"] = instance.dump_etag
+        credentials["stage_local"] = instance.dump_stage_local
+    _storage_credentials[dump_id] = (
+        time.monotonic() + STORAGE_CREDENTIALS_TTL,
+        credentials,
+    )
+    return credentials
+
+
+# Evidence of the image opened by the plugins of this process, by image URL, set by build_context.
+# The same image can be analysed in several cases, its URL alone does not tell which evidence it belongs to.
+_opened_evidences = {}
+
+
 @staticmethod
 def volweb_open(req: urllib.request.Request) -> Optional[Any]:
     if req.type == "s3":
         object_uri = "://".join(req.full_url.split("://")[1:])
-        try:
-            instance = Evidence.objects.get(dump_url=req.full_url)
-            if instance.dump_source == "AWS":
-                endpoint_url = f"https://s3.dualstack.{instance.dump_region}.amazonaws.com"
-            else:
-                endpoint_url = instance.dump_endpoint
-            return s3fs.S3FileSystem(
-                key=instance.dump_access_key_id,
-                secret=instance.dump_access_key,
-                client_kwargs={'region_name': instance.dump_region, 'endpoint_url': endpoint_url},
-            ).open(object_uri)
-        except Evidence.DoesNotExist:
-            return s3fs.S3FileSystem().open(object_uri)
+        credentials = dict(
+            get_storage_credentials(_opened_evidences.get(req.full_url))
+        )
+        etag = credentials.pop("etag", None)
+        if credentials.pop("stage_local", False):
+            staged = open_staged(etag)
+            if staged:
+                return staged
+        return open_cached(get_filesystem(**credentials), object_uri, etag)
     return None
+
+
+def stage_evidence(evidence_data):
+    """This function is used to download the image of an evidence to the worker before its analysis
+    Return : True if the image is now served from the local copy.
+    """
+    credentials = dict(get_storage_credentials(evidence_data["dump_id"]))
+    etag = credentials.pop("etag", None)
+    credentials.pop("stage_local", None)
+    object_uri = evidence_data["bucket"].split("://", 1)[-1]
+    try:
+        return stage_image(get_filesystem(**credentials), object_uri, etag)
+    except Exception as e:
+        logger.warning(f"Could not stage {evidence_data['bucket']}: {e}")
+        return False
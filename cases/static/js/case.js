@@ -53,6 +53,8 @@ $(document).ready(function () {
     const dump_region = $("#id_bind_dump_region").val();
     const dump_url = $("#id_bind_dump_url").val();
     const dump_endpoint = $("#id_bind_dump_endpoint").val();
+    const dump_stage_local = $("#id_bind_dump_stage_local").is(":checked");
+    const dump_profile = $("#id_bind_dump_profile").val();
 
     var formData = {
       dump_name: evidence_name,
@@ -65,6 +67,8 @@ $(document).ready(function () {
       dump_linked_case: case_id,
       dump_url: dump_url,
       dump_region: dump_region,
+      dump_stage_local: dump_stage_local,
+      dump_profile: dump_profile,
     };
 
     if (evidence_name === "") {
@@ -132,6 +136,12 @@ $(document).ready(function () {
     $(".modal_evidence_review").modal("hide");
   });
 
+  $("#rerun_analysis").on("click", function () {
+    const evidence_id = $(".modal_evidence_review").attr("id");
+    rerun_analysis(evidence_id, case_id);
+    $(".modal_evidence_review").modal("hide");
+  });
+
   $("#delete_evidence_confirmed").on("click", function () {
     clear_form();
     const evidence_id = $(".modal_evidence_review").attr("id");
@@ -1,4 +1,5 @@
 from django.contrib import admin
-from evidences.models import Evidence
+from evidences.models import Evidence, PluginStatistic
 
 admin.site.register(Evidence)
+admin.site.register(PluginStatistic)
@@ -0,0 +1,318 @@
+import itertools, json, logging
+import pyarrow as pa
+import pyarrow.parquet as pq
+from asgiref.sync import sync_to_async
+from django.http import StreamingHttpResponse
+from evidences.models import (
+    Artefact,
+    ArtefactChunk,
+    TimelineEvent,
+    iter_tree,
+    parse_timestamp,
+)
+from evidences.tasks import get_plugins
+
+logger = logging.getLogger(__name__)
+
+EXPORT_FORMATS = {
+    "parquet": ("application/vnd.apache.parquet", "parquet"),
+    "arrow": ("application/vnd.apache.arrow.stream", "arrows"),
+}
+
+# Number of rows converted and written at once.
+EXPORT_BATCH_SIZE = 10000
+
+# Size above which the encoded rows of a streamed JSON response are sent.
+STREAM_CHUNK_SIZE = 64 * 1024
+
+UINT64_MIN = 2**63
+
+UINT64_MAX = 2**64 - 1
+
+# Columns added to the plugin columns, always written last and typed as integers.
+ROW_COLUMNS = ["__id", "__parent", "evidence"]
+
+
+def get_plugin_model(instance, name):
+    """Return the plugin model of the evidence OS with the given name, whatever its case."""
+    for plugin in get_plugins(instance):
+        if plugin.__name__.lower() == name.lower():
+            return plugin
+    return None
+
+
+def flatten(rows, parent=None, counter=None):
+    """Turn a nested "__children" result into flat rows carrying an "__id" and a "__parent" id."""
+    counter = counter if counter is not None else [0]
+    for row in rows:
+        flat = {k: v for k, v in row.items() if k != "__children"}
+        flat["__id"] = counter[0]
+        flat["__parent"] = parent
+        counter[0] += 1
+        yield flat
+        yield from flatten(row.get("__children") or [], flat["__id"], counter)
+
+
+def plugin_rows(model, evidence_id):
+    """Stream the flat rows of a plugin result, wherever it is stored."""
+    label = model._meta.label_lower
+    inline = list(
+        model.objects.filter(evidence_id=evidence_id).values_list("artefacts", flat=True)[:1]
+    )
+    if not inline:
+        return
+    if inline[0] is not None:
+        yield from flatten(inline[0])
+        return
+    # The Timeliner rows are stored as TimelineEvent rows.
+    if model.__name__ == "Timeliner":
+        for event in TimelineEvent.for_plugin(evidence_id, label).order_by("row").iterator():
+            row = event.to_row()
+            row["__id"] = event.row
+            row["__parent"] = None
+            yield row
+        return
+    chunks = ArtefactChunk.for_plugin(evidence_id, label)
+    if chunks.exists():
+        yield from ArtefactChunk.rows(chunks)
+        return
+    yield from Artefact.rows(Artefact.for_plugin(evidence_id, label).order_by("row"))
+
+
+def plugin_roots(model, evidence_id):
+    """Stream the root rows of a plugin result, with their nested "__children"."""
+    inline = (
+        model.objects.filter(evidence_id=evidence_id)
+        .values_list("artefacts", flat=True)
+        .first()
+    )
+    if inline is not None:
+        yield from inline
+        return
+    yield from iter_tree(plugin_rows(model, evidence_id))
+
+
+def encode_rows(roots, output="json", envelope=None):
+    """Encode rows as a JSON array, or one JSON document per line for "ndjson".
+    The JSON array is wrapped in the envelope object, as its "artefacts" member, when one is given.
+    Return : A generator of the encoded chunks.
+    """
+
+    def encode(value):
+        return json.dumps(value, ensure_ascii=False, separators=(",", ":"))
+
+    if output == "ndjson":
+        head, tail = "", ""
+        rows = (encode(root) + "\n" for root in roots)
+    else:
+        head, tail = "[", "]"
+        if envelope is not None:
+            head = encode({**envelope, "artefacts": []})[:-3] + "["
+            tail = "]}"
+        rows = ((encode(root) if i == 0 else "," + encode(root)) for i, root in enumerate(roots))
+    buffer = [head]
+    size = len(head)
+    for row in rows:
+        buffer.append(row)
+        size += len(row)
+        if size >= STREAM_CHUNK_SIZE:
+            yield "".join(buffer).encode()
+            buffer = []
+            size = 0
+    buffer.append(tail)
+    data = "".join(buffer).encode()
+    if data:
+        yield data
+
+
+async def serve_chunks(chunks):
+    """Hand the chunks of a synchronous generator to the ASGI server one at a time.
+    Given a synchronous iterator, Django consumes it entirely before sending the first byte.
+    The generator runs in the thread of the request so it keeps using the same database connection.
+    """
+    next_chunk = sync_to_async(next, thread_sensitive=True)
+    try:
+        while True:
+            chunk = await next_chunk(chunks, None)
+            if chunk is None:
+                break
+            yield chunk
+    finally:
+        await sync_to_async(chunks.close, thread_sensitive=True)()
+
+
+def streaming_response(chunks, content_type):
+    response = StreamingHttpResponse(serve_chunks(chunks), content_type=content_type)
+    # Let the reverse proxy forward the chunks as they come.
+    response["X-Accel-Buffering"] = "no"
+    return response
+
+
+def artefacts_response(request, roots, envelope=None):
+    """Stream plugin rows, as NDJSON when the "output" query parameter asks for "ndjson"."""
+    if request.query_params.get("output") == "ndjson":
+        return streaming_response(encode_rows(roots, "ndjson"), "application/x-ndjson")
+    return streaming_response(encode_rows(roots, "json", envelope), "application/json")
+
+
+def is_timestamp(value):
+    return (
+        len(value) >= 19
+        and value[4] == "-"
+        and value[10] in "T "
+        and parse_timestamp(value) is not None
+    )
+
+
+def value_kind(value):
+    if isinstance(value, bool):
+        return "bool"
+    if isinstance(value, int):
+        return "int"
+    if isinstance(value, float):
+        return "float"
+    if isinstance(value, str) and is_timestamp(value):
+        return "timestamp"
+    return "string"
+
+
+def infer_schema(rows):
+    """Choose an Arrow type for every column from all of its values.
+    Integers become int64, or uint64 for kernel addresses, timestamps are stored in UTC.
+    Columns with mixed values are exported as strings.
+    Return : The Arrow schema.
+    """
+    kinds = {}
+    minimum = {}
+    maximum = {}
+    for row in rows:
+        for column, value in row.items():
+            column_kinds = kinds.setdefault(column, set())
+            if value is None:
+                continue
+            kind = value_kind(value)
+            column_kinds.add(kind)
+            if kind == "int":
+                minimum[column] = min(minimum.get(column, value), value)
+                maximum[column] = max(maximum.get(column, value), value)
+    fields = []
+    for column, column_kinds in kinds.items():
+        if column in ROW_COLUMNS:
+            continue
+        if column_kinds == {"bool"}:
+            data_type = pa.bool_()
+        elif column_kinds == {"int"} and maximum[column] >= UINT64_MIN:
+            data_type = pa.uint64() if minimum[column] >= 0 else pa.string()
+        elif column_kinds == {"int"}:
+            data_type = pa.int64()
+        elif column_kinds and column_kinds <= {"int", "float"}:
+            data_type = pa.float64()
+        elif column_kinds == {"timestamp"}:
+            data_type = pa.timestamp("us", tz="UTC")
+        else:
+            data_type = pa.string()
+        fields.append(pa.field(column, data_type))
+    fields += [pa.field(column, pa.int64()) for column in ROW_COLUMNS]
+    return pa.schema(fields)
+
+
+def convert(value, data_type):
+    """Return the value as the column type holds it, or None when it does not fit that type."""
+    if value is None:
+        return None
+    if pa.types.is_string(data_type):
+        if isinstance(value, str):
+            return value
+        return json.dumps(value) if isinstance(value, (list, dict)) else str(value)
+    if pa.types.is_timestamp(data_type):
+        return parse_timestamp(value)
+    kind = value_kind(value)
+    if pa.types.is_boolean(data_type):
+        return value if kind == "bool" else None
+    if pa.types.is_floating(data_type):
+        return value if kind in ("int", "float") else None
+    if kind != "int":
+        return None
+    if pa.types.is_unsigned_integer(data_type):
+        return value if 0 <= value <= UINT64_MAX else None
+    return value if -UINT64_MIN <= value < UINT64_MIN else None
+
+
+def record_batch(rows, schema):
+    arrays = []
+    for field in schema:
+        values = [row.get(field.name) for row in rows]
+        converted = [convert(value, field.type) for value in values]
+        dropped = sum(
+            value is not None and result is None for value, result in zip(values, converted)
+        )
+        if dropped:
+            logger.warning(
+                f"Export: {dropped} values of {field.name} do not fit {field.type}, "
+                "they are exported as null"
+            )
+        arrays.append(pa.array(converted, field.type))
+    return pa.RecordBatch.from_arrays(arrays, schema=schema)
+
+
+class StreamSink:
+    """Write-only file object collecting what the Arrow writers produce until it is drained."""
+
+    def __init__(self):
+        self.chunks = []
+        self.closed = False
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def drain(self):
+        data = b"".join(self.chunks)
+        self.chunks = []
+        return data
+
+
+def plugin_sources(name, evidences):
+    """Return the (plugin model, evidence id) pairs of the evidences having a plugin with the given name."""
+    sources = []
+    for evidence in evidences:
+        model = get_plugin_model(evidence, name)
+        if model is not None:
+            sources.append((model, evidence.dump_id))
+    return sources
+
+
+def export_plugin(sources, output="parquet"):
+    """Export plugin results as a Parquet file or an Arrow stream.
+    The rows are read once from the database, one batch at a time: the columns are typed from the
+    first batch, a later value their type cannot hold is exported as null.
+    Each row carries the id of its evidence in an "evidence" column.
+    Return : A generator of the bytes of the file.
+    """
+
+    def source_rows():
+        for model, evidence_id in sources:
+            for row in plugin_rows(model, evidence_id):
+                row["evidence"] = evidence_id
+                yield row
+
+    rows = source_rows()
+    batch = list(itertools.islice(rows, EXPORT_BATCH_SIZE))
+    schema = infer_schema(batch)
+    sink = StreamSink()
+    if output == "arrow":
+        writer = pa.ipc.new_stream(sink, schema)
+    else:
+        writer = pq.ParquetWriter(sink, schema)
+    while batch:
+        writer.write_batch(record_batch(batch, schema))
+        yield sink.drain()
+        batch = list(itertools.islice(rows, EXPORT_BATCH_SIZE))
+    writer.close()
+    yield sink.drain()
@@ -1,13 +1,13 @@
 from evidences.models import Evidence
 from cases.models import Case
 from django import forms
-from django.forms import TextInput, Select, PasswordInput
+from django.forms import TextInput, Select, PasswordInput, CheckboxInput
 
 
 class EvidenceForm(forms.ModelForm):
     class Meta:
         model = Evidence
-        fields = ["dump_name", "dump_os", "dump_linked_case"]
+        fields = ["dump_name", "dump_os", "dump_linked_case", "dump_stage_local", "dump_profile"]
         dump_linked_case = forms.ModelChoiceField(
             queryset=Case.objects.all(), required=True
         )
@@ -28,12 +28,16 @@ class EvidenceForm(forms.ModelForm):
             "dump_linked_case": Select(
                 attrs={"class": "form-select form-control form-control-sm "}
             ),
+            "dump_stage_local": CheckboxInput(attrs={"class": "form-check-input"}),
+            "dump_profile": Select(
+                attrs={"class": "form-select form-control form-control-sm"}
+            ),
         }
 
 class BindEvidenceForm(forms.ModelForm):
     class Meta:
         model = Evidence
-        fields = ["dump_name", "dump_os", "dump_linked_case", "dump_access_key_id", "dump_access_key", "dump_url", "dump_source", "dump_endpoint", "dump_region"]
+        fields = ["dump_name", "dump_os", "dump_linked_case", "dump_access_key_id", "dump_access_key", "dump_url", "dump_source", "dump_endpoint", "dump_region", "dump_stage_local", "dump_profile"]
         dump_linked_case = forms.ModelChoiceField(
             queryset=Case.objects.all(), required=True
         )
@@ -107,5 +111,17 @@ class BindEvidenceForm(forms.ModelForm):
                     "id": "id_bind_dump_endpoint",
                 }
             ),
+            "dump_stage_local": CheckboxInput(
+                attrs={
+                    "class": "form-check-input",
+                    "id": "id_bind_dump_stage_local",
+                }
+            ),
+            "dump_profile": Select(
+                attrs={
+                    "class": "form-select form-control form-control-sm",
+                    "id": "id_bind_dump_profile",
+                }
+            ),
 
         }
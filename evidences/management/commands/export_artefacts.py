@@ -0,0 +1,38 @@
+import sys
+from django.core.management.base import BaseCommand, CommandError
+from evidences.export import EXPORT_FORMATS, export_plugin, plugin_sources
+from evidences.models import Evidence
+
+
+class Command(BaseCommand):
+    help = "Export the result of a plugin as a Parquet file or an Arrow stream."
+
+    def add_arguments(self, parser):
+        parser.add_argument("plugin", help="Name of the plugin, e.g. PsList")
+        target = parser.add_mutually_exclusive_group(required=True)
+        target.add_argument("--evidence", type=int, help="Id of the evidence")
+        target.add_argument("--case", type=int, help="Id of the case")
+        parser.add_argument(
+            "--format", choices=list(EXPORT_FORMATS), default="parquet"
+        )
+        parser.add_argument(
+            "--output", help="Path of the file to write, the standard output by default"
+        )
+
+    def handle(self, *args, **options):
+        if options["evidence"] is not None:
+            evidences = Evidence.objects.filter(dump_id=options["evidence"])
+        else:
+            evidences = Evidence.objects.filter(
+                dump_linked_case=options["case"]
+            ).order_by("dump_id")
+        sources = plugin_sources(options["plugin"], evidences)
+        if not sources:
+            raise CommandError("No evidence has this plugin.")
+        if options["output"]:
+            with open(options["output"], "wb") as f:
+                for data in export_plugin(sources, options["format"]):
+                    f.write(data)
+        else:
+            for data in export_plugin(sources, options["format"]):
+                sys.stdout.buffer.write(data)
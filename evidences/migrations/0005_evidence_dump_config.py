@@ -0,0 +1,18 @@
+# Generated by Django 4.2.11 on 2026-10-18 13:42
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('evidences', '0004_evidence_dump_endpoint_evidence_dump_region'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='evidence',
+            name='dump_config',
+            field=models.JSONField(null=True),
+        ),
+    ]
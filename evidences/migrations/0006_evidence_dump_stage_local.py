@@ -0,0 +1,18 @@
+# Generated by Django 4.2.11 on 2026-10-18 13:46
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('evidences', '0005_evidence_dump_config'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='evidence',
+            name='dump_stage_local',
+            field=models.BooleanField(default=False),
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 4.2.11 on 2026-10-18 13:49
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('evidences', '0006_evidence_dump_stage_local'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Artefact',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('plugin', models.CharField(max_length=100)),
+                ('row', models.IntegerField()),
+                ('parent', models.IntegerField(null=True)),
+                ('pid', models.BigIntegerField(null=True)),
+                ('offset', models.BigIntegerField(null=True)),
+                ('timestamp', models.DateTimeField(null=True)),
+                ('data', models.JSONField()),
+                ('evidence', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='evidences.evidence')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['evidence', 'plugin', 'row'], name='evidences_a_evidenc_1f309d_idx'), models.Index(fields=['evidence', 'plugin', 'pid'], name='evidences_a_evidenc_a812ee_idx'), models.Index(fields=['evidence', 'plugin', 'offset'], name='evidences_a_evidenc_0837c8_idx'), models.Index(fields=['evidence', 'plugin', 'timestamp'], name='evidences_a_evidenc_266c18_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,68 @@
+# Generated by Django 4.2.11 on 2026-10-18 13:55
+
+import django.contrib.postgres.indexes
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations, models
+import django.db.models.deletion
+import django.db.models.functions.text
+
+
+def move_timelines(apps, schema_editor):
+    """Move the timelines stored inline on the Timeliner rows to the TimelineEvent table."""
+    from evidences.models import parse_timestamp
+
+    TimelineEvent = apps.get_model("evidences", "TimelineEvent")
+    for app_label in ("windows_engine", "linux_engine"):
+        Timeliner = apps.get_model(app_label, "Timeliner")
+        for timeliner in Timeliner.objects.exclude(artefacts=None).iterator():
+            if not timeliner.artefacts:
+                continue
+            TimelineEvent.objects.bulk_create(
+                [
+                    TimelineEvent(
+                        evidence_id=timeliner.evidence_id,
+                        row=row,
+                        plugin=event.get("Plugin") or "",
+                        description=event.get("Description") or "",
+                        created=parse_timestamp(event.get("Created Date")),
+                        modified=parse_timestamp(event.get("Modified Date")),
+                        accessed=parse_timestamp(event.get("Accessed Date")),
+                        changed=parse_timestamp(event.get("Changed Date")),
+                    )
+                    for row, event in enumerate(timeliner.artefacts)
+                ],
+                batch_size=1000,
+            )
+            timeliner.artefacts = None
+            timeliner.save()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('evidences', '0007_artefact'),
+        ('windows_engine', '0008_alter_ads_artefacts_alter_cachedump_artefacts_and_more'),
+        ('linux_engine', '0003_alter_bash_artefacts_alter_capabilities_artefacts_and_more'),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        migrations.CreateModel(
+            name='TimelineEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('row', models.IntegerField()),
+                ('plugin', models.CharField(max_length=100)),
+                ('description', models.TextField()),
+                ('created', models.DateTimeField(null=True)),
+                ('modified', models.DateTimeField(null=True)),
+                ('accessed', models.DateTimeField(null=True)),
+                ('changed', models.DateTimeField(null=True)),
+                ('evidence', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='evidences.evidence')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['evidence', 'row'], name='evidences_t_evidenc_ebf121_idx'), models.Index(fields=['evidence', 'plugin', 'row'], name='evidences_t_evidenc_3cdb48_idx'), models.Index(fields=['evidence', 'created', 'row'], name='evidences_t_evidenc_226d0c_idx'), models.Index(fields=['evidence', 'modified', 'row'], name='evidences_t_evidenc_f9e41c_idx'), models.Index(fields=['evidence', 'accessed', 'row'], name='evidences_t_evidenc_9cb477_idx'), models.Index(fields=['evidence', 'changed', 'row'], name='evidences_t_evidenc_2367cb_idx'), django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper('plugin'), name='gin_trgm_ops'), django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper('description'), name='gin_trgm_ops'), name='timelineevent_search_trgm')],
+            },
+        ),
+        migrations.RunPython(move_timelines, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 4.2.11 on 2026-10-18 14:12
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('evidences', '0008_timelineevent'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PluginStatistic',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('os', models.CharField(choices=[('Windows', 'Windows'), ('Linux', 'Linux')], max_length=10)),
+                ('plugin', models.CharField(max_length=100)),
+                ('image_size', models.BigIntegerField(null=True)),
+                ('status', models.CharField(max_length=20)),
+                ('runtime', models.FloatField()),
+                ('peak_memory', models.BigIntegerField(null=True)),
+                ('date', models.DateTimeField(auto_now_add=True)),
+                ('evidence', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, to='evidences.evidence')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['os', 'plugin', 'date'], name='evidences_p_os_381b5b_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 4.2.11 on 2026-10-18 14:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('evidences', '0009_pluginstatistic'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='evidence',
+            name='dump_phases',
+            field=models.JSONField(null=True),
+        ),
+        migrations.AddField(
+            model_name='evidence',
+            name='dump_profile',
+            field=models.CharField(choices=[('triage', 'Triage'), ('standard', 'Standard'), ('full', 'Full')], default='full', max_length=10),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.11 on 2026-10-18 14:21
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('evidences', '0010_evidence_dump_profile'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='evidence',
+            name='dump_engine',
+            field=models.CharField(max_length=20, null=True),
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 4.2.11 on 2026-10-18 14:24
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('evidences', '0011_evidence_dump_engine'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArtefactChunk',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('plugin', models.CharField(max_length=100)),
+                ('row_count', models.IntegerField()),
+                ('data', models.BinaryField()),
+                ('evidence', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='evidences.evidence')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['evidence', 'plugin', 'id'], name='evidences_a_evidenc_b5ab7a_idx')],
+            },
+        ),
+    ]
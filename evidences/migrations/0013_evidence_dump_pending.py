@@ -0,0 +1,18 @@
+# Generated by Django 4.2.11 on 2026-10-18 14:56
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('evidences', '0012_artefactchunk'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='evidence',
+            name='dump_pending',
+            field=models.JSONField(null=True),
+        ),
+    ]
@@ -1,4 +1,10 @@
-from django.db import models
+import datetime, json, zstandard
+from django.conf import settings
+from django.contrib.postgres.indexes import GinIndex, OpClass
+from django.db import connection, models
+from django.db.models import Q
+from django.db.models.functions import Upper
+from django.db.models.query_utils import DeferredAttribute
 from cases.models import Case
 
 OS = (
@@ -12,6 +18,12 @@ SOURCES = (
     ("MINIO","MINIO"),
 )
 
+PROFILES = (
+    ("triage", "Triage"),
+    ("standard", "Standard"),
+    ("full", "Full"),
+)
+
 class Evidence(models.Model):
     """
     Evidence Model
@@ -30,5 +42,620 @@ class Evidence(models.Model):
     dump_region = models.TextField(null=True)
     dump_endpoint = models.TextField(null=True)
     dump_source = models.CharField(max_length=10,choices=SOURCES, null=True)
+    # Download the image to the worker before the analysis instead of streaming it from the bucket.
+    dump_stage_local = models.BooleanField(default=False)
+    # Kernel layer stack and symbol table resolved by the automagics, reused by every plugin.
+    dump_config = models.JSONField(null=True)
+    # Plugins run during the analysis, the triage plugins always come first.
+    dump_profile = models.CharField(max_length=10, choices=PROFILES, default="full")
+    # Phases of the current analysis that are complete.
+    dump_phases = models.JSONField(null=True)
+    # Version of volatility3 the results were computed with, results are shared between evidences of the same image.
+    dump_engine = models.CharField(max_length=20, null=True)
+    # Time each lazy plugin was enqueued, it is enqueued again when its task was lost.
+    dump_pending = models.JSONField(null=True)
     def __str__(self):
         return str(self.dump_name)
+
+
+class PluginStatistic(models.Model):
+    """
+    PluginStatistic Model
+    Holds the runtime and peak memory of a plugin run, used to schedule the next analyses.
+    """
+
+    evidence = models.ForeignKey(Evidence, on_delete=models.SET_NULL, null=True)
+    os = models.CharField(max_length=10, choices=OS)
+    plugin = models.CharField(max_length=100)
+    image_size = models.BigIntegerField(null=True)
+    status = models.CharField(max_length=20)
+    runtime = models.FloatField()
+    peak_memory = models.BigIntegerField(null=True)
+    date = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [models.Index(fields=["os", "plugin", "date"])]
+
+
+# Columns pulled out of the plugin rows into indexed columns, the first one present is used.
+PID_COLUMNS = ("PID", "Pid", "Process ID")
+OFFSET_COLUMNS = ("Offset", "Offset(V)", "Offset(P)", "Offset (V)", "Offset (P)")
+TIMESTAMP_COLUMNS = ("CreateTime", "Create Time", "Created Date", "Timestamp")
+
+
+def to_signed64(value):
+    """Kernel addresses do not fit in a signed bigint, store them in two's complement."""
+    return value - 2**64 if value >= 2**63 else value
+
+
+def extract_pid(row):
+    for column in PID_COLUMNS:
+        value = row.get(column)
+        if isinstance(value, int) and not isinstance(value, bool):
+            return value
+    return None
+
+
+def extract_offset(row):
+    for column in OFFSET_COLUMNS:
+        value = row.get(column)
+        if isinstance(value, int) and not isinstance(value, bool):
+            return to_signed64(value)
+    return None
+
+
+def parse_timestamp(value):
+    """Parse an ISO 8601 timestamp, naive timestamps are taken as UTC.
+    Return : The aware datetime, or None when the value is not a timestamp.
+    """
+    if not isinstance(value, str):
+        return None
+    try:
+        timestamp = datetime.datetime.fromisoformat(value)
+    except ValueError:
+        return None
+    if timestamp.tzinfo is None:
+        timestamp = timestamp.replace(tzinfo=datetime.timezone.utc)
+    return timestamp
+
+
+def extract_timestamp(row):
+    for column in TIMESTAMP_COLUMNS:
+        timestamp = parse_timestamp(row.get(column))
+        if timestamp is not None:
+            return timestamp
+    return None
+
+
+def build_tree(rows):
+    """Rebuild the nested "__children" structure of flat rows carrying an "__id" and a "__parent" id.
+    Rows whose parent is not part of the given rows are returned as roots.
+    Return : The list of root rows.
+    """
+    nodes = {}
+    roots = []
+    for row in rows:
+        node = {k: v for k, v in row.items() if k not in ("__id", "__parent")}
+        node["__children"] = []
+        nodes[row["__id"]] = node
+        parent = nodes.get(row["__parent"]) if row["__parent"] is not None else None
+        if parent is not None:
+            parent["__children"].append(node)
+        else:
+            roots.append(node)
+    return roots
+
+
+def iter_tree(rows):
+    """Rebuild the nested "__children" structure of flat rows one root at a time.
+    The rows must come in the order they were flattened, each parent before its children,
+    so only the tree of the current root is held in memory.
+    Return : A generator of the root rows.
+    """
+    root = None
+    nodes = {}
+    for row in rows:
+        node = {k: v for k, v in row.items() if k not in ("__id", "__parent")}
+        node["__children"] = []
+        parent = nodes.get(row["__parent"]) if row["__parent"] is not None else None
+        if parent is not None:
+            parent["__children"].append(node)
+        else:
+            if root is not None:
+                yield root
+            root = node
+            nodes = {}
+        nodes[row["__id"]] = node
+    if root is not None:
+        yield root
+
+
+class Artefact(models.Model):
+    """
+    Artefact Model
+    Holds a single row of a plugin result, the columns used for lookups are indexed.
+    """
+
+    evidence = models.ForeignKey(Evidence, on_delete=models.CASCADE)
+    plugin = models.CharField(max_length=100)
+    row = models.IntegerField()
+    parent = models.IntegerField(null=True)
+    pid = models.BigIntegerField(null=True)
+    offset = models.BigIntegerField(null=True)
+    timestamp = models.DateTimeField(null=True)
+    data = models.JSONField()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["evidence", "plugin", "row"]),
+            models.Index(fields=["evidence", "plugin", "pid"]),
+            models.Index(fields=["evidence", "plugin", "offset"]),
+            models.Index(fields=["evidence", "plugin", "timestamp"]),
+        ]
+
+    @classmethod
+    def from_row(cls, evidence_id, plugin, row):
+        data = {k: v for k, v in row.items() if k not in ("__id", "__parent")}
+        return cls(
+            evidence_id=evidence_id,
+            plugin=plugin,
+            row=row["__id"],
+            parent=row["__parent"],
+            pid=extract_pid(data),
+            offset=extract_offset(data),
+            timestamp=extract_timestamp(data),
+            data=data,
+        )
+
+    @classmethod
+    def save_rows(cls, evidence_id, plugin, rows):
+        cls.objects.bulk_create([cls.from_row(evidence_id, plugin, row) for row in rows])
+
+    @classmethod
+    def for_plugin(cls, evidence_id, plugin):
+        return cls.objects.filter(evidence_id=evidence_id, plugin=plugin)
+
+    @staticmethod
+    def rows(queryset):
+        """Turn Artefact rows back into the flat rows they were created from.
+        The rows are fetched in chunks, so a result is never loaded into memory at once.
+        """
+        rows = queryset.values_list("row", "parent", "data").iterator(
+            chunk_size=settings.ARTEFACT_READ_CHUNK_SIZE
+        )
+        for row, parent, data in rows:
+            data["__id"] = row
+            data["__parent"] = parent
+            yield data
+
+
+def encode_column(values):
+    """Dictionary-encode a column when its values repeat, as paths and names usually do."""
+    try:
+        dictionary = list(dict.fromkeys(values))
+    except TypeError:
+        return values
+    if len(dictionary) > len(values) // 2:
+        return values
+    indexes = {value: index for index, value in enumerate(dictionary)}
+    return {"dictionary": dictionary, "indexes": [indexes[value] for value in values]}
+
+
+def decode_column(column):
+    if isinstance(column, dict):
+        return [column["dictionary"][index] for index in column["indexes"]]
+    return column
+
+
+class ArtefactChunk(models.Model):
+    """
+    ArtefactChunk Model
+    Holds a batch of rows of a plugin result as a zstd-compressed columnar blob.
+    The column names are only stored once and the repeated values are dictionary-encoded.
+    """
+
+    evidence = models.ForeignKey(Evidence, on_delete=models.CASCADE)
+    plugin = models.CharField(max_length=100)
+    row_count = models.IntegerField()
+    data = models.BinaryField()
+
+    class Meta:
+        indexes = [models.Index(fields=["evidence", "plugin", "id"])]
+
+    @classmethod
+    def from_rows(cls, evidence_id, plugin, rows):
+        columns = list(dict.fromkeys(key for row in rows for key in row))
+        missing = {}
+        values = []
+        for index, column in enumerate(columns):
+            absent = [number for number, row in enumerate(rows) if column not in row]
+            if absent:
+                missing[index] = absent
+            values.append(encode_column([row.get(column) for row in rows]))
+        payload = json.dumps(
+            {"columns": columns, "values": values, "missing": missing},
+            separators=(",", ":"),
+        )
+        return cls(
+            evidence_id=evidence_id,
+            plugin=plugin,
+            row_count=len(rows),
+            data=zstandard.ZstdCompressor().compress(payload.encode()),
+        )
+
+    @classmethod
+    def save_rows(cls, evidence_id, plugin, rows):
+        cls.from_rows(evidence_id, plugin, rows).save()
+
+    @classmethod
+    def for_plugin(cls, evidence_id, plugin):
+        return cls.objects.filter(evidence_id=evidence_id, plugin=plugin)
+
+    @staticmethod
+    def rows(queryset):
+        """Decompress the chunks back into the flat rows they were created from."""
+        decompressor = zstandard.ZstdDecompressor()
+        for data in queryset.order_by("id").values_list("data", flat=True).iterator():
+            payload = json.loads(decompressor.decompress(bytes(data)))
+            columns = payload["columns"]
+            values = [decode_column(column) for column in payload["values"]]
+            missing = {
+                columns[int(index)]: set(numbers)
+                for index, numbers in payload["missing"].items()
+            }
+            for number, row in enumerate(zip(*values)):
+                yield {
+                    column: value
+                    for column, value in zip(columns, row)
+                    if column not in missing or number not in missing[column]
+                }
+
+
+def match_row(row, pid=None, offset=None):
+    return (pid is None or extract_pid(row) == pid) and (
+        offset is None or extract_offset(row) == to_signed64(offset)
+    )
+
+
+def filter_artefacts(model, evidence_id, pid=None, offset=None):
+    """Return the rows of a plugin result matching the given pid and/or offset.
+    The lookup is done on the indexed Artefact rows, or in Python for results stored inline or compressed.
+    Return : The list of matching rows, or None when the plugin has no result.
+    """
+    inline = list(
+        model.objects.filter(evidence_id=evidence_id).values_list("artefacts", flat=True)[:1]
+    )
+    if not inline:
+        return None
+    if inline[0] is not None:
+        if not inline[0]:
+            return None
+        return [row for row in inline[0] if match_row(row, pid, offset)]
+    chunks = ArtefactChunk.for_plugin(evidence_id, model._meta.label_lower)
+    if chunks.exists():
+        return build_tree(
+            row for row in ArtefactChunk.rows(chunks) if match_row(row, pid, offset)
+        )
+    queryset = Artefact.objects.filter(
+        evidence_id=evidence_id, plugin=model._meta.label_lower
+    )
+    if not queryset.exists():
+        return None
+    if pid is not None:
+        queryset = queryset.filter(pid=pid)
+    if offset is not None:
+        queryset = queryset.filter(offset=to_signed64(offset))
+    return build_tree(Artefact.rows(queryset.order_by("row")))
+
+
+
+def filter_offsets(model, evidence_id, offsets):
+    """Return the rows of a plugin result at each of the given offsets, reading the result once.
+    Return : A dict of each offset to its matching rows, without their children.
+    """
+    wanted = {to_signed64(offset): offset for offset in offsets}
+    results = {offset: [] for offset in offsets}
+    inline = list(
+        model.objects.filter(evidence_id=evidence_id).values_list("artefacts", flat=True)[:1]
+    )
+    if not inline:
+        return results
+    if inline[0] is not None:
+        rows = inline[0]
+    else:
+        chunks = ArtefactChunk.for_plugin(evidence_id, model._meta.label_lower)
+        if chunks.exists():
+            rows = ArtefactChunk.rows(chunks)
+        else:
+            rows = Artefact.rows(
+                Artefact.objects.filter(
+                    evidence_id=evidence_id,
+                    plugin=model._meta.label_lower,
+                    offset__in=list(wanted),
+                ).order_by("row")
+            )
+    for row in rows:
+        offset = wanted.get(extract_offset(row))
+        if offset is not None:
+            results[offset].append(row)
+    return results
+
+def filter_process(models, evidence_id, pid):
+    """Return the rows of several plugin results belonging to a process.
+    The rows of every plugin stored as Artefact rows are fetched with a single query on the pid index.
+    Return : A dict of the model names to their matching rows, None for the plugins without a result.
+    """
+    results = {}
+    labels = {}
+    for model in models:
+        inline = list(
+            model.objects.filter(evidence_id=evidence_id).values_list("artefacts", flat=True)[:1]
+        )
+        if not inline or (inline[0] is not None and not inline[0]):
+            results[model.__name__] = None
+        elif inline[0] is not None:
+            results[model.__name__] = [row for row in inline[0] if extract_pid(row) == pid]
+        else:
+            labels[model._meta.label_lower] = model.__name__
+    compressed = set(
+        ArtefactChunk.objects.filter(evidence_id=evidence_id, plugin__in=labels)
+        .values_list("plugin", flat=True)
+        .distinct()
+    )
+    for label in compressed:
+        rows = ArtefactChunk.rows(ArtefactChunk.for_plugin(evidence_id, label))
+        results[labels.pop(label)] = build_tree(row for row in rows if match_row(row, pid))
+    rows = {label: [] for label in labels}
+    queryset = Artefact.objects.filter(
+        evidence_id=evidence_id, plugin__in=labels, pid=pid
+    ).order_by("plugin", "row")
+    for plugin, row, parent, data in queryset.values_list("plugin", "row", "parent", "data"):
+        data["__id"] = row
+        data["__parent"] = parent
+        rows[plugin].append(data)
+    for label, name in labels.items():
+        if rows[label] or Artefact.for_plugin(evidence_id, label).exists():
+            results[name] = build_tree(rows[label])
+        else:
+            results[name] = None
+    return results
+
+
+def copy_rows(model, source_id, target_id):
+    """Copy the rows of a model from an evidence to another one with a single INSERT ... SELECT.
+    The rows never leave the database, whatever their number.
+    Return : The number of copied rows.
+    """
+    quote = connection.ops.quote_name
+    evidence_column = model._meta.get_field("evidence").column
+    columns = [
+        field.column for field in model._meta.concrete_fields if not field.primary_key
+    ]
+    values = ["%s" if column == evidence_column else quote(column) for column in columns]
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"INSERT INTO {quote(model._meta.db_table)} ({', '.join(map(quote, columns))}) "
+            f"SELECT {', '.join(values)} FROM {quote(model._meta.db_table)} "
+            f"WHERE {quote(evidence_column)} = %s",
+            [target_id, source_id],
+        )
+        return cursor.rowcount
+
+
+class ArtefactsDescriptor(DeferredAttribute):
+    """Load the plugin result from its Artefact rows or chunks when it is not stored inline.
+    The loaded result is kept aside so saving the instance does not copy it into the column.
+    """
+
+    def __get__(self, instance, cls=None):
+        if instance is None:
+            return self
+        value = super().__get__(instance, cls)
+        if value is not None or instance.pk is None:
+            return value
+        cache_name = f"_{self.field.attname}_rows"
+        if cache_name not in instance.__dict__:
+            label = instance._meta.label_lower
+            chunks = ArtefactChunk.for_plugin(instance.evidence_id, label)
+            if chunks.exists():
+                rows = ArtefactChunk.rows(chunks)
+            else:
+                rows = Artefact.rows(
+                    Artefact.for_plugin(instance.evidence_id, label).order_by("row")
+                )
+            instance.__dict__[cache_name] = build_tree(rows) or None
+        return instance.__dict__[cache_name]
+
+    def __set__(self, instance, value):
+        # Being a data descriptor, __get__ is used even though the value lives in the instance dict.
+        instance.__dict__[self.field.attname] = value
+        instance.__dict__.pop(f"_{self.field.attname}_rows", None)
+
+
+class ArtefactsField(models.JSONField):
+    """JSONField holding the result of a plugin, stored inline or as Artefact rows."""
+
+    descriptor_class = ArtefactsDescriptor
+
+
+class TimelineEvent(models.Model):
+    """
+    TimelineEvent Model
+    Holds a single row of the Timeliner plugin result, indexed for the timeline searches.
+    """
+
+    evidence = models.ForeignKey(Evidence, on_delete=models.CASCADE)
+    row = models.IntegerField()
+    plugin = models.CharField(max_length=100)
+    description = models.TextField()
+    created = models.DateTimeField(null=True)
+    modified = models.DateTimeField(null=True)
+    accessed = models.DateTimeField(null=True)
+    changed = models.DateTimeField(null=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["evidence", "row"]),
+            models.Index(fields=["evidence", "plugin", "row"]),
+            models.Index(fields=["evidence", "created", "row"]),
+            models.Index(fields=["evidence", "modified", "row"]),
+            models.Index(fields=["evidence", "accessed", "row"]),
+            models.Index(fields=["evidence", "changed", "row"]),
+            # Case-insensitive lookups are done on UPPER(column), index the same expressions.
+            GinIndex(
+                OpClass(Upper("plugin"), name="gin_trgm_ops"),
+                OpClass(Upper("description"), name="gin_trgm_ops"),
+                name="timelineevent_search_trgm",
+            ),
+        ]
+
+    @classmethod
+    def from_row(cls, evidence_id, label, row):
+        """Build an event from a Timeliner row, the plugin label is implied by the model."""
+        return cls(
+            evidence_id=evidence_id,
+            row=row["__id"],
+            plugin=row.get("Plugin") or "",
+            description=row.get("Description") or "",
+            created=parse_timestamp(row.get("Created Date")),
+            modified=parse_timestamp(row.get("Modified Date")),
+            accessed=parse_timestamp(row.get("Accessed Date")),
+            changed=parse_timestamp(row.get("Changed Date")),
+        )
+
+    @classmethod
+    def save_rows(cls, evidence_id, label, rows):
+        cls.objects.bulk_create([cls.from_row(evidence_id, label, row) for row in rows])
+
+    @classmethod
+    def for_plugin(cls, evidence_id, label):
+        return cls.objects.filter(evidence_id=evidence_id)
+
+    def to_row(self):
+        """Return the event with the column names of the Timeliner plugin."""
+        return {
+            "Plugin": self.plugin,
+            "Description": self.description,
+            "Created Date": self.created.isoformat() if self.created else None,
+            "Modified Date": self.modified.isoformat() if self.modified else None,
+            "Accessed Date": self.accessed.isoformat() if self.accessed else None,
+            "Changed Date": self.changed.isoformat() if self.changed else None,
+        }
+
+
+# Timeliner columns as named by the DataTables requests and their TimelineEvent field.
+TIMELINE_COLUMNS = {
+    "Plugin": "plugin",
+    "Description": "description",
+    "Created Date": "created",
+    "Modified Date": "modified",
+    "Accessed Date": "accessed",
+    "Changed Date": "changed",
+}
+TIMELINE_LOOKUPS = {
+    "=": "exact",
+    ">": "gt",
+    "<": "lt",
+    "starts": "startswith",
+    "ends": "endswith",
+    "contains": "contains",
+}
+
+
+def timeline_criterion(field, condition, value1, value2):
+    """Translate a searchBuilder criterion on a TimelineEvent field into a filter.
+    Return : The Q object, or None when the criterion cannot be applied to the field.
+    """
+    is_date = field not in ("plugin", "description")
+    negate = condition.startswith("!")
+    condition = condition.lstrip("!")
+    if condition == "null":
+        query = Q(**{f"{field}__isnull": True}) if is_date else Q(**{field: ""})
+    elif condition == "between":
+        if is_date:
+            value1, value2 = parse_timestamp(value1), parse_timestamp(value2)
+        if value1 is None or value2 is None:
+            return None
+        query = Q(**{f"{field}__range": (value1, value2)})
+    else:
+        lookup = TIMELINE_LOOKUPS.get(condition)
+        if is_date:
+            # Text matching is not supported on timestamps, only comparisons.
+            if lookup not in ("exact", "gt", "lt"):
+                return None
+            value1 = parse_timestamp(value1)
+        if lookup is None or value1 is None:
+            return None
+        query = Q(**{f"{field}__{lookup}": value1})
+    return ~query if negate else query
+
+
+def search_timeline(evidence_id, params):
+    """Serve a DataTables server-side request on the timeline of an evidence.
+    The searchBuilder criteria, global search, ordering, timestamp range and pagination are all done by the database.
+    Return : The DataTables response without the draw counter.
+    """
+    queryset = TimelineEvent.objects.filter(evidence_id=evidence_id)
+    records_total = queryset.count()
+
+    criteria = []
+    n = 0
+    while f"searchBuilder[criteria][{n}][condition]" in params:
+        field = TIMELINE_COLUMNS.get(params.get(f"searchBuilder[criteria][{n}][data]"))
+        if field:
+            criterion = timeline_criterion(
+                field,
+                params[f"searchBuilder[criteria][{n}][condition]"],
+                params.get(f"searchBuilder[criteria][{n}][value1]"),
+                params.get(f"searchBuilder[criteria][{n}][value2]"),
+            )
+            if criterion is not None:
+                criteria.append(criterion)
+        n += 1
+    if criteria:
+        query = criteria[0]
+        for criterion in criteria[1:]:
+            if params.get("searchBuilder[logic]") == "OR":
+                query |= criterion
+            else:
+                query &= criterion
+        queryset = queryset.filter(query)
+
+    search_value = params.get("search[value]", "")
+    if search_value:
+        queryset = queryset.filter(
+            Q(plugin__icontains=search_value) | Q(description__icontains=search_value)
+        )
+
+    # The chart only gives a lower bound when a single point is selected.
+    timestamp_min = parse_timestamp(params.get("timestamp_min"))
+    timestamp_max = parse_timestamp(params.get("timestamp_max"))
+    if timestamp_min:
+        queryset = queryset.filter(created__gte=timestamp_min)
+    if timestamp_max:
+        queryset = queryset.filter(created__lte=timestamp_max)
+
+    filtered = bool(criteria or search_value or timestamp_min or timestamp_max)
+    records_filtered = queryset.count() if filtered else records_total
+
+    order_column = params.get(f"columns[{params.get('order[0][column]')}][data]")
+    order_field = TIMELINE_COLUMNS.get(order_column)
+    if order_field:
+        prefix = "-" if params.get("order[0][dir]") == "desc" else ""
+        queryset = queryset.order_by(f"{prefix}{order_field}", f"{prefix}row")
+    else:
+        queryset = queryset.order_by("row")
+
+    try:
+        start = max(int(params.get("start", 0)), 0)
+        length = int(params.get("length", 25))
+    except ValueError:
+        start, length = 0, 25
+    if length < 0:
+        # DataTables asks for every row with a length of -1, keep the page bounded.
+        length = 1000
+    return {
+        "recordsTotal": records_total,
+        "recordsFiltered": records_filtered,
+        "data": [event.to_row() for event in queryset[start : start + length]],
+    }
@@ -1,5 +1,5 @@
 from rest_framework import serializers
-from evidences.models import Evidence
+from evidences.models import Evidence, PROFILES
 
 
 class EvidenceSerializer(serializers.ModelSerializer):
@@ -12,7 +12,8 @@ class EvidenceSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Evidence
-        fields = "__all__"
+        exclude = ["dump_config", "dump_pending"]
+        read_only_fields = ["dump_phases"]
         extra_fields = ["dump_linked_case_name"]
 
     def get_dump_linked_case_name(self, obj):
@@ -22,3 +23,9 @@ class EvidenceSerializer(serializers.ModelSerializer):
 
 class AnalysisStartSerializer(serializers.Serializer):
     dump_id = serializers.IntegerField()
+    dump_profile = serializers.ChoiceField(choices=PROFILES, required=False)
+
+
+class AnalysisRerunSerializer(serializers.Serializer):
+    dump_id = serializers.IntegerField()
+    plugins = serializers.ListField(child=serializers.CharField(), required=False)
@@ -416,6 +416,8 @@ function create_evidence(filename, etag) {
     dump_etag: etag,
     dump_os: $("#id_dump_os").val(),
     dump_linked_case: $("#id_dump_linked_case").val(),
+    dump_stage_local: $("#id_dump_stage_local").is(":checked"),
+    dump_profile: $("#id_dump_profile").val(),
   };
   $.ajaxSetup({
     beforeSend: function (xhr, settings) {
@@ -435,7 +437,7 @@ function create_evidence(filename, etag) {
     },
     error: function (xhr, status, error) {
       if (xhr.status == 409) {
-        toastr.warning("Evidence with this ETag already exists.");
+        toastr.warning("Evidence with this ETag already exists in this case.");
       } else {
         toastr.error("An error occurred : " + error);
       }
@@ -494,6 +496,35 @@ function start_analysis(dump_id, case_id) {
   });
 }
 
+function rerun_analysis(dump_id, case_id) {
+  $.ajaxSetup({
+    beforeSend: function (xhr, settings) {
+      xhr.setRequestHeader(
+        "X-CSRFToken",
+        document.querySelector("[name=csrfmiddlewaretoken]").value,
+      );
+    },
+  });
+  $.ajax({
+    type: "POST",
+    url: "/api/evidences/rerun_task/",
+    data: JSON.stringify({ dump_id: dump_id }),
+    contentType: "application/json",
+    dataType: "json",
+    success: function (data) {
+      if (data.plugins.length) {
+        toastr.success("Running again: " + data.plugins.join(", "));
+      } else {
+        toastr.info("Every plugin already succeeded.");
+      }
+      get_evidences(case_id);
+    },
+    error: function (xhr, status, error) {
+      toastr.error("An error occurred while relaunching the analysis: " + error);
+    },
+  });
+}
+
 function clear_form() {
   $(":input", "#evidence_form")
     .not(":button, :submit, :reset, :hidden")
@@ -1,197 +1,733 @@
 from celery import shared_task
 import evidences
-from evidences.models import Evidence
+from evidences.models import (
+    Artefact,
+    ArtefactChunk,
+    Evidence,
+    PluginStatistic,
+    TimelineEvent,
+    copy_rows,
+)
 import windows_engine.models as windows
 import linux_engine.models as linux
 from VolWeb.voltools import (
+    GraphException,
+    build_context,
     build_timeline,
     generate_windows_network_graph,
     generate_linux_network_graph,
+    get_evidence_data,
+    get_evidence_size,
+    stage_evidence,
 )
+from VolWeb.storage import release_staged
 from VolWeb.voltools import fix_permissions
-from celery.result import allow_join_result
-from celery import group
-import os, time
+from celery import chain, chord
+from celery.utils.nodenames import worker_direct
+from billiard import get_context
+from channels.layers import get_channel_layer
+from asgiref.sync import async_to_sync
+from volatility3.framework import constants, contexts
+from django.apps import apps
+from django.conf import settings
+from django.db import connections, transaction
+from statistics import median
+import os, time, logging
+
+logger = logging.getLogger(__name__)
+
+WINDOWS_PLUGINS = [
+    windows.PsScan,
+    windows.PsTree,
+    windows.DeviceTree,
+    windows.CmdLine,
+    windows.Privs,
+    windows.Sessions,
+    windows.GetSIDs,
+    windows.LdrModules,
+    windows.Modules,
+    windows.SvcScan,
+    windows.Envars,
+    windows.NetScan,
+    windows.NetStat,
+    windows.Hashdump,
+    windows.Lsadump,
+    windows.Cachedump,
+    windows.HiveList,
+    windows.Timeliner,
+    windows.SkeletonKeyCheck,
+    windows.Malfind,
+    windows.UserAssist,
+    windows.FileScan,
+    windows.DllList,
+    windows.DriverModule,
+    windows.VadWalk,
+    windows.SSDT,
+    windows.MFTScan,
+    windows.ADS,
+    windows.MBRScan,
+    windows.ThrdScan,
+    windows.DriverIrp,
+    windows.IAT,
+]
+
+LINUX_PLUGINS = [
+    linux.PsTree,
+    linux.PsAux,
+    linux.PsScan,
+    linux.Lsof,
+    linux.Bash,
+    linux.Elfs,
+    linux.Sockstat,
+    linux.Timeliner,
+    linux.Capabilities,
+    linux.Kmsg,
+    linux.Malfind,
+    linux.Lsmod,
+    linux.Envars,
+    linux.MountInfo,
+    linux.tty_check,
+    linux.LibraryList,
+]
+
+
+# Plugins the analysts look at first, they are run before any other plugin.
+WINDOWS_TRIAGE = [windows.PsTree, windows.NetScan, windows.CmdLine, windows.Malfind]
+LINUX_TRIAGE = [linux.PsTree, linux.PsAux, linux.Sockstat, linux.Malfind]
+
+# Expensive plugins, queued behind every other plugin.
+WINDOWS_DEEP = [
+    windows.Timeliner,
+    windows.MFTScan,
+    windows.FileScan,
+    windows.VadWalk,
+    windows.ThrdScan,
+]
+LINUX_DEEP = [linux.Timeliner]
+
+# Phases of an analysis and the priority of their tasks, 0 is the highest priority.
+PHASES = [("triage", 0), ("standard", 5), ("deep", 9)]
+
+# Phases run by each analysis profile.
+PROFILE_PHASES = {
+    "triage": ["triage"],
+    "standard": ["triage", "standard"],
+    "full": ["triage", "standard", "deep"],
+}
+
+
+def get_plugins(instance):
+    """
+    Return the plugin models run during the analysis of the given evidence.
+    """
+    if instance.dump_os == "Windows":
+        return WINDOWS_PLUGINS
+    if instance.dump_os == "Linux":
+        return LINUX_PLUGINS
+    return []
+
+
+def get_phases(instance):
+    """
+    Split the plugins of the given evidence into the phases of its analysis profile.
+    The lazy plugins are left out, they are only run when their results are requested.
+    Return : A list of (phase, priority, plugins) tuples, empty phases are left out.
+    """
+    plugins = [
+        plugin
+        for plugin in get_plugins(instance)
+        if plugin.__name__ not in settings.LAZY_PLUGINS
+    ]
+    if instance.dump_os == "Windows":
+        triage, deep = WINDOWS_TRIAGE, WINDOWS_DEEP
+    else:
+        triage, deep = LINUX_TRIAGE, LINUX_DEEP
+    members = {
+        "triage": [plugin for plugin in plugins if plugin in triage],
+        "standard": [
+            plugin for plugin in plugins if plugin not in triage and plugin not in deep
+        ],
+        "deep": [plugin for plugin in plugins if plugin in deep],
+    }
+    profile = PROFILE_PHASES.get(instance.dump_profile, PROFILE_PHASES["full"])
+    return [
+        (phase, priority, members[phase])
+        for phase, priority in PHASES
+        if phase in profile and members[phase]
+    ]
+
+
+# Number of previous runs of a plugin used to estimate its cost.
+STATISTICS_HISTORY = 20
+
+
+def schedule_plugins(instance, size, plugins):
+    """
+    Order the plugins by decreasing expected runtime, based on their previous runs on the same OS.
+    Runtimes are scaled to the size of the image, plugins that never ran come first.
+    Return : The ordered plugins and the plugins expected to use a lot of memory.
+    """
+    labels = {plugin._meta.label_lower: plugin for plugin in plugins}
+    history = {label: [] for label in labels}
+    statistics = (
+        PluginStatistic.objects.filter(os=instance.dump_os, plugin__in=labels)
+        .exclude(status="Unsatisfied")
+        .order_by("-date")
+        .values_list("plugin", "image_size", "runtime", "peak_memory")
+    )
+    for label, image_size, runtime, peak_memory in statistics[
+        : STATISTICS_HISTORY * len(labels)
+    ]:
+        if len(history[label]) >= STATISTICS_HISTORY:
+            continue
+        if size and image_size:
+            runtime = runtime * size / image_size
+        history[label].append((runtime, peak_memory or 0))
+
+    runtimes = {}
+    heavy = []
+    for label, plugin in labels.items():
+        if not history[label]:
+            runtimes[plugin] = float("inf")
+            continue
+        runtimes[plugin] = median(runtime for runtime, _ in history[label])
+        if (
+            median(memory for _, memory in history[label])
+            >= settings.PLUGIN_HEAVY_MEMORY
+        ):
+            heavy.append(plugin)
+    ordered = sorted(plugins, key=lambda plugin: runtimes[plugin], reverse=True)
+    return ordered, [plugin for plugin in ordered if plugin in heavy]
+
+
+def get_result_models(instance):
+    """
+    Return every model holding the analysis results of the given evidence.
+    """
+    if instance.dump_os == "Windows":
+        graphs = [windows.Info, windows.TimeLineChart, windows.NetGraph]
+    elif instance.dump_os == "Linux":
+        graphs = [linux.TimeLineChart, linux.NetGraph]
+    else:
+        graphs = []
+    return get_plugins(instance) + graphs + [Artefact, ArtefactChunk, TimelineEvent]
+
+
+# Plugin outcomes that running the plugin again on the same image would not change.
+REUSABLE_STATUSES = ("Success", "Unsatisfied")
+
+
+def reuse_analysis(instance):
+    """
+    Copy the results of another evidence of the same image, analysed with the same version
+    of volatility3 and at least the plugins of the evidence profile, none of which failed.
+    The images are identified by their ETag, the results are copied inside the database:
+    every result query is scoped to its evidence, and the copies stay valid when the source
+    evidence is analysed again or deleted.
+    Return : True if the results were reused and no plugin has to run.
+    """
+    if not instance.dump_etag:
+        return False
+    names = [
+        plugin.__name__ for _, _, plugins in get_phases(instance) for plugin in plugins
+    ]
+    candidates = (
+        Evidence.objects.filter(
+            dump_etag=instance.dump_etag,
+            dump_os=instance.dump_os,
+            dump_status=100,
+            dump_engine=constants.PACKAGE_VERSION,
+        )
+        .exclude(dump_id=instance.dump_id)
+        .order_by("-dump_id")
+    )
+    source = next(
+        (
+            candidate
+            for candidate in candidates
+            if all(
+                (candidate.dump_logs or {}).get(name) in REUSABLE_STATUSES
+                for name in names
+            )
+        ),
+        None,
+    )
+    if source is None:
+        return False
+
+    with transaction.atomic():
+        for model in get_result_models(instance):
+            model.objects.filter(evidence=instance).delete()
+            copy_rows(model, source.dump_id, instance.dump_id)
+        instance.dump_logs = {
+            name: status
+            for name, status in source.dump_logs.items()
+            if status != "Pending"
+        }
+        instance.dump_phases = [phase for phase, _, _ in get_phases(instance)]
+        instance.dump_engine = source.dump_engine
+        # The kernel configuration is valid for the same image, the next plugin runs skip the scan.
+        instance.dump_config = source.dump_config
+        instance.dump_status = 100
+        instance.save()
+    logger.info(f"Evidence {instance.dump_id}: reused the results of {source.dump_id}")
+    for phase in instance.dump_phases:
+        notify_phase(instance.dump_id, phase)
+    return True
 
 
 @shared_task
-def start_analysis(dump_id):
+def start_analysis(dump_id, plugins=None, reuse=True):
     """
     The main analysis routine for both Windows and Linux.
+    When a list of plugin names is given, only these plugins are run again and the
+    results of the other plugins are kept.
+    Unless reuse is False, the results of an evidence of the same image are reused when available.
+    Every plugin is dispatched as part of a chord: each plugin reports its own completion
+    and the final callback takes care of the post-processing.
+    The plugins are split into the phases of the evidence profile: the triage plugins
+    are dispatched at a high priority, the expensive ones behind every other plugin.
+    Within a phase, the plugins are dispatched longest first according to their previous runs.
     """
     instance = Evidence.objects.get(dump_id=dump_id)
+    if reuse and plugins is None and reuse_analysis(instance):
+        return
     output_path = f"media/{instance.dump_id}/"
     if not os.path.exists(os.path.dirname(output_path)):
         os.makedirs(os.path.dirname(output_path))
-    if instance.dump_url:
-        evidence_data = {
-            "bucket": instance.dump_url,
-            "output_path": output_path,
-        }
-    else:
-        evidence_data = {
-            "bucket": f"s3://{str(instance.dump_linked_case.case_bucket_id)}/{instance.dump_name}",
-            "output_path": output_path,
-        }
+    evidence_data = get_evidence_data(instance, output_path)
+    evidence_data["size"] = get_evidence_size(evidence_data)
+    route = {}
+    if instance.dump_stage_local:
+        if stage_evidence(evidence_data):
+            # The copy is on the disk of this worker, every task of the analysis is routed to it.
+            if start_analysis.request.hostname:
+                route["queue"] = worker_direct(start_analysis.request.hostname).name
+        else:
+            logger.warning(
+                f"Evidence {dump_id}: staging failed, the image will be streamed"
+            )
 
-    if instance.dump_os == "Windows":
-        # We need to download the pdb in a single thread because volatility3 doesn't like multithreading when fetching ISF.
-        # I'll try to propose a fix to the volatility3 team so this bug is fixed in future releases.
-        # For this I am running the Windows.Info pluging first just so that the pdbfile is downloaded and cached in a single thread.
-        # This method only works with a single celery worker. No problem if the ISF are imported offline.
+    if instance.dump_os == "Windows" and (
+        not evidence_data["config"]
+        or not windows.Info.objects.filter(evidence=instance).exists()
+    ):
+        # Info resolves the kernel configuration once instead of letting every plugin scan the image.
+        # The PDB is fetched through the shared symbol cache, so concurrent analyses do not race on it.
         windows.Info(evidence=instance).run(evidence_data)
-        volweb_plugins = [
-            windows.PsScan(evidence=instance),
-            windows.PsTree(evidence=instance),
-            windows.DeviceTree(evidence=instance),
-            windows.CmdLine(evidence=instance),
-            windows.Privs(evidence=instance),
-            windows.Sessions(evidence=instance),
-            windows.GetSIDs(evidence=instance),
-            windows.LdrModules(evidence=instance),
-            windows.Modules(evidence=instance),
-            windows.SvcScan(evidence=instance),
-            windows.Envars(evidence=instance),
-            windows.NetScan(evidence=instance),
-            windows.NetStat(evidence=instance),
-            windows.Hashdump(evidence=instance),
-            windows.Lsadump(evidence=instance),
-            windows.Cachedump(evidence=instance),
-            windows.HiveList(evidence=instance),
-            windows.Timeliner(evidence=instance),
-            windows.SkeletonKeyCheck(evidence=instance),
-            windows.Malfind(evidence=instance),
-            windows.UserAssist(evidence=instance),
-            windows.FileScan(evidence=instance),
-            windows.DllList(evidence=instance),
-            windows.DriverModule(evidence=instance),
-            windows.VadWalk(evidence=instance),
-            windows.SSDT(evidence=instance),
-            windows.MFTScan(evidence=instance),
-            windows.ADS(evidence=instance),
-            windows.MBRScan(evidence=instance),
-            windows.ThrdScan(evidence=instance),
-            windows.DriverIrp(evidence=instance),
-            windows.IAT(evidence=instance),
+    elif instance.dump_os == "Linux" and not evidence_data["config"]:
+        # Resolve the kernel configuration once instead of letting every plugin scan the image.
+        try:
+            build_context(
+                evidence_data,
+                contexts.Context(),
+                linux.base_config_path,
+                linux.PLUGIN_LIST["linux.pslist.PsList"],
+            )
+        except Exception as e:
+            logger.warning(f"Evidence {dump_id}: {e}")
+
+    phases = get_phases(instance)
+    members = {
+        phase: [plugin.__name__ for plugin in phase_plugins]
+        for phase, _, phase_plugins in phases
+    }
+    total = sum(len(names) for names in members.values())
+    if plugins is None:
+        instance.dump_logs = {}
+        instance.dump_phases = []
+    else:
+        instance.dump_logs = {
+            name: status
+            for name, status in (instance.dump_logs or {}).items()
+            if name not in plugins and any(name in names for names in members.values())
+        }
+        instance.dump_phases = [
+            phase
+            for phase in instance.dump_phases or []
+            if not any(name in plugins for name in members.get(phase, []))
         ]
+    instance.dump_status = min(
+        count_completed(instance.dump_logs) * 100 // max(total, 1), 99
+    )
+    # The kernel configuration was stored by the Info run, it must not be written back as None.
+    instance.save(update_fields=["dump_logs", "dump_phases", "dump_status"])
+
+    volweb_plugins = []
+    heavy = []
+    priorities = {}
+    for phase, priority, phase_plugins in phases:
+        phase_plugins, phase_heavy = schedule_plugins(
+            instance,
+            evidence_data["size"],
+            [
+                plugin
+                for plugin in phase_plugins
+                if plugins is None or plugin.__name__ in plugins
+            ],
+        )
+        volweb_plugins += phase_plugins
+        heavy += phase_heavy
+        for plugin in phase_plugins:
+            priorities[plugin] = (phase, priority)
+    if not volweb_plugins:
+        return
+
+    if settings.PLUGIN_BATCH_WORKERS > 0:
+        chain(
+            run_plugins_batch.s(
+                evidence_data,
+                [plugin._meta.label for plugin in volweb_plugins],
+                [plugin._meta.label for plugin in heavy],
+                members,
+                total,
+            ).set(**route),
+            finalize_analysis.s(dump_id).set(**route),
+        ).on_error(analysis_failed.s(dump_id))()
+        return
+
+    def run(plugin, signature):
+        phase, priority = priorities[plugin]
+        return (
+            signature.set(priority=priority, **route),
+            plugin_completed.s(dump_id, total, phase, members[phase]).set(
+                priority=priority, **route
+            ),
+        )
+
+    # The triage plugins are published first and at the highest priority, the longest plugins
+    # of each phase first. The memory-heavy plugins are chained so that only one of them runs
+    # at a time, wherever it is picked up.
+    header = []
+    for plugin in volweb_plugins:
+        if plugin not in heavy:
+            header.append(chain(*run(plugin, plugin.run.s(evidence_data))))
+        elif plugin == heavy[0]:
+            header.append(
+                chain(
+                    task
+                    for heavy_plugin in heavy
+                    for task in run(heavy_plugin, heavy_plugin.run.si(evidence_data))
+                )
+            )
+    # The error callback of the body also runs when a member of the header raises.
+    chord(header)(
+        finalize_analysis.s(dump_id).set(**route).on_error(analysis_failed.s(dump_id))
+    )
+
+
+def run_plugin_model(label, evidence_data):
+    """
+    Run the plugin of the given model in a process of the batch pool.
+    """
+    return apps.get_model(label).run(evidence_data)
+
+
+@shared_task
+def run_plugins_batch(evidence_data, labels, heavy=None, phases=None, total=None):
+    """
+    Run the plugins of an evidence in a pool of processes forked from this worker.
+    The processes inherit the loaded framework, plugins and symbol caches as well as
+    the resolved kernel configuration, so each plugin only pays for its own scan.
+    The plugins are started in the given order, at most one of the heavy ones at a time.
+    """
+    dump_id = evidence_data["dump_id"]
+    total = total or len(labels)
+    heavy = set(heavy or [])
+    phases = {
+        plugin: (phase, plugins)
+        for phase, plugins in (phases or {}).items()
+        for plugin in plugins
+    }
+    queue = list(labels)
+    running = {}
+    records = []
+    # The forked processes must open their own database connections.
+    connections.close_all()
+    pool = get_context("fork").Pool(processes=settings.PLUGIN_BATCH_WORKERS)
+    try:
+        while queue or running:
+            heavy_running = any(label in heavy for label in running)
+            for label in list(queue):
+                if len(running) >= settings.PLUGIN_BATCH_WORKERS:
+                    break
+                if label in heavy:
+                    if heavy_running:
+                        continue
+                    heavy_running = True
+                queue.remove(label)
+                running[label] = pool.apply_async(
+                    run_plugin_model, (label, evidence_data)
+                )
+            for label, result in list(running.items()):
+                if not result.ready():
+                    continue
+                del running[label]
+                try:
+                    record = result.get()
+                except Exception as e:
+                    logger.warning(f"Evidence {dump_id}: {label} failed: {e}")
+                    record = {"plugin": label.split(".")[-1], "status": "Failed"}
+                records.append(
+                    plugin_completed(
+                        record, dump_id, total, *phases.get(record["plugin"], ())
+                    )
+                )
+            if running:
+                time.sleep(0.5)
+        pool.close()
+    except BaseException:
+        pool.terminate()
+        raise
+    finally:
+        pool.join()
+    return records
 
-        task_group = group(plugin.run.s(evidence_data) for plugin in volweb_plugins)
-        group_result = task_group.apply_async()
-
-        while not group_result.ready():
-            completed_tasks = len([r for r in group_result.results if r.ready()])
-            total_tasks = len(group_result.results)
-            status = (completed_tasks * 100) / total_tasks
-            if instance.dump_status != status:
-                instance.dump_status = (completed_tasks * 100) / total_tasks
-                instance.save()
-            time.sleep(1)
-
-        with allow_join_result():
-            logs = {}
-            result = group_result.get()
-            for i in range(0, len(result)):
-                plugin_name = volweb_plugins[i].__class__.__name__
-                if result[i] == "Unsatisfied":
-                    logs[plugin_name] = "Unsatisfied"
-                    result[i] = None
-                elif result[i]:
-                    logs[plugin_name] = "Success"
-                else:
-                    logs[plugin_name] = "Failed"
-
-                volweb_plugins[i].__class__.objects.filter(evidence=instance).delete()
-                volweb_plugins[i].artefacts = result[i]
-                volweb_plugins[i].save()
-
-            windows.TimeLineChart.objects.filter(evidence=instance).delete()
-            if result[17]:
-                windows.TimeLineChart(
-                    evidence=instance, artefacts=build_timeline(result[17])
-                ).save()
 
-            windows.NetGraph.objects.filter(evidence=instance).delete()
-            if result[11] and result[12]:
+def count_completed(logs):
+    """
+    Return the number of plugins of the evidence logs that ran, the pending lazy plugins excluded.
+    """
+    return sum(status != "Pending" for status in logs.values())
+
+
+@shared_task
+def plugin_completed(record, dump_id, total, phase=None, members=None):
+    """
+    Record the outcome of a single plugin and update the evidence progress.
+    The evidence row is locked so that concurrent plugins do not overwrite each other.
+    The evidence websocket group is notified when the last plugin of a phase completes.
+    """
+    with transaction.atomic():
+        instance = Evidence.objects.select_for_update().get(dump_id=dump_id)
+        logs = instance.dump_logs or {}
+        logs[record["plugin"]] = record["status"]
+        instance.dump_logs = logs
+        # The evidence is only marked as complete once the post-processing is done.
+        instance.dump_status = min(count_completed(logs) * 100 // total, 99)
+        completed = (
+            phase is not None
+            and phase not in (instance.dump_phases or [])
+            and all(plugin in logs for plugin in members)
+        )
+        if completed:
+            instance.dump_phases = (instance.dump_phases or []) + [phase]
+        instance.save()
+    if completed:
+        notify_phase(dump_id, phase)
+    return record
+
+
+def notify_evidence(dump_id, message):
+    """
+    Send a message to the websocket group of the given evidence.
+    """
+    channel_layer = get_channel_layer()
+    async_to_sync(channel_layer.group_send)(
+        f"volatility_tasks_{dump_id}",
+        {
+            "type": "send_notification",
+            "message": message,
+        },
+    )
+
+
+def notify_phase(dump_id, phase):
+    """
+    Notify the evidence websocket group that a phase of the analysis is complete.
+    """
+    notify_evidence(
+        dump_id,
+        {
+            "name": "analysis_phase",
+            "phase": phase,
+            "status": "success",
+            "msg": f"The {phase} phase of the analysis is complete.",
+        },
+    )
+
+
+def request_plugin(plugin, dump_id):
+    """
+    Run a lazy plugin of the given evidence unless it is already running.
+    The plugin is marked as pending in the evidence logs so that it is only enqueued once.
+    It is enqueued again when still pending after LAZY_PLUGIN_TIMEOUT, its task was lost.
+    Return : True if the plugin is lazy and its results will be available later.
+    """
+    if plugin.__name__ not in settings.LAZY_PLUGINS:
+        return False
+    with transaction.atomic():
+        instance = Evidence.objects.select_for_update().filter(dump_id=dump_id).first()
+        if instance is None:
+            return False
+        logs = instance.dump_logs or {}
+        pending = instance.dump_pending or {}
+        now = time.time()
+        if (
+            logs.get(plugin.__name__) != "Pending"
+            or now - pending.get(plugin.__name__, 0) > settings.LAZY_PLUGIN_TIMEOUT
+        ):
+            logs[plugin.__name__] = "Pending"
+            pending[plugin.__name__] = now
+            instance.dump_logs = logs
+            instance.dump_pending = pending
+            instance.save()
+            transaction.on_commit(
+                lambda: run_lazy_plugin.apply_async(
+                    args=[dump_id, plugin._meta.label], priority=1
+                )
+            )
+    return True
+
+
+@shared_task
+def run_lazy_plugin(dump_id, label):
+    """
+    Run a lazy plugin the first time its results are requested.
+    The evidence websocket group is notified once the results are available.
+    """
+    instance = Evidence.objects.get(dump_id=dump_id)
+    plugin = apps.get_model(label)
+    evidence_data = get_evidence_data(instance, f"media/{instance.dump_id}/")
+    evidence_data["size"] = get_evidence_size(evidence_data)
+    try:
+        record = plugin.run(evidence_data)
+    except Exception as e:
+        logger.warning(f"Evidence {dump_id}: {label} failed: {e}")
+        record = {"plugin": plugin.__name__, "status": "Failed"}
+    with transaction.atomic():
+        instance = Evidence.objects.select_for_update().get(dump_id=dump_id)
+        logs = instance.dump_logs or {}
+        logs[record["plugin"]] = record["status"]
+        instance.dump_logs = logs
+        instance.dump_pending = {
+            name: enqueued
+            for name, enqueued in (instance.dump_pending or {}).items()
+            if name != record["plugin"]
+        }
+        instance.save()
+    notify_evidence(
+        dump_id,
+        {
+            "name": "lazy_plugin",
+            "plugin": record["plugin"],
+            "status": "success" if record["status"] == "Success" else "error",
+            "msg": (
+                f"{record['plugin']} results are now available."
+                if record["status"] == "Success"
+                else f"{record['plugin']} computation failed."
+            ),
+        },
+    )
+    return record
+
+
+def get_rerun_plugins(instance):
+    """
+    Return the names of the plugins of the evidence profile that failed or never ran.
+    """
+    logs = instance.dump_logs or {}
+    return [
+        plugin.__name__
+        for _, _, plugins in get_phases(instance)
+        for plugin in plugins
+        if logs.get(plugin.__name__) in (None, "Failed", "Unsatisfied")
+    ]
+
+
+def get_artefacts(plugin, instance):
+    """
+    Return the saved result of a plugin for the given evidence.
+    """
+    data = plugin.objects.filter(evidence=instance).first()
+    return data.artefacts if data else None
+
+
+@shared_task
+def finalize_analysis(records, dump_id):
+    """
+    Build the graphs once every plugin has saved its result.
+    A graph that cannot be built is left out, the evidence is completed anyway.
+    """
+    instance = Evidence.objects.get(dump_id=dump_id)
+    output_path = f"media/{instance.dump_id}/"
+
+    if instance.dump_os == "Windows":
+        windows.TimeLineChart.objects.filter(evidence=instance).delete()
+        try:
+            windows.TimeLineChart(
+                evidence=instance,
+                artefacts=build_timeline(dump_id),
+            ).save()
+        except GraphException as e:
+            logger.warning(f"Evidence {dump_id}: {e}")
+        except Exception as e:
+            logger.error(f"Evidence {dump_id}: could not build the timeline: {e}")
+
+        windows.NetGraph.objects.filter(evidence=instance).delete()
+        try:
+            connections = (get_artefacts(windows.NetScan, instance) or []) + (
+                get_artefacts(windows.NetStat, instance) or []
+            )
+            if connections:
                 windows.NetGraph(
                     evidence=instance,
-                    artefacts=generate_windows_network_graph(result[11] + result[12]),
+                    artefacts=generate_windows_network_graph(connections),
                 ).save()
-            else:
-                if result[11]:
-                    windows.NetGraph(
-                        evidence=instance,
-                        artefacts=generate_windows_network_graph(result[11]),
-                    ).save()
-                if result[12]:
-                    windows.NetGraph(
-                        evidence=instance,
-                        artefacts=generate_windows_network_graph(result[12]),
-                    ).save()
-            fix_permissions(output_path)
-            instance.dump_logs = logs
-            instance.dump_status = 100
-            instance.save()
-    if instance.dump_os == "Linux":
-        volweb_plugins = [
-            linux.PsTree(evidence=instance),
-            linux.PsAux(evidence=instance),
-            linux.PsScan(evidence=instance),
-            linux.Lsof(evidence=instance),
-            linux.Bash(evidence=instance),
-            linux.Elfs(evidence=instance),
-            linux.Sockstat(evidence=instance),
-            linux.Timeliner(evidence=instance),
-            linux.Capabilities(evidence=instance),
-            linux.Kmsg(evidence=instance),
-            linux.Malfind(evidence=instance),
-            linux.Lsmod(evidence=instance),
-            linux.Envars(evidence=instance),
-            linux.MountInfo(evidence=instance),
-            linux.tty_check(evidence=instance),
-            linux.LibraryList(evidence=instance),
-        ]
+        except Exception as e:
+            logger.error(f"Evidence {dump_id}: could not build the network graph: {e}")
 
-        task_group = group(plugin.run.s(evidence_data) for plugin in volweb_plugins)
-        group_result = task_group.apply_async()
-
-        while not group_result.ready():
-            completed_tasks = len([r for r in group_result.results if r.ready()])
-            total_tasks = len(group_result.results)
-            status = (completed_tasks * 100) / total_tasks
-            if instance.dump_status != status:
-                instance.dump_status = (completed_tasks * 100) / total_tasks
-                instance.save()
-            time.sleep(1)
-
-        with allow_join_result():
-            logs = {}
-            result = group_result.get()
-            for i in range(0, len(result)):
-                plugin_name = volweb_plugins[i].__class__.__name__
-                if result[i] == "Unsatisfied":
-                    logs[plugin_name] = "Unsatisfied"
-                    result[i] = None
-                elif result[i]:
-                    logs[plugin_name] = "Success"
-                else:
-                    logs[plugin_name] = "Failed"
-
-                volweb_plugins[i].__class__.objects.filter(evidence=instance).delete()
-                volweb_plugins[i].artefacts = result[i]
-                volweb_plugins[i].save()
-
-            linux.NetGraph.objects.filter(evidence=instance).delete()
-            if result[6]:
+    if instance.dump_os == "Linux":
+        linux.NetGraph.objects.filter(evidence=instance).delete()
+        try:
+            sockets = get_artefacts(linux.Sockstat, instance)
+            if sockets:
                 linux.NetGraph(
-                    evidence=instance, artefacts=generate_linux_network_graph(result[6])
+                    evidence=instance,
+                    artefacts=generate_linux_network_graph(sockets),
                 ).save()
+        except Exception as e:
+            logger.error(f"Evidence {dump_id}: could not build the network graph: {e}")
 
-            linux.TimeLineChart.objects.filter(evidence=instance).delete()
-            if result[7]:
-                linux.TimeLineChart(
-                    evidence=instance, artefacts=build_timeline(result[7])
-                ).save()
-            fix_permissions(output_path)
-            instance.dump_logs = logs
-            instance.dump_status = 100
-            instance.save()
+        linux.TimeLineChart.objects.filter(evidence=instance).delete()
+        try:
+            linux.TimeLineChart(
+                evidence=instance,
+                artefacts=build_timeline(dump_id),
+            ).save()
+        except GraphException as e:
+            logger.warning(f"Evidence {dump_id}: {e}")
+        except Exception as e:
+            logger.error(f"Evidence {dump_id}: could not build the timeline: {e}")
+
+    if instance.dump_stage_local:
+        release_staged(instance.dump_etag)
+    fix_permissions(output_path)
+    # The logs and phases were updated by the plugins meanwhile, only the completion is written.
+    instance.refresh_from_db()
+    instance.dump_engine = constants.PACKAGE_VERSION
+    instance.dump_status = 100
+    instance.save(update_fields=["dump_engine", "dump_status"])
+
+
+@shared_task
+def analysis_failed(request, exc, traceback, dump_id):
+    """
+    Error callback of an analysis: a plugin task raised, so the final callback never runs.
+    The analysis is marked as finished so the evidence does not stay in progress,
+    its plugins without a result can be run again.
+    """
+    logger.error(f"Evidence {dump_id}: the analysis failed: {exc}")
+    instance = Evidence.objects.get(dump_id=dump_id)
+    if instance.dump_stage_local:
+        release_staged(instance.dump_etag)
+    instance.dump_status = 100
+    instance.save(update_fields=["dump_status"])
+    notify_evidence(
+        dump_id,
+        {
+            "name": "analysis_failed",
+            "status": "error",
+            "msg": "The analysis failed, some plugins have no result.",
+        },
+    )
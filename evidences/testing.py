@@ -0,0 +1,21 @@
+import uuid
+from cases.models import Case
+from evidences.models import Evidence
+
+
+def create_evidence(case=None, **fields):
+    """Create an evidence without sending the post_save signals of its model.
+    They would start an analysis of the evidence and notify the websocket clients.
+    A new case is created unless one is given.
+    """
+    if case is None:
+        case = Case.objects.bulk_create(
+            [Case(case_bucket_id=uuid.uuid4(), case_name="case", case_description="")]
+        )[0]
+    fields = {
+        "dump_name": "image.raw",
+        "dump_etag": "etag",
+        "dump_os": "Windows",
+        **fields,
+    }
+    return Evidence.objects.bulk_create([Evidence(dump_linked_case=case, **fields)])[0]
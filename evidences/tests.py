@@ -1 +1,473 @@
-from django.test import TestCase
+import io, json, os, tempfile
+import pyarrow as pa
+import pyarrow.parquet as pq
+from unittest import mock
+from django.db.models.query import QuerySet
+from django.test import TestCase, override_settings
+from volatility3.framework import constants, renderers
+from volatility3.framework.interfaces.configuration import HierarchicalDict
+from evidences.export import encode_rows, export_plugin, infer_schema
+from evidences.models import (
+    Artefact,
+    ArtefactChunk,
+    Evidence,
+    PluginStatistic,
+    TimelineEvent,
+    decode_column,
+    encode_column,
+    filter_artefacts,
+    filter_offsets,
+    filter_process,
+    search_timeline,
+)
+from evidences.tasks import get_phases, plugin_completed, start_analysis
+from evidences.testing import create_evidence
+from windows_engine.models import CmdLine, Info, NetScan, PsScan
+
+KERNEL_ADDRESS = 0xFFFFC00000001000
+
+ROWS = [
+    {
+        "__id": 0,
+        "__parent": None,
+        "PID": 4,
+        "Name": "System",
+        "Offset(V)": KERNEL_ADDRESS,
+    },
+    {"__id": 1, "__parent": 0, "PID": 88, "Name": "Registry", "Offset(V)": 0x1000},
+    {"__id": 2, "__parent": None, "PID": 88, "Name": "smss.exe", "Offset(V)": 0x2000},
+]
+
+
+def nodes(rows):
+    return [
+        {k: v for k, v in row.items() if k not in ("__id", "__parent")} for row in rows
+    ]
+
+
+class ArtefactChunkTestCase(TestCase):
+
+    def setUp(self):
+        self.evidence = create_evidence()
+
+    def test_encode_column(self):
+        column = encode_column(["a", "b", "a", "a"])
+        self.assertEqual(column, {"dictionary": ["a", "b"], "indexes": [0, 1, 0, 0]})
+        self.assertEqual(decode_column(column), ["a", "b", "a", "a"])
+        self.assertEqual(encode_column(["a", "b", "c"]), ["a", "b", "c"])
+        self.assertEqual(encode_column([[1], [1]]), [[1], [1]])
+
+    def test_round_trip(self):
+        rows = [
+            {"__id": 0, "__parent": None, "PID": 4, "Name": "System", "Args": None},
+            {
+                "__id": 1,
+                "__parent": 0,
+                "PID": 8,
+                "Name": "System",
+                "Args": ["-k", "svc"],
+            },
+            {"__id": 2, "__parent": None, "Name": "System", "Path": "C:\\Windows"},
+        ]
+        ArtefactChunk.save_rows(self.evidence.dump_id, "windows_engine.psscan", rows)
+        chunks = ArtefactChunk.for_plugin(
+            self.evidence.dump_id, "windows_engine.psscan"
+        )
+        self.assertEqual(chunks.get().row_count, 3)
+        # The missing columns stay missing, they are not turned into None values.
+        self.assertEqual(list(ArtefactChunk.rows(chunks)), rows)
+
+
+class FilterArtefactsTestCase(TestCase):
+
+    def setUp(self):
+        self.evidence = create_evidence()
+
+    def store(self, model, storage):
+        if storage == "inline":
+            model(evidence=self.evidence, artefacts=nodes(ROWS)).save()
+            return
+        model(evidence=self.evidence, artefacts=None).save()
+        label = model._meta.label_lower
+        if storage == "chunks":
+            ArtefactChunk.save_rows(self.evidence.dump_id, label, ROWS)
+        else:
+            rows = [
+                Artefact.from_row(self.evidence.dump_id, label, row) for row in ROWS
+            ]
+            Artefact.objects.bulk_create(rows)
+
+    def clear(self):
+        PsScan.objects.all().delete()
+        Artefact.objects.all().delete()
+        ArtefactChunk.objects.all().delete()
+
+    def test_filter_artefacts(self):
+        for storage in ("inline", "chunks", "rows"):
+            with self.subTest(storage=storage):
+                self.store(PsScan, storage)
+                rows = filter_artefacts(PsScan, self.evidence.dump_id, pid=88)
+                self.assertEqual(
+                    [row["Name"] for row in rows], ["Registry", "smss.exe"]
+                )
+                rows = filter_artefacts(
+                    PsScan, self.evidence.dump_id, offset=KERNEL_ADDRESS
+                )
+                self.assertEqual([row["Name"] for row in rows], ["System"])
+                self.assertEqual(
+                    filter_artefacts(PsScan, self.evidence.dump_id, pid=1), []
+                )
+                self.clear()
+
+    @override_settings(ARTEFACT_READ_CHUNK_SIZE=2)
+    def test_rows_are_read_in_chunks(self):
+        self.store(PsScan, "rows")
+        with mock.patch.object(
+            QuerySet, "iterator", autospec=True, side_effect=QuerySet.iterator
+        ) as iterator:
+            rows = list(Artefact.rows(Artefact.objects.order_by("row")))
+        self.assertEqual(rows, ROWS)
+        self.assertEqual(iterator.call_args.kwargs, {"chunk_size": 2})
+
+    def test_filter_artefacts_without_result(self):
+        self.assertIsNone(filter_artefacts(PsScan, self.evidence.dump_id, pid=4))
+        PsScan(evidence=self.evidence, artefacts=[]).save()
+        self.assertIsNone(filter_artefacts(PsScan, self.evidence.dump_id, pid=4))
+
+    def test_filter_offsets(self):
+        for storage in ("inline", "chunks", "rows"):
+            with self.subTest(storage=storage):
+                self.store(PsScan, storage)
+                results = filter_offsets(
+                    PsScan, self.evidence.dump_id, [KERNEL_ADDRESS, 0x2000, 0x3000]
+                )
+                self.assertEqual(
+                    {
+                        offset: [row["Name"] for row in rows]
+                        for offset, rows in results.items()
+                    },
+                    {KERNEL_ADDRESS: ["System"], 0x2000: ["smss.exe"], 0x3000: []},
+                )
+                self.clear()
+
+    def test_filter_process(self):
+        self.store(PsScan, "inline")
+        self.store(NetScan, "chunks")
+        results = filter_process([PsScan, NetScan, CmdLine], self.evidence.dump_id, 88)
+        self.assertEqual(
+            [row["Name"] for row in results["PsScan"]], ["Registry", "smss.exe"]
+        )
+        self.assertEqual(
+            [row["Name"] for row in results["NetScan"]], ["Registry", "smss.exe"]
+        )
+        self.assertIsNone(results["CmdLine"])
+        NetScan.objects.all().delete()
+        ArtefactChunk.objects.all().delete()
+        self.store(NetScan, "rows")
+        results = filter_process([NetScan], self.evidence.dump_id, 88)
+        # The child is returned as a root, its parent does not belong to the process.
+        self.assertEqual(
+            results["NetScan"],
+            [
+                {"PID": 88, "Name": "Registry", "Offset(V)": 0x1000, "__children": []},
+                {"PID": 88, "Name": "smss.exe", "Offset(V)": 0x2000, "__children": []},
+            ],
+        )
+
+
+class SearchTimelineTestCase(TestCase):
+
+    def setUp(self):
+        self.evidence = create_evidence()
+        rows = [
+            {
+                "__id": 0,
+                "Plugin": "PsList",
+                "Description": "Process: cmd.exe",
+                "Created Date": "2024-01-01T10:00:00",
+            },
+            {
+                "__id": 1,
+                "Plugin": "PsList",
+                "Description": "Process: explorer.exe",
+                "Created Date": "2024-01-02T10:00:00",
+            },
+            {
+                "__id": 2,
+                "Plugin": "NetScan",
+                "Description": "Connection to 10.0.0.1",
+                "Created Date": None,
+            },
+        ]
+        TimelineEvent.objects.bulk_create(
+            [
+                TimelineEvent.from_row(
+                    self.evidence.dump_id, "windows_engine.timeliner", row
+                )
+                for row in rows
+            ]
+        )
+
+    def search(self, **params):
+        return search_timeline(self.evidence.dump_id, params)
+
+    def descriptions(self, response):
+        return [row["Description"] for row in response["data"]]
+
+    def test_search(self):
+        response = self.search(**{"search[value]": "CMD"})
+        self.assertEqual(response["recordsTotal"], 3)
+        self.assertEqual(response["recordsFiltered"], 1)
+        self.assertEqual(self.descriptions(response), ["Process: cmd.exe"])
+
+    def test_search_builder(self):
+        response = self.search(
+            **{
+                "searchBuilder[criteria][0][data]": "Plugin",
+                "searchBuilder[criteria][0][condition]": "=",
+                "searchBuilder[criteria][0][value1]": "PsList",
+                "searchBuilder[criteria][1][data]": "Created Date",
+                "searchBuilder[criteria][1][condition]": ">",
+                "searchBuilder[criteria][1][value1]": "2024-01-01T12:00:00",
+            }
+        )
+        self.assertEqual(self.descriptions(response), ["Process: explorer.exe"])
+        response = self.search(
+            **{
+                "searchBuilder[logic]": "OR",
+                "searchBuilder[criteria][0][data]": "Created Date",
+                "searchBuilder[criteria][0][condition]": "null",
+                "searchBuilder[criteria][1][data]": "Description",
+                "searchBuilder[criteria][1][condition]": "contains",
+                "searchBuilder[criteria][1][value1]": "cmd",
+            }
+        )
+        self.assertEqual(
+            self.descriptions(response), ["Process: cmd.exe", "Connection to 10.0.0.1"]
+        )
+
+    def test_order_and_pages(self):
+        response = self.search(
+            **{
+                "columns[0][data]": "Description",
+                "order[0][column]": "0",
+                "order[0][dir]": "desc",
+                "start": "1",
+                "length": "1",
+            }
+        )
+        self.assertEqual(response["recordsFiltered"], 3)
+        self.assertEqual(self.descriptions(response), ["Process: cmd.exe"])
+        response = self.search(timestamp_min="2024-01-02T00:00:00")
+        self.assertEqual(response["recordsFiltered"], 1)
+        self.assertEqual(
+            response["data"][0]["Created Date"], "2024-01-02T10:00:00+00:00"
+        )
+
+
+class ExportTestCase(TestCase):
+
+    roots = [
+        {
+            "PID": 4,
+            "Name": "System",
+            "__children": [{"PID": 88, "Name": "Registry", "__children": []}],
+        },
+        {"PID": 500, "Name": "csrss.exe", "__children": []},
+    ]
+
+    def test_encode_rows(self):
+        self.assertEqual(json.loads(b"".join(encode_rows(self.roots))), self.roots)
+        envelope = {"status": "success"}
+        data = b"".join(encode_rows(self.roots, envelope=envelope))
+        self.assertEqual(json.loads(data), {**envelope, "artefacts": self.roots})
+        data = b"".join(encode_rows(iter([]), envelope=envelope))
+        self.assertEqual(json.loads(data), {**envelope, "artefacts": []})
+        lines = b"".join(encode_rows(self.roots, "ndjson")).decode().splitlines()
+        self.assertEqual([json.loads(line) for line in lines], self.roots)
+
+    def test_encode_rows_chunks(self):
+        roots = [{"Name": "x" * 1000, "__children": []} for _ in range(200)]
+        chunks = list(encode_rows(roots))
+        self.assertGreater(len(chunks), 1)
+        self.assertEqual(json.loads(b"".join(chunks)), roots)
+
+    def test_infer_schema(self):
+        rows = [
+            {
+                "PID": 4,
+                "Offset": 2**64 - 1,
+                "Signed": -1,
+                "Wow64": False,
+                "Size": 1,
+                "Name": "System",
+                "CreateTime": "2024-01-01T10:00:00",
+                "Mixed": 1,
+                "__id": 0,
+                "__parent": None,
+            },
+            {
+                "PID": None,
+                "Offset": 0,
+                "Signed": 2**63,
+                "Wow64": True,
+                "Size": 1.5,
+                "Name": "smss.exe",
+                "CreateTime": None,
+                "Mixed": "N/A",
+                "__id": 1,
+                "__parent": 0,
+            },
+        ]
+        schema = infer_schema(rows)
+        self.assertEqual(
+            [(field.name, field.type) for field in schema],
+            [
+                ("PID", pa.int64()),
+                ("Offset", pa.uint64()),
+                ("Signed", pa.string()),
+                ("Wow64", pa.bool_()),
+                ("Size", pa.float64()),
+                ("Name", pa.string()),
+                ("CreateTime", pa.timestamp("us", tz="UTC")),
+                ("Mixed", pa.string()),
+                ("__id", pa.int64()),
+                ("__parent", pa.int64()),
+                ("evidence", pa.int64()),
+            ],
+        )
+
+    @mock.patch("evidences.export.EXPORT_BATCH_SIZE", 2)
+    def test_export_plugin(self):
+        rows = [
+            {"PID": 4, "Name": "System", "__id": 0, "__parent": None},
+            {"PID": 88, "Name": "Registry", "__id": 1, "__parent": 0},
+            {"PID": 2**63, "Name": 500, "__id": 2, "__parent": None},
+        ]
+        with mock.patch(
+            "evidences.export.plugin_rows", side_effect=lambda model, id: iter(rows)
+        ) as plugin_rows:
+            data = b"".join(export_plugin([(PsScan, 1)]))
+        # The rows are read once, the schema comes from the first batch.
+        plugin_rows.assert_called_once_with(PsScan, 1)
+        table = pq.read_table(io.BytesIO(data))
+        self.assertEqual(table.schema.field("PID").type, pa.int64())
+        self.assertEqual(table.column("PID").to_pylist(), [4, 88, None])
+        self.assertEqual(
+            table.column("Name").to_pylist(), ["System", "Registry", "500"]
+        )
+        self.assertEqual(table.column("evidence").to_pylist(), [1, 1, 1])
+
+
+KERNEL_CONFIG = {
+    "layer_name": "layer_name",
+    "offset": 0xF80000000000,
+    "symbol_table_name": "symbol_table_name1",
+}
+
+
+class FakeInfo:
+    """Info plugin as constructed once the automagics found the kernel."""
+
+    def build_configuration(self):
+        config = HierarchicalDict()
+        for key, value in KERNEL_CONFIG.items():
+            config[f"kernel.{key}"] = value
+        return config
+
+    def run(self):
+        return renderers.TreeGrid(
+            [("Variable", str), ("Value", str)],
+            iter([(0, ("Kernel Base", "0xf80000000000"))]),
+        )
+
+
+@override_settings(
+    CHANNEL_LAYERS={"default": {"BACKEND": "channels.layers.InMemoryChannelLayer"}}
+)
+class StartAnalysisTestCase(TestCase):
+    """Run start_analysis with mocks for the image scan and the plugin dispatch."""
+
+    def setUp(self):
+        # The analysis writes its output under the working directory.
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.addCleanup(os.chdir, os.getcwd())
+        os.chdir(directory.name)
+        self.construct_plugin = self.patch(
+            "VolWeb.voltools.construct_plugin", return_value=FakeInfo()
+        )
+        self.patch("volatility3.framework.automagic.available", return_value=[])
+        self.patch("evidences.tasks.get_evidence_size", return_value=None)
+        self.chord = self.patch("evidences.tasks.chord")
+
+    def patch(self, target, **kwargs):
+        patcher = mock.patch(target, **kwargs)
+        self.addCleanup(patcher.stop)
+        return patcher.start()
+
+    def test_kernel_config_is_kept(self):
+        evidence = create_evidence()
+        start_analysis(evidence.dump_id)
+        evidence.refresh_from_db()
+        self.assertEqual(evidence.dump_config, KERNEL_CONFIG)
+        self.assertEqual(evidence.dump_logs, {})
+        self.assertTrue(Info.objects.filter(evidence=evidence).exists())
+        self.assertEqual(
+            PluginStatistic.objects.get(plugin="windows_engine.info").status, "Success"
+        )
+        self.chord.assert_called_once()
+        # A rerun reuses the stored configuration instead of scanning the image again.
+        start_analysis(evidence.dump_id, ["PsScan"])
+        self.construct_plugin.assert_called_once()
+        evidence.refresh_from_db()
+        self.assertEqual(evidence.dump_config, KERNEL_CONFIG)
+
+    def test_reuse_keeps_kernel_config(self):
+        source = create_evidence()
+        start_analysis(source.dump_id)
+        # Complete the source analysis as its plugins and finalize_analysis would.
+        names = [
+            plugin.__name__
+            for _, _, plugins in get_phases(source)
+            for plugin in plugins
+        ]
+        Evidence.objects.filter(dump_id=source.dump_id).update(
+            dump_logs={name: "Success" for name in names},
+            dump_status=100,
+            dump_engine=constants.PACKAGE_VERSION,
+        )
+        evidence = create_evidence(source.dump_linked_case, dump_etag=source.dump_etag)
+        start_analysis(evidence.dump_id)
+        evidence.refresh_from_db()
+        self.assertEqual(evidence.dump_status, 100)
+        self.assertEqual(evidence.dump_config, KERNEL_CONFIG)
+        self.assertTrue(Info.objects.filter(evidence=evidence).exists())
+        # Neither the image scan nor the plugins ran again for the evidence.
+        self.construct_plugin.assert_called_once()
+        self.chord.assert_called_once()
+
+    def test_analysis_failed(self):
+        evidence = create_evidence()
+        start_analysis(evidence.dump_id)
+        (body,), _ = self.chord.return_value.call_args
+        (errback,) = body.options["link_error"]
+        self.assertEqual(errback.task, "evidences.tasks.analysis_failed")
+        # A member of the chord raised: the errback is called as Celery calls it.
+        with mock.patch("evidences.tasks.notify_evidence") as notify_evidence:
+            errback(mock.Mock(), RuntimeError("worker lost"), None)
+        evidence.refresh_from_db()
+        self.assertEqual(evidence.dump_status, 100)
+        (dump_id, message), _ = notify_evidence.call_args
+        self.assertEqual(dump_id, evidence.dump_id)
+        self.assertEqual(message["name"], "analysis_failed")
+
+
+class PluginCompletedTestCase(TestCase):
+
+    def test_pending_plugins_are_not_counted(self):
+        evidence = create_evidence(dump_logs={"SSDT": "Pending"})
+        plugin_completed({"plugin": "PsScan", "status": "Success"}, evidence.dump_id, 4)
+        evidence.refresh_from_db()
+        self.assertEqual(evidence.dump_logs, {"SSDT": "Pending", "PsScan": "Success"})
+        self.assertEqual(evidence.dump_status, 25)
@@ -8,5 +8,14 @@ urlpatterns = [
     path("api/evidences/<int:dump_id>/", views.EvidenceDetailApiView.as_view()),
     path("api/evidences/case/<int:case_id>/", views.CaseEvidenceApiView.as_view()),
     path("api/evidences/launch_task/", views.LaunchTaskAPIView.as_view()),
+    path("api/evidences/rerun_task/", views.RerunTaskAPIView.as_view()),
+    path(
+        "api/evidences/<int:dump_id>/export/<str:plugin>/",
+        views.ExportApiView.as_view(),
+    ),
+    path(
+        "api/evidences/case/<int:case_id>/export/<str:plugin>/",
+        views.CaseExportApiView.as_view(),
+    ),
 
 ]
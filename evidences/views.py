@@ -7,9 +7,19 @@ from rest_framework import status
 from evidences.models import Evidence
 from rest_framework.authentication import SessionAuthentication, TokenAuthentication
 from rest_framework.response import Response
-from evidences.serializers import AnalysisStartSerializer, EvidenceSerializer
+from evidences.serializers import (
+    AnalysisRerunSerializer,
+    AnalysisStartSerializer,
+    EvidenceSerializer,
+)
 from minio import Minio
-from evidences.tasks import start_analysis
+from evidences.export import (
+    EXPORT_FORMATS,
+    export_plugin,
+    plugin_sources,
+    streaming_response,
+)
+from evidences.tasks import get_phases, get_rerun_plugins, start_analysis
 from VolWeb.keyconfig import Secrets
 from VolWeb.settings import DEBUG
 
@@ -67,20 +77,25 @@ class EvidenceAPIView(APIView):
         :return: the new serialized evidence created
         """
         dump_etag = request.data.get("dump_etag")
-        if Evidence.objects.filter(dump_etag=dump_etag).exists():
-            return Response(
-                {"error": "Evidence with this ETag already exists."},
-                status=status.HTTP_409_CONFLICT,
-            )
-
         data = {
             "dump_name": request.data.get("dump_name"),
             "dump_etag": dump_etag,
             "dump_os": request.data.get("dump_os"),
             "dump_linked_case": request.data.get("dump_linked_case"),
+            "dump_stage_local": request.data.get("dump_stage_local", False),
+            "dump_profile": request.data.get("dump_profile", "full"),
         }
         serializer = EvidenceSerializer(data=data)
         if serializer.is_valid():
+            # The same image can be linked to several cases, its analysis results are then reused.
+            if Evidence.objects.filter(
+                dump_etag=serializer.validated_data.get("dump_etag"),
+                dump_linked_case=serializer.validated_data["dump_linked_case"],
+            ).exists():
+                return Response(
+                    {"error": "Evidence with this ETag already exists in this case."},
+                    status=status.HTTP_409_CONFLICT,
+                )
             serializer.save()
             return Response(serializer.data, status=status.HTTP_201_CREATED)
 
@@ -101,14 +116,17 @@ class BindEvidence(APIView):
         post request handler
         :return: the new serialized evidence created
         """
-        dump_etag = request.data.get("dump_etag")
-        if Evidence.objects.filter(dump_etag=dump_etag).exists():
-            return Response(
-                {"error": "Evidence with this ETag already exists."},
-                status=status.HTTP_409_CONFLICT,
-            )
         serializer = EvidenceSerializer(data=request.data)
         if serializer.is_valid():
+            # The same image can be linked to several cases, its analysis results are then reused.
+            if Evidence.objects.filter(
+                dump_etag=serializer.validated_data.get("dump_etag"),
+                dump_linked_case=serializer.validated_data["dump_linked_case"],
+            ).exists():
+                return Response(
+                    {"error": "Evidence with this ETag already exists in this case."},
+                    status=status.HTTP_409_CONFLICT,
+                )
             serializer.save()
             return Response(serializer.data, status=status.HTTP_201_CREATED)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
@@ -209,9 +227,142 @@ class LaunchTaskAPIView(APIView):
             evidence_instance = self.get_object(dump_id)
             if evidence_instance:
                 evidence_instance.dump_status = 0
+                # The kernel configuration is resolved again in case new symbols were uploaded.
+                evidence_instance.dump_config = None
+                # The analysis can be launched again with a deeper profile.
+                evidence_instance.dump_profile = serializer.validated_data.get(
+                    "dump_profile", evidence_instance.dump_profile
+                )
                 evidence_instance.save()
-                start_analysis.apply_async(args=[evidence_instance.dump_id])
+                start_analysis.apply_async(
+                    args=[evidence_instance.dump_id], kwargs={"reuse": False}
+                )
                 return Response(
                     {"status": "Analysis launched"}, status=status.HTTP_202_ACCEPTED
                 )
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+
+class RerunTaskAPIView(APIView):
+    """
+    Rerun Task API View
+    This API view allows an authenticated user to run some plugins of an analysis again.
+    The results of the other plugins are kept.
+    """
+
+    permission_classes = [permissions.IsAuthenticated]
+    authentication_classes = [SessionAuthentication, TokenAuthentication]
+
+    def post(self, request, *args, **kwargs):
+        """
+        post request handler
+        By default, the plugins that failed or never ran are run again.
+        :return: result message with the plugins run again and HTTP code.
+        """
+        serializer = AnalysisRerunSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            evidence_instance = Evidence.objects.get(
+                dump_id=serializer.validated_data["dump_id"]
+            )
+        except Evidence.DoesNotExist:
+            return Response(
+                {"error": "Evidence does not exist."}, status=status.HTTP_404_NOT_FOUND
+            )
+        plugins = serializer.validated_data.get("plugins")
+        if plugins is None:
+            plugins = get_rerun_plugins(evidence_instance)
+        else:
+            available = [
+                plugin.__name__
+                for _, _, phase_plugins in get_phases(evidence_instance)
+                for plugin in phase_plugins
+            ]
+            unknown = [plugin for plugin in plugins if plugin not in available]
+            if unknown:
+                return Response(
+                    {"plugins": [f"Unknown plugins: {', '.join(unknown)}"]},
+                    status=status.HTTP_400_BAD_REQUEST,
+                )
+        if not plugins:
+            return Response(
+                {"status": "Nothing to rerun", "plugins": []}, status=status.HTTP_200_OK
+            )
+        start_analysis.apply_async(args=[evidence_instance.dump_id, plugins])
+        return Response(
+            {"status": "Analysis relaunched", "plugins": plugins},
+            status=status.HTTP_202_ACCEPTED,
+        )
+
+
+def export_response(sources, output, filename):
+    """Stream the export of plugin results as a file attachment."""
+    content_type, extension = EXPORT_FORMATS[output]
+    response = streaming_response(export_plugin(sources, output), content_type)
+    response["Content-Disposition"] = f'attachment; filename="{filename}.{extension}"'
+    return response
+
+
+class ExportApiView(APIView):
+    """
+    Export API View
+    This API view allows an authenticated user to download the result of a plugin as a columnar file.
+    The "output" query parameter chooses between "parquet" (default) and "arrow".
+    """
+
+    permission_classes = [permissions.IsAuthenticated]
+    authentication_classes = [SessionAuthentication, TokenAuthentication]
+
+    def get(self, request, dump_id, plugin, *args, **kwargs):
+        """
+        get request handler
+        :return: the streamed Parquet file or Arrow stream of the plugin result.
+        """
+        output = request.query_params.get("output", "parquet")
+        if output not in EXPORT_FORMATS:
+            return Response(
+                {"output": [f"Unsupported output: {output}"]},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        evidences = Evidence.objects.filter(dump_id=dump_id)
+        sources = plugin_sources(plugin, evidences)
+        if not sources:
+            return Response(
+                {"error": "Evidence or plugin does not exist."},
+                status=status.HTTP_404_NOT_FOUND,
+            )
+        return export_response(sources, output, f"{dump_id}_{sources[0][0].__name__}")
+
+
+class CaseExportApiView(APIView):
+    """
+    Case Export API View
+    This API view allows an authenticated user to download the result of a plugin for all of the
+    evidences of a case as a single columnar file, the rows carry the id of their evidence.
+    """
+
+    permission_classes = [permissions.IsAuthenticated]
+    authentication_classes = [SessionAuthentication, TokenAuthentication]
+
+    def get(self, request, case_id, plugin, *args, **kwargs):
+        """
+        get request handler
+        :return: the streamed Parquet file or Arrow stream of the plugin results.
+        """
+        output = request.query_params.get("output", "parquet")
+        if output not in EXPORT_FORMATS:
+            return Response(
+                {"output": [f"Unsupported output: {output}"]},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        evidences = Evidence.objects.filter(dump_linked_case=case_id).order_by("dump_id")
+        sources = plugin_sources(plugin, evidences)
+        if not sources:
+            return Response(
+                {"error": "No evidence of this case has this plugin."},
+                status=status.HTTP_404_NOT_FOUND,
+            )
+        return export_response(
+            sources, output, f"case_{case_id}_{sources[0][0].__name__}"
+        )
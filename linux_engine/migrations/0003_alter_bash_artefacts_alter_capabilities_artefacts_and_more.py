@@ -0,0 +1,94 @@
+# Generated by Django 4.2.11 on 2026-10-18 13:49
+
+from django.db import migrations
+import evidences.models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('linux_engine', '0002_librarylist'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='bash',
+            name='artefacts',
+            field=evidences.models.ArtefactsField(null=True),
+        ),
+        migrations.AlterField(
+            model_name='capabilities',
+            name='artefacts',
+            field=evidences.models.ArtefactsField(null=True),
+        ),
+        migrations.AlterField(
+            model_name='elfs',
+            name='artefacts',
+            field=evidences.models.ArtefactsField(null=True),
+        ),
+        migrations.AlterField(
+            model_name='envars',
+            name='artefacts',
+            field=evidences.models.ArtefactsField(null=True),
+        ),
+        migrations.AlterField(
+            model_name='kmsg',
+            name='artefacts',
+            field=evidences.models.ArtefactsField(null=True),
+        ),
+        migrations.AlterField(
+            model_name='librarylist',
+            name='artefacts',
+            field=evidences.models.ArtefactsField(null=True),
+        ),
+        migrations.AlterField(
+            model_name='lsmod',
+            name='artefacts',
+            field=evidences.models.ArtefactsField(null=True),
+        ),
+        migrations.AlterField(
+            model_name='lsof',
+            name='artefacts',
+            field=evidences.models.ArtefactsField(null=True),
+        ),
+        migrations.AlterField(
+            model_name='malfind',
+            name='artefacts',
+            field=evidences.models.ArtefactsField(null=True),
+        ),
+        migrations.AlterField(
+            model_name='mountinfo',
+            name='artefacts',
+            field=evidences.models.ArtefactsField(null=True),
+        ),
+        migrations.AlterField(
+            model_name='psaux',
+            name='artefacts',
+            field=evidences.models.ArtefactsField(null=True),
+        ),
+        migrations.AlterField(
+            model_name='psscan',
+            name='artefacts',
+            field=evidences.models.ArtefactsField(null=True),
+        ),
+        migrations.AlterField(
+            model_name='pstree',
+            name='artefacts',
+            field=evidences.models.ArtefactsField(null=True),
+        ),
+        migrations.AlterField(
+            model_name='sockstat',
+            name='artefacts',
+            field=evidences.models.ArtefactsField(null=True),
+        ),
+        migrations.AlterField(
+            model_name='timeliner',
+            name='artefacts',
+            field=evidences.models.ArtefactsField(null=True),
+        ),
+        migrations.AlterField(
+            model_name='tty_check',
+            name='artefacts',
+            field=evidences.models.ArtefactsField(null=True),
+        ),
+    ]
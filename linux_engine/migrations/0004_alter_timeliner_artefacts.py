@@ -0,0 +1,18 @@
+# Generated by Django 4.2.11 on 2026-10-18 13:55
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('linux_engine', '0003_alter_bash_artefacts_alter_capabilities_artefacts_and_more'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='timeliner',
+            name='artefacts',
+            field=models.JSONField(null=True),
+        ),
+    ]
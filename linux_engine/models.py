@@ -1,5 +1,5 @@
 from django.db import models
-from evidences.models import Evidence
+from evidences.models import ArtefactsField, Evidence, TimelineEvent
 from celery import shared_task
 import logging
 import volatility3
@@ -26,332 +26,219 @@ class PsTree(models.Model):
     evidence = models.ForeignKey(
         Evidence, on_delete=models.CASCADE, related_name="linux_pstree_evidence"
     )
-    artefacts = models.JSONField(null=True)
+    artefacts = ArtefactsField(null=True)
 
     @staticmethod
     @shared_task(name="Linux.PsTree.run")
     def run(evidence_data):
-        try:
-            context = contexts.Context()
-            constructed = build_context(
-                evidence_data,
-                context,
-                base_config_path,
-                PLUGIN_LIST["linux.pstree.PsTree"],
-            )
-            if constructed:
-                result = DictRenderer().render(constructed.run())
-                return result
-        except:
-            return None
+        return run_plugin(
+            PsTree,
+            evidence_data,
+            base_config_path,
+            PLUGIN_LIST["linux.pstree.PsTree"],
+        )
 
 class LibraryList(models.Model):
     evidence = models.ForeignKey(
         Evidence, on_delete=models.CASCADE, related_name="linux_library_list_evidence"
     )
-    artefacts = models.JSONField(null=True)
+    artefacts = ArtefactsField(null=True)
 
     @staticmethod
     @shared_task(name="Linux.LibraryList.run")
     def run(evidence_data):
-        try:
-            context = contexts.Context()
-            constructed = build_context(
-                evidence_data,
-                context,
-                base_config_path,
-                PLUGIN_LIST["linux.library_list.LibraryList"],
-            )
-            if constructed:
-                result = DictRenderer().render(constructed.run())
-                return result
-        except:
-            return None
+        return run_plugin(
+            LibraryList,
+            evidence_data,
+            base_config_path,
+            PLUGIN_LIST["linux.library_list.LibraryList"],
+        )
 
 class PsAux(models.Model):
     evidence = models.ForeignKey(
         Evidence, on_delete=models.CASCADE, related_name="linux_psaux_evidence"
     )
-    artefacts = models.JSONField(null=True)
+    artefacts = ArtefactsField(null=True)
 
     @staticmethod
     @shared_task(name="Linux.PsAux.run")
     def run(evidence_data):
-        try:
-            context = contexts.Context()
-            constructed = build_context(
-                evidence_data,
-                context,
-                base_config_path,
-                PLUGIN_LIST["linux.psaux.PsAux"],
-            )
-            if constructed:
-                result = DictRenderer().render(constructed.run())
-                return result
-        except UnsatisfiedException:
-            return "Unsatisfied"
-        except:
-            return None
+        return run_plugin(
+            PsAux,
+            evidence_data,
+            base_config_path,
+            PLUGIN_LIST["linux.psaux.PsAux"],
+        )
 
 
 class Lsof(models.Model):
     evidence = models.ForeignKey(
         Evidence, on_delete=models.CASCADE, related_name="linux_lsof_evidence"
     )
-    artefacts = models.JSONField(null=True)
+    artefacts = ArtefactsField(null=True)
 
     @staticmethod
     @shared_task(name="Linux.Lsof.run")
     def run(evidence_data):
-        try:
-            context = contexts.Context()
-            constructed = build_context(
-                evidence_data,
-                context,
-                base_config_path,
-                PLUGIN_LIST["linux.lsof.Lsof"],
-            )
-            if constructed:
-                result = DictRenderer().render(constructed.run())
-                return result
-        except UnsatisfiedException:
-            return "Unsatisfied"
-        except:
-            return None
+        return run_plugin(
+            Lsof,
+            evidence_data,
+            base_config_path,
+            PLUGIN_LIST["linux.lsof.Lsof"],
+        )
 
 
 class MountInfo(models.Model):
     evidence = models.ForeignKey(
         Evidence, on_delete=models.CASCADE, related_name="linux_mountinfo_evidence"
     )
-    artefacts = models.JSONField(null=True)
+    artefacts = ArtefactsField(null=True)
 
     @staticmethod
     @shared_task(name="Linux.MountInfo.run")
     def run(evidence_data):
-        try:
-            context = contexts.Context()
-            constructed = build_context(
-                evidence_data,
-                context,
-                base_config_path,
-                PLUGIN_LIST["linux.mountinfo.MountInfo"],
-            )
-            if constructed:
-                result = DictRenderer().render(constructed.run())
-                return result
-        except UnsatisfiedException:
-            return "Unsatisfied"
-        except:
-            return None
+        return run_plugin(
+            MountInfo,
+            evidence_data,
+            base_config_path,
+            PLUGIN_LIST["linux.mountinfo.MountInfo"],
+        )
 
 
 class Envars(models.Model):
     evidence = models.ForeignKey(
         Evidence, on_delete=models.CASCADE, related_name="linux_envars_evidence"
     )
-    artefacts = models.JSONField(null=True)
+    artefacts = ArtefactsField(null=True)
 
     @staticmethod
     @shared_task(name="Linux.Envars.run")
     def run(evidence_data):
-        try:
-            context = contexts.Context()
-            constructed = build_context(
-                evidence_data,
-                context,
-                base_config_path,
-                PLUGIN_LIST["linux.envars.Envars"],
-            )
-            if constructed:
-                result = DictRenderer().render(constructed.run())
-                return result
-        except UnsatisfiedException:
-            return "Unsatisfied"
-        except:
-            return None
+        return run_plugin(
+            Envars,
+            evidence_data,
+            base_config_path,
+            PLUGIN_LIST["linux.envars.Envars"],
+        )
 
 
 class PsScan(models.Model):
     evidence = models.ForeignKey(
         Evidence, on_delete=models.CASCADE, related_name="linux_psscan_evidence"
     )
-    artefacts = models.JSONField(null=True)
+    artefacts = ArtefactsField(null=True)
 
     @staticmethod
     @shared_task(name="Linux.PsScan.run")
     def run(evidence_data):
-        try:
-            context = contexts.Context()
-            constructed = build_context(
-                evidence_data,
-                context,
-                base_config_path,
-                PLUGIN_LIST["linux.psscan.PsScan"],
-            )
-            if constructed:
-                result = DictRenderer().render(constructed.run())
-                return result
-        except UnsatisfiedException:
-            return "Unsatisfied"
-        except:
-            return None
+        return run_plugin(
+            PsScan,
+            evidence_data,
+            base_config_path,
+            PLUGIN_LIST["linux.psscan.PsScan"],
+        )
 
 
 class tty_check(models.Model):
     evidence = models.ForeignKey(
         Evidence, on_delete=models.CASCADE, related_name="linux_tty_check_evidence"
     )
-    artefacts = models.JSONField(null=True)
+    artefacts = ArtefactsField(null=True)
 
     @staticmethod
     @shared_task(name="Linux.tty_check.run")
     def run(evidence_data):
-        try:
-            context = contexts.Context()
-            constructed = build_context(
-                evidence_data,
-                context,
-                base_config_path,
-                PLUGIN_LIST["linux.tty_check.tty_check"],
-            )
-            if constructed:
-                result = DictRenderer().render(constructed.run())
-                return result
-        except UnsatisfiedException:
-            return "Unsatisfied"
-        except:
-            return None
+        return run_plugin(
+            tty_check,
+            evidence_data,
+            base_config_path,
+            PLUGIN_LIST["linux.tty_check.tty_check"],
+        )
 
 
 class Bash(models.Model):
     evidence = models.ForeignKey(
         Evidence, on_delete=models.CASCADE, related_name="linux_bash_evidence"
     )
-    artefacts = models.JSONField(null=True)
+    artefacts = ArtefactsField(null=True)
 
     @staticmethod
     @shared_task(name="Linux.Bash.run")
     def run(evidence_data):
-        try:
-            context = contexts.Context()
-            constructed = build_context(
-                evidence_data,
-                context,
-                base_config_path,
-                PLUGIN_LIST["linux.bash.Bash"],
-            )
-            if constructed:
-                result = DictRenderer().render(constructed.run())
-                return result
-        except UnsatisfiedException:
-            return "Unsatisfied"
-        except:
-            return None
+        return run_plugin(
+            Bash,
+            evidence_data,
+            base_config_path,
+            PLUGIN_LIST["linux.bash.Bash"],
+        )
 
 
 class Elfs(models.Model):
     evidence = models.ForeignKey(
         Evidence, on_delete=models.CASCADE, related_name="linux_elfs_evidence"
     )
-    artefacts = models.JSONField(null=True)
+    artefacts = ArtefactsField(null=True)
 
     @staticmethod
     @shared_task(name="Linux.Elfs.run")
     def run(evidence_data):
-        try:
-            context = contexts.Context()
-            constructed = build_context(
-                evidence_data,
-                context,
-                base_config_path,
-                PLUGIN_LIST["linux.elfs.Elfs"],
-            )
-            if constructed:
-                result = DictRenderer().render(constructed.run())
-                return result
-        except UnsatisfiedException:
-            return "Unsatisfied"
-        except:
-            return None
+        return run_plugin(
+            Elfs,
+            evidence_data,
+            base_config_path,
+            PLUGIN_LIST["linux.elfs.Elfs"],
+        )
 
 
 class Sockstat(models.Model):
     evidence = models.ForeignKey(
         Evidence, on_delete=models.CASCADE, related_name="linux_sockstat_evidence"
     )
-    artefacts = models.JSONField(null=True)
+    artefacts = ArtefactsField(null=True)
 
     @staticmethod
     @shared_task(name="Linux.Sockstat.run")
     def run(evidence_data):
-        try:
-            context = contexts.Context()
-            constructed = build_context(
-                evidence_data,
-                context,
-                base_config_path,
-                PLUGIN_LIST["linux.sockstat.Sockstat"],
-            )
-            if constructed:
-                result = DictRenderer().render(constructed.run())
-                return result
-        except UnsatisfiedException:
-            return "Unsatisfied"
-        except:
-            return None
+        return run_plugin(
+            Sockstat,
+            evidence_data,
+            base_config_path,
+            PLUGIN_LIST["linux.sockstat.Sockstat"],
+        )
 
 
 class Capabilities(models.Model):
     evidence = models.ForeignKey(
         Evidence, on_delete=models.CASCADE, related_name="linux_capabilities_evidence"
     )
-    artefacts = models.JSONField(null=True)
+    artefacts = ArtefactsField(null=True)
 
     @staticmethod
     @shared_task(name="Linux.Capabilities.run")
     def run(evidence_data):
-        try:
-            context = contexts.Context()
-            constructed = build_context(
-                evidence_data,
-                context,
-                base_config_path,
-                PLUGIN_LIST["linux.capabilities.Capabilities"],
-            )
-            if constructed:
-                result = DictRenderer().render(constructed.run())
-                return result
-        except UnsatisfiedException:
-            return "Unsatisfied"
-        except:
-            return None
+        return run_plugin(
+            Capabilities,
+            evidence_data,
+            base_config_path,
+            PLUGIN_LIST["linux.capabilities.Capabilities"],
+        )
 
 
 class Kmsg(models.Model):
     evidence = models.ForeignKey(
         Evidence, on_delete=models.CASCADE, related_name="linux_kmsg_evidence"
     )
-    artefacts = models.JSONField(null=True)
+    artefacts = ArtefactsField(null=True)
 
     @staticmethod
     @shared_task(name="Linux.Kmsg.run")
     def run(evidence_data):
-        try:
-            context = contexts.Context()
-            constructed = build_context(
-                evidence_data,
-                context,
-                base_config_path,
-                PLUGIN_LIST["linux.kmsg.Kmsg"],
-            )
-            if constructed:
-                result = DictRenderer().render(constructed.run())
-                return result
-        except UnsatisfiedException:
-            return "Unsatisfied"
-        except:
-            return None
+        return run_plugin(
+            Kmsg,
+            evidence_data,
+            base_config_path,
+            PLUGIN_LIST["linux.kmsg.Kmsg"],
+        )
 
 
 class Malfind(models.Model):
@@ -359,26 +246,17 @@ class Malfind(models.Model):
         Evidence, on_delete=models.CASCADE, related_name="linux_malfind_evidence"
     )
 
-    artefacts = models.JSONField(null=True)
+    artefacts = ArtefactsField(null=True)
 
     @staticmethod
     @shared_task(name="Linux.Malfind.run")
     def run(evidence_data):
-        try:
-            context = contexts.Context()
-            constructed = build_context(
-                evidence_data,
-                context,
-                base_config_path,
-                PLUGIN_LIST["linux.malfind.Malfind"],
-            )
-            if constructed:
-                result = DictRenderer().render(constructed.run())
-                return result
-        except UnsatisfiedException:
-            return "Unsatisfied"
-        except:
-            return None
+        return run_plugin(
+            Malfind,
+            evidence_data,
+            base_config_path,
+            PLUGIN_LIST["linux.malfind.Malfind"],
+        )
 
 
 class Lsmod(models.Model):
@@ -386,26 +264,17 @@ class Lsmod(models.Model):
         Evidence, on_delete=models.CASCADE, related_name="linux_lsmod_evidence"
     )
 
-    artefacts = models.JSONField(null=True)
+    artefacts = ArtefactsField(null=True)
 
     @staticmethod
     @shared_task(name="Linux.Lsmod.run")
     def run(evidence_data):
-        try:
-            context = contexts.Context()
-            constructed = build_context(
-                evidence_data,
-                context,
-                base_config_path,
-                PLUGIN_LIST["linux.lsmod.Lsmod"],
-            )
-            if constructed:
-                result = DictRenderer().render(constructed.run())
-                return result
-        except UnsatisfiedException:
-            return "Unsatisfied"
-        except:
-            return None
+        return run_plugin(
+            Lsmod,
+            evidence_data,
+            base_config_path,
+            PLUGIN_LIST["linux.lsmod.Lsmod"],
+        )
 
 
 class NetGraph(models.Model):
@@ -427,23 +296,16 @@ class Timeliner(models.Model):
         Evidence, on_delete=models.CASCADE, related_name="linux_timeliner_evidence"
     )
 
+    # The rows are stored as TimelineEvent rows.
     artefacts = models.JSONField(null=True)
 
     @staticmethod
     @shared_task(name="Linux.Timeliner.run")
     def run(evidence_data):
-        try:
-            context = contexts.Context()
-            constructed = build_context(
-                evidence_data,
-                context,
-                base_config_path,
-                PLUGIN_LIST["timeliner.Timeliner"],
-            )
-            if constructed:
-                result = DictRenderer().render(constructed.run())
-                return result
-        except UnsatisfiedException:
-            return "Unsatisfied"
-        except:
-            return None
+        return run_plugin(
+            Timeliner,
+            evidence_data,
+            base_config_path,
+            PLUGIN_LIST["timeliner.Timeliner"],
+            row_model=TimelineEvent,
+        )
@@ -1,23 +1,43 @@
+var process_artefacts = {};
+
+function get_process_artefacts(evidence_id, process_id, plugin) {
+  /*
+    Get the result of a process-scoped plugin for the given process.
+    Every plugin is fetched at once with the process endpoint and the response
+    is kept, so opening the cards of a process does not query the API again.
+  */
+  const key = `${evidence_id}/${process_id}`;
+  if (!(key in process_artefacts)) {
+    process_artefacts[key] = $.ajax({
+      type: "GET",
+      url: `${baseURL}/${evidence_id}/process/${process_id}/`,
+      dataType: "json",
+    }).fail(function () {
+      delete process_artefacts[key];
+    });
+  }
+  return process_artefacts[key].then(function (data) {
+    if (data[plugin] === null || data[plugin] === undefined) {
+      return $.Deferred().reject({ status: 404 }, "error", "Not Found");
+    }
+    return data[plugin];
+  });
+}
+
 function display_psaux(evidence_id, process_id) {
-  $.ajax({
-    type: "GET",
-    url: `${baseURL}/${evidence_id}/psaux/${process_id}/`,
-    dataType: "json",
-    success: function (data) {
+  get_process_artefacts(evidence_id, process_id, "PsAux").then(
+    function (data) {
       $(".p_cmdline").text(data[0].ARGS);
     },
-    error: function (xhr, status, error) {
+    function (xhr, status, error) {
       $(".p_cmdline").text("Unavailable");
     },
-  });
+  );
 }
 
 function display_lsof(evidence_id, process_id) {
-  $.ajax({
-    type: "GET",
-    url: `${baseURL}/${evidence_id}/lsof/${process_id}/`,
-    dataType: "json",
-    success: function (data) {
+  get_process_artefacts(evidence_id, process_id, "Lsof").then(
+    function (data) {
       $("#artefacts_datatable").DataTable().destroy();
       $("#artefacts_body").html(
         `<table id="artefacts_datatable" class="table-sm table-responsive table-hover table" cellspacing="0" width="100%"
@@ -53,22 +73,19 @@ function display_lsof(evidence_id, process_id) {
       $("#artefacts_source_title").text("Open files");
       $("#artefacts_modal").modal("show");
     },
-    error: function (xhr, status, error) {
+    function (xhr, status, error) {
       if (xhr.status === 404) {
         toastr.warning("Open files are not available for this memory image.");
       } else {
         toastr.error(`An error occured : ${xhr.status}`);
       }
     },
-  });
+  );
 }
 
 function display_elfs(evidence_id, process_id) {
-  $.ajax({
-    type: "GET",
-    url: `${baseURL}/${evidence_id}/elfs/${process_id}/`,
-    dataType: "json",
-    success: function (data) {
+  get_process_artefacts(evidence_id, process_id, "Elfs").then(
+    function (data) {
       $("#artefacts_datatable").DataTable().destroy();
       $("#artefacts_body").html(
         `<table id="artefacts_datatable" class="table-sm table-responsive table-hover table" cellspacing="0" width="100%"
@@ -106,22 +123,19 @@ function display_elfs(evidence_id, process_id) {
       $("#artefacts_source_title").text("Executables and Linkable Formats");
       $("#artefacts_modal").modal("show");
     },
-    error: function (xhr, status, error) {
+    function (xhr, status, error) {
       if (xhr.status === 404) {
         toastr.warning("Open files are not available for this memory image.");
       } else {
         toastr.error(`An error occured : ${xhr.status}`);
       }
     },
-  });
+  );
 }
 
 function display_envars(evidence_id, process_id) {
-  $.ajax({
-    type: "GET",
-    url: `${baseURL}/${evidence_id}/envars/${process_id}/`,
-    dataType: "json",
-    success: function (data) {
+  get_process_artefacts(evidence_id, process_id, "Envars").then(
+    function (data) {
       $("#artefacts_datatable").DataTable().destroy();
       $("#artefacts_body").html(
         `<table id="artefacts_datatable" class="table-sm table-responsive table-hover table" cellspacing="0" width="100%"
@@ -159,22 +173,19 @@ function display_envars(evidence_id, process_id) {
       $("#artefacts_source_title").text("Envars");
       $("#artefacts_modal").modal("show");
     },
-    error: function (xhr, status, error) {
+    function (xhr, status, error) {
       if (xhr.status === 404) {
         toastr.warning("Envars are not available for this memory image.");
       } else {
         toastr.error(`An error occured : ${xhr.status}`);
       }
     },
-  });
+  );
 }
 
 function display_capabilities(evidence_id, process_id) {
-  $.ajax({
-    type: "GET",
-    url: `${baseURL}/${evidence_id}/capabilities/${process_id}/`,
-    dataType: "json",
-    success: function (data) {
+  get_process_artefacts(evidence_id, process_id, "Capabilities").then(
+    function (data) {
       $("#artefacts_datatable").DataTable().destroy();
       $("#artefacts_body").html(
         `<table id="artefacts_datatable" class="table-sm table-responsive table-hover table" cellspacing="0" width="100%"
@@ -222,14 +233,14 @@ function display_capabilities(evidence_id, process_id) {
       $("#artefacts_source_title").text("Capabilities");
       $("#artefacts_modal").modal("show");
     },
-    error: function (xhr, status, error) {
+    function (xhr, status, error) {
       if (xhr.status === 404) {
         toastr.warning("Capabilities are not available for this memory image.");
       } else {
         toastr.error(`An error occured : ${xhr.status}`);
       }
     },
-  });
+  );
 }
 
 function display_psscan(evidence_id) {
@@ -133,6 +133,12 @@ function connectWebSocket(evidence_id) {
           case "file_dump":
             filedump_task_result(result.message);
             break;
+          case "analysis_phase":
+            toastr.info(result.message.msg);
+            break;
+          case "analysis_failed":
+            toastr.error(result.message.msg);
+            break;
           default:
             break;
         }
@@ -19,6 +19,7 @@ urlpatterns = [
     path("api/linux/<int:dump_id>/malfind/", views.MalfindApiView.as_view()),
     path("api/linux/<int:dump_id>/lsmod/", views.LsmodApiView.as_view()),
     path("api/linux/<int:dump_id>/tty_check/", views.tty_checkApiView.as_view()),
+    path("api/linux/<int:dump_id>/process/<int:pid>/", views.ProcessApiView.as_view()),
     path("api/linux/<int:dump_id>/psaux/<int:pid>/", views.PsAuxApiView.as_view()),
     path("api/linux/<int:dump_id>/envars/<int:pid>/", views.EnvarsApiView.as_view()),
     path("api/linux/<int:dump_id>/lsof/<int:pid>/", views.LsofApiView.as_view()),
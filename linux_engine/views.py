@@ -1,13 +1,17 @@
 from django.shortcuts import render
 from django.contrib.auth.decorators import login_required
 from linux_engine.models import *
-from evidences.models import Evidence
+from evidences.models import (
+    Evidence,
+    filter_artefacts,
+    filter_process,
+    search_timeline,
+)
 from linux_engine.serializers import *
 from rest_framework.views import APIView
 from rest_framework import permissions
 from rest_framework import status
 from rest_framework.response import Response
-from django.core.paginator import Paginator
 from django.db.models import Q
 from rest_framework.authentication import SessionAuthentication, TokenAuthentication
 from main.forms import IndicatorForm
@@ -43,23 +47,35 @@ class PsTreeApiView(APIView):
         return Response(serializer.data, status=status.HTTP_200_OK)
 
 
-class PsAuxApiView(APIView):
+# Plugins whose rows are scoped to a process.
+PROCESS_PLUGINS = [PsAux, Lsof, Elfs, Envars, Capabilities]
+
+
+class ProcessApiView(APIView):
     permission_classes = [permissions.IsAuthenticated]
     authentication_classes = [SessionAuthentication, TokenAuthentication]
 
-    def get_object(self, dump_id):
-        try:
-            return PsAux.objects.get(evidence_id=dump_id)
-        except PsAux.DoesNotExist:
-            return None
+    def get(self, request, dump_id, pid, *args, **kwargs):
+        """
+        Return the rows of every process-scoped plugin for the given pid in a single response.
+        Plugins without a result are given as null.
+        """
+        if not Evidence.objects.filter(dump_id=dump_id).exists():
+            return Response({}, status=status.HTTP_404_NOT_FOUND)
+        data = filter_process(PROCESS_PLUGINS, dump_id, pid)
+        return Response(data, status=status.HTTP_200_OK)
+
+
+class PsAuxApiView(APIView):
+    permission_classes = [permissions.IsAuthenticated]
+    authentication_classes = [SessionAuthentication, TokenAuthentication]
 
     def get(self, request, dump_id, pid, *args, **kwargs):
         """
         Give the requested psaux from the pid.
         """
-        data = self.get_object(dump_id)
-        if data.artefacts:
-            filtered_data = [d for d in data.artefacts if d["PID"] == pid]
+        filtered_data = filter_artefacts(PsAux, dump_id, pid=pid)
+        if filtered_data is not None:
             return Response(filtered_data, status=status.HTTP_200_OK)
         else:
             return Response({}, status=status.HTTP_404_NOT_FOUND)
@@ -69,19 +85,12 @@ class LsofApiView(APIView):
     permission_classes = [permissions.IsAuthenticated]
     authentication_classes = [SessionAuthentication, TokenAuthentication]
 
-    def get_object(self, dump_id):
-        try:
-            return Lsof.objects.get(evidence_id=dump_id)
-        except Lsof.DoesNotExist:
-            return None
-
     def get(self, request, dump_id, pid, *args, **kwargs):
         """
         Give the requested lsof data from the given pid.
         """
-        data = self.get_object(dump_id)
-        if data.artefacts:
-            filtered_data = [d for d in data.artefacts if d["PID"] == pid]
+        filtered_data = filter_artefacts(Lsof, dump_id, pid=pid)
+        if filtered_data is not None:
             return Response(filtered_data, status=status.HTTP_200_OK)
         else:
             return Response({}, status=status.HTTP_404_NOT_FOUND)
@@ -91,19 +100,12 @@ class ElfsApiView(APIView):
     permission_classes = [permissions.IsAuthenticated]
     authentication_classes = [SessionAuthentication, TokenAuthentication]
 
-    def get_object(self, dump_id):
-        try:
-            return Elfs.objects.get(evidence_id=dump_id)
-        except Elfs.DoesNotExist:
-            return None
-
     def get(self, request, dump_id, pid, *args, **kwargs):
         """
         Give the requested ELfs from the given pid.
         """
-        data = self.get_object(dump_id)
-        if data.artefacts:
-            filtered_data = [d for d in data.artefacts if d["PID"] == pid]
+        filtered_data = filter_artefacts(Elfs, dump_id, pid=pid)
+        if filtered_data is not None:
             return Response(filtered_data, status=status.HTTP_200_OK)
         else:
             return Response({}, status=status.HTTP_404_NOT_FOUND)
@@ -113,19 +115,12 @@ class EnvarsApiView(APIView):
     permission_classes = [permissions.IsAuthenticated]
     authentication_classes = [SessionAuthentication, TokenAuthentication]
 
-    def get_object(self, dump_id):
-        try:
-            return Envars.objects.get(evidence_id=dump_id)
-        except Envars.DoesNotExist:
-            return None
-
     def get(self, request, dump_id, pid, *args, **kwargs):
         """
         Give the requested Envars from the given pid.
         """
-        data = self.get_object(dump_id)
-        if data.artefacts:
-            filtered_data = [d for d in data.artefacts if d["PID"] == pid]
+        filtered_data = filter_artefacts(Envars, dump_id, pid=pid)
+        if filtered_data is not None:
             return Response(filtered_data, status=status.HTTP_200_OK)
         else:
             return Response({}, status=status.HTTP_404_NOT_FOUND)
@@ -135,19 +130,12 @@ class CapabilitiesApiView(APIView):
     permission_classes = [permissions.IsAuthenticated]
     authentication_classes = [SessionAuthentication, TokenAuthentication]
 
-    def get_object(self, dump_id):
-        try:
-            return Capabilities.objects.get(evidence_id=dump_id)
-        except Capabilities.DoesNotExist:
-            return None
-
     def get(self, request, dump_id, pid, *args, **kwargs):
         """
         Give the requested Capabilites from the given pid.
         """
-        data = self.get_object(dump_id)
-        if data.artefacts:
-            filtered_data = [d for d in data.artefacts if d["Pid"] == pid]
+        filtered_data = filter_artefacts(Capabilities, dump_id, pid=pid)
+        if filtered_data is not None:
             return Response(filtered_data, status=status.HTTP_200_OK)
         else:
             return Response({}, status=status.HTTP_404_NOT_FOUND)
@@ -378,48 +366,17 @@ class TimelineDataApiView(APIView):
     permission_classes = [permissions.IsAuthenticated]
     authentication_classes = [SessionAuthentication, TokenAuthentication]
 
-    def get_object(self, dump_id):
-        try:
-            return Timeliner.objects.get(evidence_id=dump_id)
-        except Timeliner.DoesNotExist:
-            return None
-
     def get(self, request, dump_id, *args, **kwargs):
         """
         Serve the requested timeline data with server-side processing.
         """
-        data = self.get_object(dump_id)
-        if not data:
+        if not Timeliner.objects.filter(evidence_id=dump_id).exists():
             return Response({}, status=status.HTTP_404_NOT_FOUND)
-
-        # Server-side parameters
-        draw = int(
-            request.query_params.get("draw", 0)
-        )  # Used by DataTables to ensure that the Ajax returns from server-side processing are drawn in sequence
-        start = int(request.query_params.get("start", 0))
-        length = int(request.query_params.get("length", 25))
-        timestamp_min = request.query_params.get("timestamp_min", None)
-        timestamp_max = request.query_params.get("timestamp_max", None)
-
-        # Filtering based on timestamp
-        filtered_data = []
-        if timestamp_min and timestamp_max:
-            for artefact in data.artefacts:
-                created_date = artefact.get("Created Date")
-                if created_date and timestamp_min <= created_date <= timestamp_max:
-                    filtered_data.append(artefact)
-        else:
-            filtered_data = data.artefacts
-
-        paginator = Paginator(filtered_data, length)
-        page_data = paginator.get_page((start // length) + 1)
-
-        return Response(
-            {
-                "draw": draw,
-                "recordsTotal": paginator.count,
-                "recordsFiltered": paginator.count,  # Adjust this value if you implement search
-                "data": page_data.object_list,
-            },
-            status=status.HTTP_200_OK,
-        )
+        try:
+            # Used by DataTables to ensure that the Ajax returns from server-side processing are drawn in sequence
+            draw = int(request.query_params.get("draw", 0))
+        except ValueError:
+            draw = 0
+        response = search_timeline(dump_id, request.query_params)
+        response["draw"] = draw
+        return Response(response, status=status.HTTP_200_OK)
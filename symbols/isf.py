@@ -0,0 +1,83 @@
+import bz2, gzip, json, jsonschema, lzma, os, pathlib, re
+from volatility3 import schemas
+from volatility3.framework import constants
+from volatility3.framework.automagic.symbol_cache import (
+    LinuxIdentifier,
+    MacIdentifier,
+    WindowsIdentifier,
+)
+
+
+def isf_location(path):
+    """Return the URL volatility3 uses for a local ISF file."""
+    return pathlib.Path(path).resolve().as_uri()
+
+
+def kernel_version(banner):
+    """Extract the kernel release from a Linux or Mac banner."""
+    match = re.search(r"(?:Linux version|Darwin Kernel Version) (\S+?):?(?:\s|$)", banner)
+    return match.group(1) if match else None
+
+
+def open_isf(f):
+    """Return a file object reading the ISF, decompressed according to its magic like volatility3 does."""
+    magic = f.read(6)
+    f.seek(0)
+    if magic.startswith(b"\xfd7zXZ\x00"):
+        return lzma.open(f)
+    if magic.startswith(b"\x1f\x8b"):
+        return gzip.open(f)
+    if magic.startswith(b"BZh"):
+        return bz2.open(f)
+    return f
+
+
+def read_identifiers(f, validate=False):
+    """Parse an ISF file, compressed or not, and extract what identifies the kernel it describes.
+    With validate, the ISF is also checked against the volatility3 schema of its format.
+    Return : A dict of the identifiers, the hash and the statistics of the ISF, as stored in the
+    volatility3 identifier cache. Raise ValueError if the file is not a valid ISF.
+    """
+    try:
+        isf = json.load(open_isf(f))
+    except (EOFError, OSError, UnicodeDecodeError, ValueError) as e:
+        raise ValueError(f"The file is not a valid ISF: {e}")
+    finally:
+        f.seek(0)
+    if not isinstance(isf, dict) or "metadata" not in isf:
+        raise ValueError("The file is not a valid ISF: no metadata")
+    if validate:
+        # The validated hashes are recorded in the volatility3 cache, the plugin runs do not validate the ISF again.
+        os.makedirs(constants.CACHE_PATH, exist_ok=True)
+        try:
+            valid = schemas.validate(isf)
+        except jsonschema.ValidationError as e:
+            raise ValueError(f"The file is not a valid ISF: {e.message}")
+        if not valid:
+            raise ValueError("The file is not a valid ISF: it does not match its schema")
+    identifiers = {
+        "banner": None,
+        "kernel_version": None,
+        "pdb_name": None,
+        "pdb_guid": None,
+        "pdb_age": None,
+        "isf_hash": schemas.create_json_hash(isf),
+        "isf_stats": [
+            len(isf.get("base_types", {})),
+            len(isf.get("user_types", {})),
+            len(isf.get("enums", {})),
+            len(isf.get("symbols", {})),
+        ],
+    }
+    pdb = isf["metadata"].get("windows", {}).get("pdb", {})
+    if WindowsIdentifier.get_identifier(isf):
+        identifiers["pdb_name"] = pdb["database"]
+        identifiers["pdb_guid"] = pdb["GUID"].upper()
+        identifiers["pdb_age"] = pdb["age"]
+        return identifiers
+    banner = LinuxIdentifier.get_identifier(isf) or MacIdentifier.get_identifier(isf)
+    if banner:
+        # Banners are bytes, latin-1 maps them to text and back unchanged.
+        identifiers["banner"] = banner.decode("latin-1")
+        identifiers["kernel_version"] = kernel_version(identifiers["banner"])
+    return identifiers
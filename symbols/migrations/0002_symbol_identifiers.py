@@ -0,0 +1,81 @@
+# Generated by Django 4.2.11 on 2026-10-18 14:36
+
+import logging
+from django.db import migrations, models
+
+logger = logging.getLogger(__name__)
+
+
+def index_symbols(apps, schema_editor):
+    """Read the identifiers of the ISF files uploaded before they were indexed."""
+    from symbols.isf import read_identifiers
+
+    Symbol = apps.get_model("symbols", "Symbol")
+    for symbol in Symbol.objects.iterator():
+        try:
+            with open(symbol.symbols_file.path, "rb") as f:
+                identifiers = read_identifiers(f)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Could not index the symbol {symbol.name}: {e}")
+            continue
+        for field, value in identifiers.items():
+            setattr(symbol, field, value)
+        symbol.save()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('symbols', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='symbol',
+            name='banner',
+            field=models.TextField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='symbol',
+            name='isf_hash',
+            field=models.CharField(blank=True, max_length=64, null=True),
+        ),
+        migrations.AddField(
+            model_name='symbol',
+            name='isf_stats',
+            field=models.JSONField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='symbol',
+            name='kernel_version',
+            field=models.CharField(blank=True, max_length=100, null=True),
+        ),
+        migrations.AddField(
+            model_name='symbol',
+            name='pdb_age',
+            field=models.IntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='symbol',
+            name='pdb_guid',
+            field=models.CharField(blank=True, max_length=40, null=True),
+        ),
+        migrations.AddField(
+            model_name='symbol',
+            name='pdb_name',
+            field=models.CharField(blank=True, max_length=100, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='symbol',
+            index=models.Index(fields=['banner'], name='symbols_sym_banner_7ce802_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='symbol',
+            index=models.Index(fields=['pdb_name', 'pdb_guid', 'pdb_age'], name='symbols_sym_pdb_nam_41f57b_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='symbol',
+            index=models.Index(fields=['os', 'kernel_version'], name='symbols_sym_os_dc46d1_idx'),
+        ),
+        migrations.RunPython(index_symbols, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 4.2.11 on 2026-10-18 14:39
+
+from django.db import migrations, models
+
+
+def set_status(apps, schema_editor):
+    """The symbols uploaded before are ready if their identifiers could be read."""
+    Symbol = apps.get_model("symbols", "Symbol")
+    Symbol.objects.exclude(isf_hash=None).update(status="Ready")
+    Symbol.objects.filter(isf_hash=None).update(status="Failed")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('symbols', '0002_symbol_identifiers'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='symbol',
+            name='status',
+            field=models.CharField(choices=[('Pending', 'Pending'), ('Processing', 'Processing'), ('Ready', 'Ready'), ('Failed', 'Failed')], default='Pending', max_length=20),
+        ),
+        migrations.RunPython(set_status, migrations.RunPython.noop),
+    ]
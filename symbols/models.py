@@ -1,6 +1,7 @@
 from django.db import models
 import os
 import shutil
+from volatility3.framework.automagic.symbol_cache import WindowsIdentifier
 
 CHOICES = (
     ("Windows", "Windows"),
@@ -10,6 +11,14 @@ CHOICES = (
 
 UPLOAD_PATH = "symbols/"
 
+# Processing states of an uploaded ISF, only the ready ones are used by the analyses.
+STATUSES = (
+    ("Pending", "Pending"),
+    ("Processing", "Processing"),
+    ("Ready", "Ready"),
+    ("Failed", "Failed"),
+)
+
 
 class Symbol(models.Model):
     id = models.AutoField(primary_key=True)
@@ -17,10 +26,37 @@ class Symbol(models.Model):
     os = models.CharField(max_length=50, choices=CHOICES)
     description = models.TextField(max_length=500)
     symbols_file = models.FileField(upload_to=UPLOAD_PATH)
+    status = models.CharField(max_length=20, choices=STATUSES, default="Pending")
+    # Identifiers read from the ISF once, so the analyses never scan the symbol directory.
+    banner = models.TextField(null=True, blank=True)
+    kernel_version = models.CharField(max_length=100, null=True, blank=True)
+    pdb_name = models.CharField(max_length=100, null=True, blank=True)
+    pdb_guid = models.CharField(max_length=40, null=True, blank=True)
+    pdb_age = models.IntegerField(null=True, blank=True)
+    isf_hash = models.CharField(max_length=64, null=True, blank=True)
+    isf_stats = models.JSONField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["banner"]),
+            models.Index(fields=["pdb_name", "pdb_guid", "pdb_age"]),
+            models.Index(fields=["os", "kernel_version"]),
+        ]
 
     def __str__(self):
         return str(self.name)
 
+    def identifier(self):
+        """Return the operating system and the identifier of the ISF in the volatility3 identifier cache."""
+        if self.pdb_guid:
+            return "windows", WindowsIdentifier.generate(
+                self.pdb_name, self.pdb_guid, self.pdb_age
+            )
+        if self.banner:
+            banner = self.banner.encode("latin-1")
+            return ("mac" if self.banner.startswith("Darwin") else "linux"), banner
+        return None, None
+
     def save(self, *args, **kwargs):
         super(Symbol, self).save(*args, **kwargs)
 
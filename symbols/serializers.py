@@ -11,6 +11,16 @@ class SymbolSerializer(serializers.ModelSerializer):
     class Meta:
         model = Symbol
         fields = "__all__"
+        read_only_fields = [
+            "status",
+            "banner",
+            "kernel_version",
+            "pdb_name",
+            "pdb_guid",
+            "pdb_age",
+            "isf_hash",
+            "isf_stats",
+        ]
 
 
 @receiver(post_save, sender=Symbol)
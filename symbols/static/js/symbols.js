@@ -30,6 +30,11 @@ function get_symbols() {
             mRender: createDescriptionColumn,
             sClass: "align-middle",
           },
+          {
+            mData: "status",
+            mRender: createStatusColumn,
+            sClass: "align-middle",
+          },
         ],
         aLengthMenu: [
           [25, 50, 75, -1],
@@ -92,6 +97,29 @@ function createDescriptionColumn(description) {
   return div.outerHTML;
 }
 
+function createStatusColumn(status) {
+  var div = document.createElement("small");
+  var logo = document.createElement("i");
+  var span = document.createElement("span");
+  if (status === "Ready") {
+    div.className =
+      "px-1 py-1 fw-semibold text-success-emphasis bg-success-subtle border border-success-subtle rounded-2 align-items-center";
+    logo.className = "fas fa-check m-2";
+  } else if (status === "Failed") {
+    div.className =
+      "px-1 py-1 fw-semibold text-danger-emphasis bg-danger-subtle border border-danger-subtle rounded-2 align-items-center";
+    logo.className = "fas fa-xmark m-2";
+  } else {
+    div.className =
+      "px-1 py-1 fw-semibold text-info-emphasis bg-info-subtle border border-info-subtle rounded-2 align-items-center";
+    logo.className = "fas fa-spinner fa-spin m-2";
+  }
+  span.textContent = status;
+  div.appendChild(logo);
+  div.appendChild(span);
+  return div.outerHTML;
+}
+
 function display_symbol(id) {
   $.ajax({
     url: `/api/symbols/${id}`,
@@ -152,9 +180,26 @@ function handleSocketMessage(e) {
     case "deleted":
       removeSymbolRow(result.message);
       break;
+    case "progress":
+      updateSymbolProgress(result.message);
+      break;
+    case "failed":
+      toastr.error(
+        `The ISF ${result.message.name} could not be processed: ${result.message.error}`,
+      );
+      break;
   }
 }
 
+function updateSymbolProgress(message) {
+  try {
+    var row = symbols.row("#" + message.id);
+    var data = row.data();
+    data.status = `${message.step} ${message.progress}%`;
+    row.data(data).draw(false);
+  } catch {}
+}
+
 function updateOrCreateSymbolRow(message) {
   try {
     symbols
@@ -251,7 +296,7 @@ $(document).ready(function () {
         clear_form();
         $("#modal_symbol_import").modal("hide");
         $("#symbol_import_loading").hide();
-        toastr.success("Symbol uploaded successfully!");
+        toastr.success("Symbol uploaded, it is being processed.");
         get_symbols();
       },
       error: function () {
@@ -0,0 +1,115 @@
+from celery import shared_task
+from symbols.isf import open_isf, read_identifiers
+from symbols.models import UPLOAD_PATH, Symbol
+from channels.layers import get_channel_layer
+from asgiref.sync import async_to_sync
+from django.db import DatabaseError
+import os, tempfile, logging
+
+logger = logging.getLogger(__name__)
+
+# Size of the blocks of an ISF decompressed at once.
+DECOMPRESS_BLOCK_SIZE = 16 * 1024**2
+
+
+def notify_symbol(symbol_id, status, **message):
+    channel_layer = get_channel_layer()
+    async_to_sync(channel_layer.group_send)(
+        "symbols",
+        {
+            "type": "send_notification",
+            "status": status,
+            "message": {"id": symbol_id, **message},
+        },
+    )
+
+
+def uncompressed_name(name):
+    """Return the storage name of the uncompressed copy of an ISF."""
+    base = os.path.basename(name)
+    for extension in (".xz", ".gz", ".bz2"):
+        if base.endswith(extension):
+            base = base[: -len(extension)]
+    if not base.endswith(".json"):
+        base += ".json"
+    return f"{UPLOAD_PATH}{base}"
+
+
+def decompress(symbol):
+    """Decompress the ISF of a symbol next to it, so loading it only costs the JSON parsing.
+    Return : The storage name of the uncompressed ISF, the current one if it was not compressed.
+    """
+    storage = symbol.symbols_file.storage
+    path = symbol.symbols_file.path
+    with open(path, "rb") as f:
+        reader = open_isf(f)
+        if reader is f:
+            return symbol.symbols_file.name
+        size = os.fstat(f.fileno()).st_size or 1
+        name = storage.get_available_name(uncompressed_name(symbol.symbols_file.name))
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as output:
+                progress = 0
+                while True:
+                    block = reader.read(DECOMPRESS_BLOCK_SIZE)
+                    if not block:
+                        break
+                    output.write(block)
+                    if f.tell() * 80 // size > progress:
+                        progress = f.tell() * 80 // size
+                        notify_symbol(
+                            symbol.id, "progress", progress=progress, step="Decompressing"
+                        )
+            os.replace(tmp_path, storage.path(name))
+        except BaseException:
+            os.remove(tmp_path)
+            raise
+    return name
+
+
+@shared_task(name="Symbols.process")
+def process_symbol(symbol_id):
+    """
+    Validate an uploaded ISF against its schema, store it uncompressed and record its identifiers.
+    The decompression and parsing are paid once here instead of by the analyses using the ISF.
+    """
+    try:
+        symbol = Symbol.objects.get(id=symbol_id)
+    except Symbol.DoesNotExist:
+        return
+    Symbol.objects.filter(id=symbol_id).update(status="Processing")
+    notify_symbol(symbol_id, "progress", progress=0, step="Decompressing")
+    name = symbol.symbols_file.name
+    try:
+        name = decompress(symbol)
+        notify_symbol(symbol_id, "progress", progress=80, step="Indexing")
+        with symbol.symbols_file.storage.open(name, "rb") as f:
+            identifiers = read_identifiers(f, validate=True)
+    except Exception as e:
+        logger.warning(f"Could not process the symbol {symbol.name}: {e}")
+        if name != symbol.symbols_file.name:
+            symbol.symbols_file.storage.delete(name)
+        symbol.status = "Failed"
+        try:
+            symbol.save(update_fields=["status"])
+        except DatabaseError:
+            return
+        notify_symbol(symbol_id, "failed", name=symbol.name, error=str(e))
+        return
+    fields = ["status", *identifiers]
+    if name != symbol.symbols_file.name:
+        compressed_name = symbol.symbols_file.name
+        symbol.symbols_file.name = name
+        fields.append("symbols_file")
+    for field, value in identifiers.items():
+        setattr(symbol, field, value)
+    symbol.status = "Ready"
+    try:
+        symbol.save(update_fields=fields)
+    except DatabaseError:
+        # The symbol was deleted meanwhile.
+        symbol.symbols_file.storage.delete(name)
+        return
+    if "symbols_file" in fields:
+        symbol.symbols_file.storage.delete(compressed_name)
@@ -1,3 +1,72 @@
+import base64, gzip, io, json
 from django.test import TestCase
+from symbols.isf import read_identifiers
 
-# Create your tests here.
+BANNER = (
+    "Linux version 5.15.0-91-generic (buildd@lcy02-amd64-045) (gcc 11.4.0) "
+    "#101-Ubuntu SMP\n\x00"
+)
+
+
+def isf(metadata, symbols=None):
+    return {
+        "metadata": {
+            "format": "6.2.0",
+            "producer": {"name": "volweb-tests", "version": "1.0.0"},
+            **metadata,
+        },
+        "base_types": {},
+        "user_types": {},
+        "enums": {},
+        "symbols": symbols or {},
+    }
+
+
+class ReadIdentifiersTestCase(TestCase):
+
+    def test_windows(self):
+        pdb = {
+            "database": "ntkrnlmp.pdb",
+            "GUID": "a1b2c3d4e5f60718293a4b5c6d7e8f90",
+            "age": 1,
+            "machine_type": 34404,
+        }
+        data = json.dumps(isf({"windows": {"pdb": pdb}})).encode()
+        identifiers = read_identifiers(io.BytesIO(data))
+        self.assertEqual(identifiers["pdb_name"], "ntkrnlmp.pdb")
+        self.assertEqual(identifiers["pdb_guid"], "A1B2C3D4E5F60718293A4B5C6D7E8F90")
+        self.assertEqual(identifiers["pdb_age"], 1)
+        self.assertIsNone(identifiers["banner"])
+        self.assertEqual(identifiers["isf_stats"], [0, 0, 0, 0])
+
+    def test_linux_compressed(self):
+        symbols = {
+            "linux_banner": {
+                "address": 0,
+                "constant_data": base64.b64encode(BANNER.encode()).decode(),
+            }
+        }
+        data = json.dumps(isf({"linux": {"symbols": []}}, symbols)).encode()
+        f = io.BytesIO(gzip.compress(data))
+        identifiers = read_identifiers(f)
+        self.assertEqual(identifiers["banner"], BANNER)
+        self.assertEqual(identifiers["kernel_version"], "5.15.0-91-generic")
+        self.assertEqual(identifiers["isf_stats"], [0, 0, 0, 1])
+        # The file is left at its start for the upload that follows.
+        self.assertEqual(f.tell(), 0)
+
+    def test_invalid(self):
+        for data in (b"not an isf", b"\x1f\x8bnot gzip", b"[]", b'{"symbols": {}}'):
+            with self.subTest(data=data):
+                with self.assertRaises(ValueError):
+                    read_identifiers(io.BytesIO(data))
+
+    def test_validate(self):
+        data = json.dumps(isf({})).encode()
+        identifiers = read_identifiers(io.BytesIO(data), validate=True)
+        self.assertEqual(identifiers["isf_stats"], [0, 0, 0, 0])
+        invalid = isf({}, {"linux_banner": {"address": "0"}})
+        data = json.dumps(invalid).encode()
+        self.assertIsNotNone(read_identifiers(io.BytesIO(data)))
+        with self.assertRaises(ValueError):
+            read_identifiers(io.BytesIO(data), validate=True)
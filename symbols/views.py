@@ -7,6 +7,7 @@ from rest_framework import permissions
 from symbols.models import Symbol
 from symbols.serializers import SymbolSerializer
 from symbols.forms import SymbolForm
+from symbols.tasks import process_symbol
 
 
 @login_required
@@ -36,7 +37,9 @@ class SymbolsApiView(APIView):
     def post(self, request, *args, **kwargs):
         serializer = SymbolSerializer(data=request.data)
         if serializer.is_valid():
-            serializer.save()
+            symbol = serializer.save()
+            # The ISF is validated, decompressed and indexed in the background.
+            process_symbol.apply_async(args=[symbol.id])
             return Response(serializer.data, status=status.HTTP_201_CREATED)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
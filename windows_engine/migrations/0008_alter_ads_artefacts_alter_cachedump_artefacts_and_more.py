@@ -0,0 +1,179 @@
+# Generated by Django 4.2.11 on 2026-10-18 13:49
+
+from django.db import migrations
+import evidences.models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('windows_engine', '0007_iat'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='ads',
+            name='artefacts',
+            field=evidences.models.ArtefactsField(null=True),
+        ),
+        migrations.AlterField(
+            model_name='cachedump',
+            name='artefacts',
+            field=evidences.models.ArtefactsField(null=True),
+        ),
+        migrations.AlterField(
+            model_name='cmdline',
+            name='artefacts',
+            field=evidences.models.ArtefactsField(null=True),
+        ),
+        migrations.AlterField(
+            model_name='devicetree',
+            name='artefacts',
+            field=evidences.models.ArtefactsField(null=True),
+        ),
+        migrations.AlterField(
+            model_name='dlllist',
+            name='artefacts',
+            field=evidences.models.ArtefactsField(null=True),
+        ),
+        migrations.AlterField(
+            model_name='driverirp',
+            name='artefacts',
+            field=evidences.models.ArtefactsField(null=True),
+        ),
+        migrations.AlterField(
+            model_name='drivermodule',
+            name='artefacts',
+            field=evidences.models.ArtefactsField(null=True),
+        ),
+        migrations.AlterField(
+            model_name='envars',
+            name='artefacts',
+            field=evidences.models.ArtefactsField(null=True),
+        ),
+        migrations.AlterField(
+            model_name='filescan',
+            name='artefacts',
+            field=evidences.models.ArtefactsField(null=True),
+        ),
+        migrations.AlterField(
+            model_name='getsids',
+            name='artefacts',
+            field=evidences.models.ArtefactsField(null=True),
+        ),
+        migrations.AlterField(
+            model_name='hashdump',
+            name='artefacts',
+            field=evidences.models.ArtefactsField(null=True),
+        ),
+        migrations.AlterField(
+            model_name='hivelist',
+            name='artefacts',
+            field=evidences.models.ArtefactsField(null=True),
+        ),
+        migrations.AlterField(
+            model_name='iat',
+            name='artefacts',
+            field=evidences.models.ArtefactsField(null=True),
+        ),
+        migrations.AlterField(
+            model_name='info',
+            name='artefacts',
+            field=evidences.models.ArtefactsField(null=True),
+        ),
+        migrations.AlterField(
+            model_name='ldrmodules',
+            name='artefacts',
+            field=evidences.models.ArtefactsField(null=True),
+        ),
+        migrations.AlterField(
+            model_name='lsadump',
+            name='artefacts',
+            field=evidences.models.ArtefactsField(null=True),
+        ),
+        migrations.AlterField(
+            model_name='malfind',
+            name='artefacts',
+            field=evidences.models.ArtefactsField(null=True),
+        ),
+        migrations.AlterField(
+            model_name='mbrscan',
+            name='artefacts',
+            field=evidences.models.ArtefactsField(null=True),
+        ),
+        migrations.AlterField(
+            model_name='mftscan',
+            name='artefacts',
+            field=evidences.models.ArtefactsField(null=True),
+        ),
+        migrations.AlterField(
+            model_name='modules',
+            name='artefacts',
+            field=evidences.models.ArtefactsField(null=True),
+        ),
+        migrations.AlterField(
+            model_name='netscan',
+            name='artefacts',
+            field=evidences.models.ArtefactsField(null=True),
+        ),
+        migrations.AlterField(
+            model_name='netstat',
+            name='artefacts',
+            field=evidences.models.ArtefactsField(null=True),
+        ),
+        migrations.AlterField(
+            model_name='privs',
+            name='artefacts',
+            field=evidences.models.ArtefactsField(null=True),
+        ),
+        migrations.AlterField(
+            model_name='psscan',
+            name='artefacts',
+            field=evidences.models.ArtefactsField(null=True),
+        ),
+        migrations.AlterField(
+            model_name='pstree',
+            name='artefacts',
+            field=evidences.models.ArtefactsField(null=True),
+        ),
+        migrations.AlterField(
+            model_name='sessions',
+            name='artefacts',
+            field=evidences.models.ArtefactsField(null=True),
+        ),
+        migrations.AlterField(
+            model_name='skeletonkeycheck',
+            name='artefacts',
+            field=evidences.models.ArtefactsField(null=True),
+        ),
+        migrations.AlterField(
+            model_name='ssdt',
+            name='artefacts',
+            field=evidences.models.ArtefactsField(null=True),
+        ),
+        migrations.AlterField(
+            model_name='svcscan',
+            name='artefacts',
+            field=evidences.models.ArtefactsField(null=True),
+        ),
+        migrations.AlterField(
+            model_name='thrdscan',
+            name='artefacts',
+            field=evidences.models.ArtefactsField(null=True),
+        ),
+        migrations.AlterField(
+            model_name='timeliner',
+            name='artefacts',
+            field=evidences.models.ArtefactsField(null=True),
+        ),
+        migrations.AlterField(
+            model_name='userassist',
+            name='artefacts',
+            field=evidences.models.ArtefactsField(null=True),
+        ),
+        migrations.AlterField(
+            model_name='vadwalk',
+            name='artefacts',
+            field=evidences.models.ArtefactsField(null=True),
+        ),
+    ]
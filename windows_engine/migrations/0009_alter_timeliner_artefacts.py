@@ -0,0 +1,18 @@
+# Generated by Django 4.2.11 on 2026-10-18 13:55
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('windows_engine', '0008_alter_ads_artefacts_alter_cachedump_artefacts_and_more'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='timeliner',
+            name='artefacts',
+            field=models.JSONField(null=True),
+        ),
+    ]
@@ -1,5 +1,5 @@
 from django.db import models
-from evidences.models import Evidence
+from evidences.models import ArtefactsField, Evidence, TimelineEvent
 import base64
 from celery import shared_task
 import logging
@@ -32,119 +32,120 @@ class Info(models.Model):
     evidence = models.ForeignKey(
         Evidence, on_delete=models.CASCADE, related_name="windows_info_evidence"
     )
-    artefacts = models.JSONField(null=True)
+    artefacts = ArtefactsField(null=True)
 
     @staticmethod
     def run(evidence_data):
-        try:
-            context = contexts.Context()
-            constructed = build_context(
-                evidence_data,
-                context,
-                base_config_path,
-                PLUGIN_LIST["windows.info.Info"],
-            )
-            if constructed:
-                result = DictRenderer().render(constructed.run())
-                return result
-        except UnsatisfiedException:
-            return "Unsatisfied"
-        except:
-            return None
+        return run_plugin(
+            Info,
+            evidence_data,
+            base_config_path,
+            PLUGIN_LIST["windows.info.Info"],
+        )
 
 
 class PsTree(models.Model):
     evidence = models.ForeignKey(
         Evidence, on_delete=models.CASCADE, related_name="windows_pstree_evidence"
     )
-    artefacts = models.JSONField(null=True)
+    artefacts = ArtefactsField(null=True)
 
     @staticmethod
     @shared_task(name="Windows.PsTree.run")
     def run(evidence_data):
+        return run_plugin(
+            PsTree,
+            evidence_data,
+            base_config_path,
+            PLUGIN_LIST["windows.pstree.PsTree"],
+        )
+
+    def pslist_dump(self, pid):
+        """Dump the process requested by the user using the pslist plugin"""
+        return next(self.pslist_dumps([pid]))[1]
+
+    def pslist_dumps(self, pids):
+        """Dump the processes requested by the user with a single run of the pslist plugin
+        Return : A generator of the PID and file output of each process, "Error outputting file" when it was not found.
+        """
+        evidence_data = get_evidence_data(
+            self.evidence, f"media/{self.evidence.dump_id}"
+        )
+        context = contexts.Context()
+        context.config["plugins.PsList.pid"] = [int(pid) for pid in pids]
+        context.config["plugins.PsList.dump"] = True
         try:
-            context = contexts.Context()
             constructed = build_context(
                 evidence_data,
                 context,
                 base_config_path,
-                PLUGIN_LIST["windows.pstree.PsTree"],
+                PLUGIN_LIST["windows.pslist.PsList"],
             )
-            if constructed:
-                result = DictRenderer().render(constructed.run())
-                return result
-        except UnsatisfiedException:
-            return "Unsatisfied"
-        except:
-            return None
-
-    def pslist_dump(self, pid):
-        """Dump the process requested by the user using the pslist plugin"""
-        evidence_data = {
-            "bucket": f"s3://{str(self.evidence.dump_linked_case.case_bucket_id)}/{self.evidence.dump_name}",
-            "output_path": f"media/{self.evidence.dump_id}",
-        }
-        context = contexts.Context()
-        context.config["plugins.PsList.pid"] = [
-            pid,
-        ]
-        context.config["plugins.PsList.dump"] = True
-        constructed = build_context(
-            evidence_data,
-            context,
-            base_config_path,
-            PLUGIN_LIST["windows.pslist.PsList"],
-        )
-        result = DictRenderer().render(constructed.run())
-        artefact = {x.translate({32: None}): y for x, y in result[0].items()}
+            result = DictRenderer().render(constructed.run())
+        except Exception as e:
+            logger.warning(f"Could not dump the processes {pids} using pslist: {e}")
+            result = []
         fix_permissions(f"media/{self.evidence.dump_id}")
-        return artefact["Fileoutput"]
+        outputs = {row["PID"]: row["File output"] for row in result}
+        for pid in pids:
+            yield pid, outputs.get(int(pid), "Error outputting file")
 
     def memmap_dump(self, pid):
         """Dump the process requested by the user using the memmap plugin"""
-        evidence_data = {
-            "bucket": f"s3://{str(self.evidence.dump_linked_case.case_bucket_id)}/{self.evidence.dump_name}",
-            "output_path": f"media/{self.evidence.dump_id}/",
-        }
+        return next(self.memmap_dumps([pid]))[1]
+
+    def memmap_dumps(self, pids):
+        """Dump the processes requested by the user using the memmap plugin, constructed once for all of them
+        Return : A generator of the PID and file output of each process, as soon as it is dumped.
+        """
+        if not pids:
+            return
+        evidence_data = get_evidence_data(
+            self.evidence, f"media/{self.evidence.dump_id}/"
+        )
         context = contexts.Context()
-        context.config["plugins.Memmap.pid"] = int(pid)
+        context.config["plugins.Memmap.pid"] = int(pids[0])
         context.config["plugins.Memmap.dump"] = True
-        constructed = build_context(
-            evidence_data,
-            context,
-            base_config_path,
-            PLUGIN_LIST["windows.memmap.Memmap"],
-        )
-        result = DictRenderer().render(constructed.run())
-        artefact = {x.translate({32: None}): y for x, y in result[0].items()}
-        fix_permissions(f"media/{self.evidence.dump_id}")
-        return artefact["Fileoutput"]
+        try:
+            constructed = build_context(
+                evidence_data,
+                context,
+                base_config_path,
+                PLUGIN_LIST["windows.memmap.Memmap"],
+            )
+        except Exception as e:
+            logger.warning(f"Could not construct the memmap plugin: {e}")
+            for pid in pids:
+                yield pid, "Error outputting file"
+            return
+        for pid in pids:
+            # The plugin reads its configuration when it runs, so the layers and symbols found for the first
+            # process are reused by the next ones.
+            constructed.config["pid"] = int(pid)
+            try:
+                result = DictRenderer().render(constructed.run())
+            except Exception as e:
+                logger.warning(f"Could not dump the process {pid} using memmap: {e}")
+                result = []
+            fix_permissions(f"media/{self.evidence.dump_id}")
+            yield pid, result[0]["File output"] if result else "Error outputting file"
 
 
 class DeviceTree(models.Model):
     evidence = models.ForeignKey(
         Evidence, on_delete=models.CASCADE, related_name="windows_devicetree_evidence"
     )
-    artefacts = models.JSONField(null=True)
+    artefacts = ArtefactsField(null=True)
 
     @staticmethod
     @shared_task(name="Windows.DeviceTree.run")
     def run(evidence_data):
-        try:
-            context = contexts.Context()
-            constructed = build_context(
-                evidence_data,
-                context,
-                base_config_path,
-                PLUGIN_LIST["windows.devicetree.DeviceTree"],
-            )
-            if constructed:
-                result = DictRenderer().render(constructed.run())
-                return result
-        except UnsatisfiedException:
-            return "Unsatisfied"
-        except:
-            return None
+        return run_plugin(
+            DeviceTree,
+            evidence_data,
+            base_config_path,
+            PLUGIN_LIST["windows.devicetree.DeviceTree"],
+        )
 
 
 class NetGraph(models.Model):
@@ -165,341 +166,228 @@ class PsScan(models.Model):
     evidence = models.ForeignKey(
         Evidence, on_delete=models.CASCADE, related_name="windows_psscan_evidence"
     )
-    artefacts = models.JSONField(null=True)
+    artefacts = ArtefactsField(null=True)
 
     @staticmethod
     @shared_task(name="Windows.PsScan.run")
     def run(evidence_data):
-        try:
-            context = contexts.Context()
-            constructed = build_context(
-                evidence_data,
-                context,
-                base_config_path,
-                PLUGIN_LIST["windows.psscan.PsScan"],
-            )
-            if constructed:
-                result = DictRenderer().render(constructed.run())
-                return result
-        except UnsatisfiedException:
-            return "Unsatisfied"
-        except:
-            return None
+        return run_plugin(
+            PsScan,
+            evidence_data,
+            base_config_path,
+            PLUGIN_LIST["windows.psscan.PsScan"],
+        )
 
 
 class CmdLine(models.Model):
     evidence = models.ForeignKey(
         Evidence, on_delete=models.CASCADE, related_name="windows_cmdline_evidence"
     )
-    artefacts = models.JSONField(null=True)
+    artefacts = ArtefactsField(null=True)
 
     @staticmethod
     @shared_task(name="Windows.CmdLine.run")
     def run(evidence_data):
-        try:
-            context = contexts.Context()
-            constructed = build_context(
-                evidence_data,
-                context,
-                base_config_path,
-                PLUGIN_LIST["windows.cmdline.CmdLine"],
-            )
-            if constructed:
-                result = DictRenderer().render(constructed.run())
-                return result
-        except UnsatisfiedException:
-            return "Unsatisfied"
-        except:
-            return None
+        return run_plugin(
+            CmdLine,
+            evidence_data,
+            base_config_path,
+            PLUGIN_LIST["windows.cmdline.CmdLine"],
+        )
 
 
 class Privs(models.Model):
     evidence = models.ForeignKey(
         Evidence, on_delete=models.CASCADE, related_name="windows_privs_evidence"
     )
-    artefacts = models.JSONField(null=True)
+    artefacts = ArtefactsField(null=True)
 
     @staticmethod
     @shared_task(name="Windows.Privs.run")
     def run(evidence_data):
-        try:
-            context = contexts.Context()
-            constructed = build_context(
-                evidence_data,
-                context,
-                base_config_path,
-                PLUGIN_LIST["windows.privileges.Privs"],
-            )
-            if constructed:
-                result = DictRenderer().render(constructed.run())
-                return result
-        except UnsatisfiedException:
-            return "Unsatisfied"
-        except:
-            return None
+        return run_plugin(
+            Privs,
+            evidence_data,
+            base_config_path,
+            PLUGIN_LIST["windows.privileges.Privs"],
+        )
 
 
 class Sessions(models.Model):
     evidence = models.ForeignKey(
         Evidence, on_delete=models.CASCADE, related_name="windows_sessions_evidence"
     )
-    artefacts = models.JSONField(null=True)
+    artefacts = ArtefactsField(null=True)
 
     @staticmethod
     @shared_task(name="Windows.Sessions.run")
     def run(evidence_data):
-        try:
-            context = contexts.Context()
-            constructed = build_context(
-                evidence_data,
-                context,
-                base_config_path,
-                PLUGIN_LIST["windows.sessions.Sessions"],
-            )
-            if constructed:
-                result = DictRenderer().render(constructed.run())
-                return result
-        except UnsatisfiedException:
-            return "Unsatisfied"
-        except:
-            return None
+        return run_plugin(
+            Sessions,
+            evidence_data,
+            base_config_path,
+            PLUGIN_LIST["windows.sessions.Sessions"],
+        )
 
 
 class GetSIDs(models.Model):
     evidence = models.ForeignKey(
         Evidence, on_delete=models.CASCADE, related_name="windows_getsids_evidence"
     )
-    artefacts = models.JSONField(null=True)
+    artefacts = ArtefactsField(null=True)
 
     @staticmethod
     @shared_task(name="Windows.GetSIDs.run")
     def run(evidence_data):
-        try:
-            context = contexts.Context()
-            constructed = build_context(
-                evidence_data,
-                context,
-                base_config_path,
-                PLUGIN_LIST["windows.getsids.GetSIDs"],
-            )
-            if constructed:
-                result = DictRenderer().render(constructed.run())
-                return result
-        except UnsatisfiedException:
-            return "Unsatisfied"
-        except:
-            return None
+        return run_plugin(
+            GetSIDs,
+            evidence_data,
+            base_config_path,
+            PLUGIN_LIST["windows.getsids.GetSIDs"],
+        )
 
 
 class LdrModules(models.Model):
     evidence = models.ForeignKey(
         Evidence, on_delete=models.CASCADE, related_name="windows_ldrmodules_evidence"
     )
-    artefacts = models.JSONField(null=True)
+    artefacts = ArtefactsField(null=True)
 
     @staticmethod
     @shared_task(name="Windows.LdrModules.run")
     def run(evidence_data):
-        try:
-            context = contexts.Context()
-            constructed = build_context(
-                evidence_data,
-                context,
-                base_config_path,
-                PLUGIN_LIST["windows.ldrmodules.LdrModules"],
-            )
-            if constructed:
-                result = DictRenderer().render(constructed.run())
-                return result
-        except UnsatisfiedException:
-            return "Unsatisfied"
-        except:
-            return None
+        return run_plugin(
+            LdrModules,
+            evidence_data,
+            base_config_path,
+            PLUGIN_LIST["windows.ldrmodules.LdrModules"],
+        )
 
 
 class Modules(models.Model):
     evidence = models.ForeignKey(
         Evidence, on_delete=models.CASCADE, related_name="windows_modules_evidence"
     )
-    artefacts = models.JSONField(null=True)
+    artefacts = ArtefactsField(null=True)
 
     @staticmethod
     @shared_task(name="Windows.Modules.run")
     def run(evidence_data):
-        try:
-            context = contexts.Context()
-            constructed = build_context(
-                evidence_data,
-                context,
-                base_config_path,
-                PLUGIN_LIST["windows.modules.Modules"],
-            )
-            if constructed:
-                result = DictRenderer().render(constructed.run())
-                return result
-        except UnsatisfiedException:
-            return "Unsatisfied"
-        except:
-            return None
+        return run_plugin(
+            Modules,
+            evidence_data,
+            base_config_path,
+            PLUGIN_LIST["windows.modules.Modules"],
+        )
 
 
 class SvcScan(models.Model):
     evidence = models.ForeignKey(
         Evidence, on_delete=models.CASCADE, related_name="windows_svcscan_evidence"
     )
-    artefacts = models.JSONField(null=True)
+    artefacts = ArtefactsField(null=True)
 
     @staticmethod
     @shared_task(name="Windows.SvcScan.run")
     def run(evidence_data):
-        try:
-            context = contexts.Context()
-            constructed = build_context(
-                evidence_data,
-                context,
-                base_config_path,
-                PLUGIN_LIST["windows.svcscan.SvcScan"],
-            )
-            if constructed:
-                result = DictRenderer().render(constructed.run())
-                return result
-        except UnsatisfiedException:
-            return "Unsatisfied"
-        except:
-            return None
+        return run_plugin(
+            SvcScan,
+            evidence_data,
+            base_config_path,
+            PLUGIN_LIST["windows.svcscan.SvcScan"],
+        )
 
 
 class Envars(models.Model):
     evidence = models.ForeignKey(
         Evidence, on_delete=models.CASCADE, related_name="windows_envars_evidence"
     )
-    artefacts = models.JSONField(null=True)
+    artefacts = ArtefactsField(null=True)
 
     @staticmethod
     @shared_task(name="Windows.Envars.run")
     def run(evidence_data):
-        try:
-            context = contexts.Context()
-            constructed = build_context(
-                evidence_data,
-                context,
-                base_config_path,
-                PLUGIN_LIST["windows.envars.Envars"],
-            )
-            if constructed:
-                result = DictRenderer().render(constructed.run())
-                return result
-        except UnsatisfiedException:
-            return "Unsatisfied"
-        except:
-            return None
+        return run_plugin(
+            Envars,
+            evidence_data,
+            base_config_path,
+            PLUGIN_LIST["windows.envars.Envars"],
+        )
 
 
 class NetScan(models.Model):
     evidence = models.ForeignKey(
         Evidence, on_delete=models.CASCADE, related_name="windows_netscan_evidence"
     )
-    artefacts = models.JSONField(null=True)
+    artefacts = ArtefactsField(null=True)
 
     @staticmethod
     @shared_task(name="Windows.NetScan.run")
     def run(evidence_data):
-        try:
-            context = contexts.Context()
-            constructed = build_context(
-                evidence_data,
-                context,
-                base_config_path,
-                PLUGIN_LIST["windows.netscan.NetScan"],
-            )
-            if constructed:
-                result = DictRenderer().render(constructed.run())
-                return result
-        except UnsatisfiedException:
-            return "Unsatisfied"
-        except:
-            return None
+        return run_plugin(
+            NetScan,
+            evidence_data,
+            base_config_path,
+            PLUGIN_LIST["windows.netscan.NetScan"],
+        )
 
 
 class NetStat(models.Model):
     evidence = models.ForeignKey(
         Evidence, on_delete=models.CASCADE, related_name="windows_netstat_evidence"
     )
-    artefacts = models.JSONField(null=True)
+    artefacts = ArtefactsField(null=True)
 
     @staticmethod
     @shared_task(name="Windows.NetStat.run")
     def run(evidence_data):
-        try:
-            context = contexts.Context()
-            constructed = build_context(
-                evidence_data,
-                context,
-                base_config_path,
-                PLUGIN_LIST["windows.netstat.NetStat"],
-            )
-            if constructed:
-                result = DictRenderer().render(constructed.run())
-                return result
-        except UnsatisfiedException:
-            return "Unsatisfied"
-        except:
-            return None
+        return run_plugin(
+            NetStat,
+            evidence_data,
+            base_config_path,
+            PLUGIN_LIST["windows.netstat.NetStat"],
+        )
 
 
 class Hashdump(models.Model):
     evidence = models.ForeignKey(
         Evidence, on_delete=models.CASCADE, related_name="windows_hashdump_evidence"
     )
-    artefacts = models.JSONField(null=True)
+    artefacts = ArtefactsField(null=True)
 
     @staticmethod
     @shared_task(name="Windows.Hashdump.run")
     def run(evidence_data):
-        try:
-            context = contexts.Context()
-            constructed = build_context(
-                evidence_data,
-                context,
-                base_config_path,
-                PLUGIN_LIST["windows.hashdump.Hashdump"],
-            )
-            if constructed:
-                result = DictRenderer().render(constructed.run())
-                return result
-        except UnsatisfiedException:
-            return "Unsatisfied"
-        except:
-            return None
+        return run_plugin(
+            Hashdump,
+            evidence_data,
+            base_config_path,
+            PLUGIN_LIST["windows.hashdump.Hashdump"],
+        )
 
 
 class Lsadump(models.Model):
     evidence = models.ForeignKey(
         Evidence, on_delete=models.CASCADE, related_name="windows_lsadump_evidence"
     )
-    artefacts = models.JSONField(null=True)
+    artefacts = ArtefactsField(null=True)
 
     @staticmethod
     @shared_task(name="Windows.Lsadump.run")
     def run(evidence_data):
-        try:
-            context = contexts.Context()
-            constructed = build_context(
-                evidence_data,
-                context,
-                base_config_path,
-                PLUGIN_LIST["windows.lsadump.Lsadump"],
-            )
-            if constructed:
-                result = DictRenderer().render(constructed.run())
-                for artefact in result:
-                    encode = base64.b64encode(artefact["Secret"], "utf-8")
-                    artefact["Secret"] = encode
-                return result
-        except UnsatisfiedException:
-            return "Unsatisfied"
-        except:
-            return None
+        def encode_secrets(result):
+            for artefact in result:
+                encode = base64.b64encode(artefact["Secret"], "utf-8")
+                artefact["Secret"] = encode
+            return result
+
+        return run_plugin(
+            Lsadump,
+            evidence_data,
+            base_config_path,
+            PLUGIN_LIST["windows.lsadump.Lsadump"],
+            post_process=encode_secrets,
+        )
 
 
 class Cachedump(models.Model):
@@ -507,53 +395,35 @@ class Cachedump(models.Model):
         Evidence, on_delete=models.CASCADE, related_name="windows_cachedump_evidence"
     )
 
-    artefacts = models.JSONField(null=True)
+    artefacts = ArtefactsField(null=True)
 
     @staticmethod
     @shared_task(name="Windows.Cachedump.run")
     def run(evidence_data):
-        try:
-            context = contexts.Context()
-            constructed = build_context(
-                evidence_data,
-                context,
-                base_config_path,
-                PLUGIN_LIST["windows.cachedump.Cachedump"],
-            )
-            if constructed:
-                result = DictRenderer().render(constructed.run())
-                return result
-        except UnsatisfiedException:
-            return "Unsatisfied"
-        except:
-            return None
+        return run_plugin(
+            Cachedump,
+            evidence_data,
+            base_config_path,
+            PLUGIN_LIST["windows.cachedump.Cachedump"],
+        )
 
 
 class HiveList(models.Model):
     evidence = models.ForeignKey(
         Evidence, on_delete=models.CASCADE, related_name="windows_hivelist_evidence"
     )
-    artefacts = models.JSONField(null=True)
+    artefacts = ArtefactsField(null=True)
 
     @staticmethod
     @shared_task(name="Windows.HiveList.run")
     def run(evidence_data):
-        try:
-            context = contexts.Context()
-            context.config["plugins.HiveList.dump"] = True
-            constructed = build_context(
-                evidence_data,
-                context,
-                base_config_path,
-                PLUGIN_LIST["windows.registry.hivelist.HiveList"],
-            )
-            if constructed:
-                result = DictRenderer().render(constructed.run())
-                return result
-        except UnsatisfiedException:
-            return "Unsatisfied"
-        except:
-            return None
+        return run_plugin(
+            HiveList,
+            evidence_data,
+            base_config_path,
+            PLUGIN_LIST["windows.registry.hivelist.HiveList"],
+            config={"plugins.HiveList.dump": True},
+        )
 
 
 class Timeliner(models.Model):
@@ -561,26 +431,19 @@ class Timeliner(models.Model):
         Evidence, on_delete=models.CASCADE, related_name="windows_timeliner_evidence"
     )
 
+    # The rows are stored as TimelineEvent rows.
     artefacts = models.JSONField(null=True)
 
     @staticmethod
     @shared_task(name="Windows.Timeliner.run")
     def run(evidence_data):
-        try:
-            context = contexts.Context()
-            constructed = build_context(
-                evidence_data,
-                context,
-                base_config_path,
-                PLUGIN_LIST["timeliner.Timeliner"],
-            )
-            if constructed:
-                result = DictRenderer().render(constructed.run())
-                return result
-        except UnsatisfiedException:
-            return "Unsatisfied"
-        except:
-            return None
+        return run_plugin(
+            Timeliner,
+            evidence_data,
+            base_config_path,
+            PLUGIN_LIST["timeliner.Timeliner"],
+            row_model=TimelineEvent,
+        )
 
 
 class SkeletonKeyCheck(models.Model):
@@ -588,26 +451,17 @@ class SkeletonKeyCheck(models.Model):
         Evidence, on_delete=models.CASCADE, related_name="windows_skc_evidence"
     )
 
-    artefacts = models.JSONField(null=True)
+    artefacts = ArtefactsField(null=True)
 
     @staticmethod
     @shared_task(name="Windows.SkeletonKeyCheck.run")
     def run(evidence_data):
-        try:
-            context = contexts.Context()
-            constructed = build_context(
-                evidence_data,
-                context,
-                base_config_path,
-                PLUGIN_LIST["windows.skeleton_key_check.Skeleton_Key_Check"],
-            )
-            if constructed:
-                result = DictRenderer().render(constructed.run())
-                return result
-        except UnsatisfiedException:
-            return "Unsatisfied"
-        except:
-            return None
+        return run_plugin(
+            SkeletonKeyCheck,
+            evidence_data,
+            base_config_path,
+            PLUGIN_LIST["windows.skeleton_key_check.Skeleton_Key_Check"],
+        )
 
 
 class Malfind(models.Model):
@@ -615,26 +469,17 @@ class Malfind(models.Model):
         Evidence, on_delete=models.CASCADE, related_name="windows_malfind_evidence"
     )
 
-    artefacts = models.JSONField(null=True)
+    artefacts = ArtefactsField(null=True)
 
     @staticmethod
     @shared_task(name="Windows.Malfind.run")
     def run(evidence_data):
-        try:
-            context = contexts.Context()
-            constructed = build_context(
-                evidence_data,
-                context,
-                base_config_path,
-                PLUGIN_LIST["windows.malfind.Malfind"],
-            )
-            if constructed:
-                result = DictRenderer().render(constructed.run())
-                return result
-        except UnsatisfiedException:
-            return "Unsatisfied"
-        except:
-            return None
+        return run_plugin(
+            Malfind,
+            evidence_data,
+            base_config_path,
+            PLUGIN_LIST["windows.malfind.Malfind"],
+        )
 
 
 class UserAssist(models.Model):
@@ -642,26 +487,17 @@ class UserAssist(models.Model):
         Evidence, on_delete=models.CASCADE, related_name="windows_userassist_evidence"
     )
 
-    artefacts = models.JSONField(null=True)
+    artefacts = ArtefactsField(null=True)
 
     @staticmethod
     @shared_task(name="Windows.UserAssist.run")
     def run(evidence_data):
-        try:
-            context = contexts.Context()
-            constructed = build_context(
-                evidence_data,
-                context,
-                base_config_path,
-                PLUGIN_LIST["windows.registry.userassist.UserAssist"],
-            )
-            if constructed:
-                result = DictRenderer().render(constructed.run())
-                return result
-        except UnsatisfiedException:
-            return "Unsatisfied"
-        except:
-            return None
+        return run_plugin(
+            UserAssist,
+            evidence_data,
+            base_config_path,
+            PLUGIN_LIST["windows.registry.userassist.UserAssist"],
+        )
 
 
 class MFTScan(models.Model):
@@ -669,26 +505,17 @@ class MFTScan(models.Model):
         Evidence, on_delete=models.CASCADE, related_name="windows_mftscan_evidence"
     )
 
-    artefacts = models.JSONField(null=True)
+    artefacts = ArtefactsField(null=True)
 
     @staticmethod
     @shared_task(name="Windows.MFTScan.run")
     def run(evidence_data):
-        try:
-            context = contexts.Context()
-            constructed = build_context(
-                evidence_data,
-                context,
-                base_config_path,
-                PLUGIN_LIST["windows.mftscan.MFTScan"],
-            )
-            if constructed:
-                result = DictRenderer().render(constructed.run())
-                return result
-        except UnsatisfiedException:
-            return "Unsatisfied"
-        except:
-            return None
+        return run_plugin(
+            MFTScan,
+            evidence_data,
+            base_config_path,
+            PLUGIN_LIST["windows.mftscan.MFTScan"],
+        )
 
 
 class ADS(models.Model):
@@ -696,26 +523,17 @@ class ADS(models.Model):
         Evidence, on_delete=models.CASCADE, related_name="windows_ads_evidence"
     )
 
-    artefacts = models.JSONField(null=True)
+    artefacts = ArtefactsField(null=True)
 
     @staticmethod
     @shared_task(name="Windows.ADS.run")
     def run(evidence_data):
-        try:
-            context = contexts.Context()
-            constructed = build_context(
-                evidence_data,
-                context,
-                base_config_path,
-                PLUGIN_LIST["windows.mftscan.ADS"],
-            )
-            if constructed:
-                result = DictRenderer().render(constructed.run())
-                return result
-        except UnsatisfiedException:
-            return "Unsatisfied"
-        except:
-            return None
+        return run_plugin(
+            ADS,
+            evidence_data,
+            base_config_path,
+            PLUGIN_LIST["windows.mftscan.ADS"],
+        )
 
 
 class MBRScan(models.Model):
@@ -723,26 +541,17 @@ class MBRScan(models.Model):
         Evidence, on_delete=models.CASCADE, related_name="windows_mbrscan_evidence"
     )
 
-    artefacts = models.JSONField(null=True)
+    artefacts = ArtefactsField(null=True)
 
     @staticmethod
     @shared_task(name="Windows.MBRScan.run")
     def run(evidence_data):
-        try:
-            context = contexts.Context()
-            constructed = build_context(
-                evidence_data,
-                context,
-                base_config_path,
-                PLUGIN_LIST["windows.mbrscan.MBRScan"],
-            )
-            if constructed:
-                result = DictRenderer().render(constructed.run())
-                return result
-        except UnsatisfiedException:
-            return "Unsatisfied"
-        except:
-            return None
+        return run_plugin(
+            MBRScan,
+            evidence_data,
+            base_config_path,
+            PLUGIN_LIST["windows.mbrscan.MBRScan"],
+        )
 
 
 class FileScan(models.Model):
@@ -750,35 +559,31 @@ class FileScan(models.Model):
         Evidence, on_delete=models.CASCADE, related_name="windows_filescan_evidence"
     )
 
-    artefacts = models.JSONField(null=True)
+    artefacts = ArtefactsField(null=True)
 
     @staticmethod
     @shared_task(name="Windows.FileScan.run")
     def run(evidence_data):
-        try:
-            context = contexts.Context()
-            constructed = build_context(
-                evidence_data,
-                context,
-                base_config_path,
-                PLUGIN_LIST["windows.filescan.FileScan"],
-            )
-            if constructed:
-                result = DictRenderer().render(constructed.run())
-                return result
-        except UnsatisfiedException:
-            return "Unsatisfied"
-        except:
-            return None
+        return run_plugin(
+            FileScan,
+            evidence_data,
+            base_config_path,
+            PLUGIN_LIST["windows.filescan.FileScan"],
+        )
 
     def file_dump(self, offset):
-        evidence_data = {
-            "bucket": f"s3://{str(self.evidence.dump_linked_case.case_bucket_id)}/{self.evidence.dump_name}",
-            "output_path": f"media/{self.evidence.dump_id}/",
-        }
         """Dump the file requested by the user"""
+        return next(self.file_dumps([offset]))[1]
+
+    def file_dumps(self, offsets):
+        """Dump the files requested by the user using the dumpfiles plugin, constructed once for all of them
+        Each offset is tried as a virtual address, then as a physical one.
+        Return : A generator of the offset and the dumpfiles rows of each file, None when it could not be dumped.
+        """
+        evidence_data = get_evidence_data(
+            self.evidence, f"media/{self.evidence.dump_id}/"
+        )
         context = contexts.Context()
-        context.config["plugins.DumpFiles.virtaddr"] = int(offset)
         try:
             constructed = build_context(
                 evidence_data,
@@ -786,21 +591,26 @@ class FileScan(models.Model):
                 base_config_path,
                 PLUGIN_LIST["windows.dumpfiles.DumpFiles"],
             )
-            result = DictRenderer().render(constructed.run())
-            if len(result) == 0:
-                del context.config["plugins.DumpFiles.virtaddr"]
-                context.config["plugins.DumpFiles.physaddr"] = int(offset)
-                constructed = build_context(
-                    evidence_data,
-                    context,
-                    base_config_path,
-                    PLUGIN_LIST["windows.dumpfiles.DumpFiles"],
-                )
-                result = DictRenderer().render(constructed.run())
-            fix_permissions(f"media/{self.evidence.dump_id}")
-            return result
-        except:
-            return None
+        except Exception as e:
+            logger.warning(f"Could not construct the dumpfiles plugin: {e}")
+            constructed = None
+        for offset in offsets:
+            if constructed is None:
+                yield offset, None
+                continue
+            try:
+                constructed.config["physaddr"] = None
+                constructed.config["virtaddr"] = int(offset)
+                result = DictRenderer().render(constructed.run())
+                if len(result) == 0:
+                    constructed.config["virtaddr"] = None
+                    constructed.config["physaddr"] = int(offset)
+                    result = DictRenderer().render(constructed.run())
+                fix_permissions(f"media/{self.evidence.dump_id}")
+                yield offset, result
+            except Exception as e:
+                logger.warning(f"Could not dump the file at {offset}: {e}")
+                yield offset, None
 
 
 class DllList(models.Model):
@@ -808,26 +618,17 @@ class DllList(models.Model):
         Evidence, on_delete=models.CASCADE, related_name="windows_dllist_evidence"
     )
 
-    artefacts = models.JSONField(null=True)
+    artefacts = ArtefactsField(null=True)
 
     @staticmethod
     @shared_task(name="Windows.DllList.run")
     def run(evidence_data):
-        try:
-            context = contexts.Context()
-            constructed = build_context(
-                evidence_data,
-                context,
-                base_config_path,
-                PLUGIN_LIST["windows.dlllist.DllList"],
-            )
-            if constructed:
-                result = DictRenderer().render(constructed.run())
-                return result
-        except UnsatisfiedException:
-            return "Unsatisfied"
-        except:
-            return None
+        return run_plugin(
+            DllList,
+            evidence_data,
+            base_config_path,
+            PLUGIN_LIST["windows.dlllist.DllList"],
+        )
 
 
 class Handles(models.Model):
@@ -839,10 +640,7 @@ class Handles(models.Model):
 
     def run(self, pid):
         """Compute Handles for a specific PID"""
-        evidence_data = {
-            "bucket": f"s3://{str(self.evidence.dump_linked_case.case_bucket_id)}/{self.evidence.dump_name}",
-            "output_path": None,
-        }
+        evidence_data = get_evidence_data(self.evidence, None)
         context = contexts.Context()
         context.config["plugins.Handles.pid"] = [int(pid)]
         try:
@@ -866,26 +664,17 @@ class DriverModule(models.Model):
         Evidence, on_delete=models.CASCADE, related_name="windows_drivermodule_evidence"
     )
 
-    artefacts = models.JSONField(null=True)
+    artefacts = ArtefactsField(null=True)
 
     @staticmethod
     @shared_task(name="Windows.DriverModule.run")
     def run(evidence_data):
-        try:
-            context = contexts.Context()
-            constructed = build_context(
-                evidence_data,
-                context,
-                base_config_path,
-                PLUGIN_LIST["windows.drivermodule.DriverModule"],
-            )
-            if constructed:
-                result = DictRenderer().render(constructed.run())
-                return result
-        except UnsatisfiedException:
-            return "Unsatisfied"
-        except:
-            return None
+        return run_plugin(
+            DriverModule,
+            evidence_data,
+            base_config_path,
+            PLUGIN_LIST["windows.drivermodule.DriverModule"],
+        )
 
 
 class VadWalk(models.Model):
@@ -893,26 +682,17 @@ class VadWalk(models.Model):
         Evidence, on_delete=models.CASCADE, related_name="windows_vadwalk_evidence"
     )
 
-    artefacts = models.JSONField(null=True)
+    artefacts = ArtefactsField(null=True)
 
     @staticmethod
     @shared_task(name="Windows.VadWalk.run")
     def run(evidence_data):
-        try:
-            context = contexts.Context()
-            constructed = build_context(
-                evidence_data,
-                context,
-                base_config_path,
-                PLUGIN_LIST["windows.vadwalk.VadWalk"],
-            )
-            if constructed:
-                result = DictRenderer().render(constructed.run())
-                return result
-        except UnsatisfiedException:
-            return "Unsatisfied"
-        except:
-            return None
+        return run_plugin(
+            VadWalk,
+            evidence_data,
+            base_config_path,
+            PLUGIN_LIST["windows.vadwalk.VadWalk"],
+        )
 
 
 class SSDT(models.Model):
@@ -920,104 +700,68 @@ class SSDT(models.Model):
         Evidence, on_delete=models.CASCADE, related_name="windows_ssdt_evidence"
     )
 
-    artefacts = models.JSONField(null=True)
+    artefacts = ArtefactsField(null=True)
 
     @staticmethod
     @shared_task(name="Windows.SSDT.run")
     def run(evidence_data):
-        try:
-            context = contexts.Context()
-            constructed = build_context(
-                evidence_data,
-                context,
-                base_config_path,
-                PLUGIN_LIST["windows.ssdt.SSDT"],
-            )
-            if constructed:
-                result = DictRenderer().render(constructed.run())
-                return result
-        except UnsatisfiedException:
-            return "Unsatisfied"
-        except:
-            return None
+        return run_plugin(
+            SSDT,
+            evidence_data,
+            base_config_path,
+            PLUGIN_LIST["windows.ssdt.SSDT"],
+        )
 
 class ThrdScan(models.Model):
     evidence = models.ForeignKey(
         Evidence, on_delete=models.CASCADE, related_name="windows_thrdscan_evidence"
     )
 
-    artefacts = models.JSONField(null=True)
+    artefacts = ArtefactsField(null=True)
 
     @staticmethod
     @shared_task(name="Windows.ThrdScan.run")
     def run(evidence_data):
-        try:
-            context = contexts.Context()
-            constructed = build_context(
-                evidence_data,
-                context,
-                base_config_path,
-                PLUGIN_LIST["windows.thrdscan.ThrdScan"],
-            )
-            if constructed:
-                result = DictRenderer().render(constructed.run())
-                return result
-        except UnsatisfiedException:
-            return "Unsatisfied"
-        except:
-            return None
+        return run_plugin(
+            ThrdScan,
+            evidence_data,
+            base_config_path,
+            PLUGIN_LIST["windows.thrdscan.ThrdScan"],
+        )
 
 class DriverIrp(models.Model):
     evidence = models.ForeignKey(
         Evidence, on_delete=models.CASCADE, related_name="windows_driverirp_evidence"
     )
 
-    artefacts = models.JSONField(null=True)
+    artefacts = ArtefactsField(null=True)
 
     @staticmethod
     @shared_task(name="Windows.DriverIrp.run")
     def run(evidence_data):
-        try:
-            context = contexts.Context()
-            constructed = build_context(
-                evidence_data,
-                context,
-                base_config_path,
-                PLUGIN_LIST["windows.driverirp.DriverIrp"],
-            )
-            if constructed:
-                result = DictRenderer().render(constructed.run())
-                return result
-        except UnsatisfiedException:
-            return "Unsatisfied"
-        except:
-            return None
+        return run_plugin(
+            DriverIrp,
+            evidence_data,
+            base_config_path,
+            PLUGIN_LIST["windows.driverirp.DriverIrp"],
+        )
 
 class IAT(models.Model):
     evidence = models.ForeignKey(
         Evidence, on_delete=models.CASCADE, related_name="windows_iat_evidence"
     )
 
-    artefacts = models.JSONField(null=True)
+    artefacts = ArtefactsField(null=True)
 
     @staticmethod
     @shared_task(name="Windows.IAT.run")
     def run(evidence_data):
-        try:
-            context = contexts.Context()
-            constructed = build_context(
-                evidence_data,
-                context,
-                base_config_path,
-                PLUGIN_LIST["windows.iat.IAT"],
-            )
-            if constructed:
-                result = DictRenderer().render(constructed.run())
-                return result
-        except UnsatisfiedException:
-            return "Unsatisfied"
-        except:
-            return None
+        return run_plugin(
+            IAT,
+            evidence_data,
+            base_config_path,
+            PLUGIN_LIST["windows.iat.IAT"],
+        )
 
 
 class Loot(models.Model):
@@ -173,6 +173,12 @@ class MFTScanSerializer(serializers.ModelSerializer):
         fields = "__all__"
 
 
+class SkeletonKeyCheckSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = SkeletonKeyCheck
+        fields = "__all__"
+
+
 class MBRScanSerializer(serializers.ModelSerializer):
     class Meta:
         model = MBRScan
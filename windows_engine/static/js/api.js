@@ -1,3 +1,29 @@
+var process_artefacts = {};
+
+function get_process_artefacts(evidence_id, process_id, plugin) {
+  /*
+    Get the result of a process-scoped plugin for the given process.
+    Every plugin is fetched at once with the process endpoint and the response
+    is kept, so opening the cards of a process does not query the API again.
+  */
+  const key = `${evidence_id}/${process_id}`;
+  if (!(key in process_artefacts)) {
+    process_artefacts[key] = $.ajax({
+      type: "GET",
+      url: `${baseURL}/${evidence_id}/process/${process_id}/`,
+      dataType: "json",
+    }).fail(function () {
+      delete process_artefacts[key];
+    });
+  }
+  return process_artefacts[key].then(function (data) {
+    if (data[plugin] === null || data[plugin] === undefined) {
+      return $.Deferred().reject({ status: 404 }, "error", "Not Found");
+    }
+    return data[plugin];
+  });
+}
+
 function display_psscan(evidence_id) {
   $.ajax({
     type: "GET",
@@ -117,11 +143,8 @@ function display_thrdscan(evidence_id) {
 }
 
 function display_sids(evidence_id, process_id) {
-  $.ajax({
-    type: "GET",
-    url: `${baseURL}/${evidence_id}/sids/${process_id}/`,
-    dataType: "json",
-    success: function (data) {
+  get_process_artefacts(evidence_id, process_id, "GetSIDs").then(
+    function (data) {
       $("#artefacts_datatable").DataTable().destroy();
       $("#artefacts_body").html(
         `<table id="artefacts_datatable" class="table-sm table-responsive table-hover table" cellspacing="0" width="100%"
@@ -151,14 +174,14 @@ function display_sids(evidence_id, process_id) {
       $("#artefacts_source_title").text("Security IDs");
       $("#artefacts_modal").modal("show");
     },
-    error: function (xhr, status, error) {
+    function (xhr, status, error) {
       if (xhr.status === 404) {
         toastr.warning("Security IDs are not available on this memory image.");
       } else {
         toastr.error(`An error occured : ${xhr.status}`);
       }
     },
-  });
+  );
 }
 
 function display_mftscan(evidence_id) {
@@ -236,11 +259,8 @@ function display_mftscan(evidence_id) {
 }
 
 function display_privs(evidence_id, process_id) {
-  $.ajax({
-    type: "GET",
-    url: `${baseURL}/${evidence_id}/privileges/${process_id}/`,
-    dataType: "json",
-    success: function (data) {
+  get_process_artefacts(evidence_id, process_id, "Privs").then(
+    function (data) {
       $("#artefacts_datatable").DataTable().destroy();
       $("#artefacts_body").html(
         `<table id="artefacts_datatable" class="table-sm table-responsive table-hover table" cellspacing="0" width="100%"
@@ -278,22 +298,19 @@ function display_privs(evidence_id, process_id) {
       $("#artefacts_source_title").text("Privileges");
       $("#artefacts_modal").modal("show");
     },
-    error: function (xhr, status, error) {
+    function (xhr, status, error) {
       if (xhr.status === 404) {
         toastr.warning("Privileges are not available on this memory image.");
       } else {
         toastr.error(`An error occured : ${xhr.status}`);
       }
     },
-  });
+  );
 }
 
 function display_envars(evidence_id, process_id) {
-  $.ajax({
-    type: "GET",
-    url: `${baseURL}/${evidence_id}/envars/${process_id}/`,
-    dataType: "json",
-    success: function (data) {
+  get_process_artefacts(evidence_id, process_id, "Envars").then(
+    function (data) {
       $("#artefacts_datatable").DataTable().destroy();
       $("#artefacts_body").html(
         `<table id="artefacts_datatable" class="table-sm table-responsive table-hover table" cellspacing="0" width="100%"
@@ -329,7 +346,7 @@ function display_envars(evidence_id, process_id) {
       $("#artefacts_source_title").text("Environnement Variables ");
       $("#artefacts_modal").modal("show");
     },
-    error: function (xhr, status, error) {
+    function (xhr, status, error) {
       if (xhr.status === 404) {
         toastr.warning(
           "Envars for this process are not available on this memory image.",
@@ -338,7 +355,7 @@ function display_envars(evidence_id, process_id) {
         toastr.error(`An error occured : ${xhr.status}`);
       }
     },
-  });
+  );
 }
 
 function display_registry(evidence_id) {
@@ -454,11 +471,8 @@ function display_svcscan(evidence_id) {
 }
 
 function display_dlllist(evidence_id, process_id) {
-  $.ajax({
-    type: "GET",
-    url: `${baseURL}/${evidence_id}/dlllist/${process_id}/`,
-    dataType: "json",
-    success: function (data) {
+  get_process_artefacts(evidence_id, process_id, "DllList").then(
+    function (data) {
       $("#artefacts_datatable").DataTable().destroy();
       $("#artefacts_body").html(
         `<table id="artefacts_datatable" class="table-sm table-responsive table-hover table" cellspacing="0" width="100%"
@@ -498,14 +512,14 @@ function display_dlllist(evidence_id, process_id) {
       $("#artefacts_modal").modal("show");
       $("#artefacts_source_title").text("DllList");
     },
-    error: function (xhr, _status, error) {
+    function (xhr, _status, error) {
       if (xhr.status === 404) {
         toastr.warning("Dlllist is not available");
       } else {
         toastr.error(`An error occured : ${xhr.status}`);
       }
     },
-  });
+  );
 }
 
 function display_filescan(evidence_id) {
@@ -780,31 +794,25 @@ function display_timeline(evidence_id) {
 }
 
 function display_sessions(evidence_id, process_id) {
-  $.ajax({
-    type: "GET",
-    url: `${baseURL}/${evidence_id}/sessions/${process_id}/`,
-    dataType: "json",
-    success: function (data) {
+  get_process_artefacts(evidence_id, process_id, "Sessions").then(
+    function (data) {
       $(".p_session_username").text(data[0]["User Name"]);
     },
-    error: function (xhr, status, error) {
+    function (xhr, status, error) {
       $(".p_session_username").text("Unavailable");
     },
-  });
+  );
 }
 
 function display_cmdline(evidence_id, process_id) {
-  $.ajax({
-    type: "GET",
-    url: `${baseURL}/${evidence_id}/cmdline/${process_id}/`,
-    dataType: "json",
-    success: function (data) {
+  get_process_artefacts(evidence_id, process_id, "CmdLine").then(
+    function (data) {
       $(".p_cmdline").text(data[0].Args);
     },
-    error: function (xhr, status, error) {
+    function (xhr, status, error) {
       $(".p_cmdline").text("Unavailable");
     },
-  });
+  );
 }
 
 function display_timeliner(evidence_id, timestamp_min, timestamp_max) {
@@ -1079,6 +1087,20 @@ function display_kernel_modules(evidence_id) {
   });
 }
 
+function lazy_plugin_pending(xhr, name) {
+  /*
+    Lazy plugins are only computed the first time they are requested,
+    the user is notified over the websocket once their results are available.
+  */
+  if (xhr.status !== 201) {
+    return false;
+  }
+  $("#ir_artefacts_body").html(
+    `<i>${name} is being computed, you will be notified once it is available.</i>`,
+  );
+  return true;
+}
+
 function display_ssdt(evidence_id) {
   /*
     Get the ssdt data from the API and display them using datatables
@@ -1095,6 +1117,9 @@ function display_ssdt(evidence_id) {
       $("#ir_artefacts_title").text("Directory Table");
     },
     success: function (data, status, xhr) {
+      if (lazy_plugin_pending(xhr, "SSDT")) {
+        return;
+      }
       if (data.artefacts && data.artefacts.length > 0) {
         $("#ir_artefacts_body").html(
           `<table id="ir_artefacts_datatable" class="table-sm table-responsive table-hover table" cellspacing="0" width="100%"
@@ -1157,6 +1182,9 @@ function display_driverirp(evidence_id) {
       $("#ir_artefacts_title").text("Driver IRP");
     },
     success: function (data, status, xhr) {
+      if (lazy_plugin_pending(xhr, "Driver IRP")) {
+        return;
+      }
       if (data.artefacts && data.artefacts.length > 0) {
         $("#ir_artefacts_body").html(
           `<table id="ir_artefacts_datatable" class="table-sm table-responsive table-hover table" cellspacing="0" width="100%"
@@ -1225,6 +1253,9 @@ function display_iat(evidence_id) {
       $("#ir_artefacts_title").text("Driver IRP");
     },
     success: function (data, status, xhr) {
+      if (lazy_plugin_pending(xhr, "IAT")) {
+        return;
+      }
       if (data.artefacts && data.artefacts.length > 0) {
         $("#ir_artefacts_body").html(
           `<table id="ir_artefacts_datatable" class="table-sm table-responsive table-hover table" cellspacing="0" width="100%"
@@ -1293,6 +1324,9 @@ function display_ads(evidence_id) {
       $("#ir_artefacts_title").text("Alternate Data Streams");
     },
     success: function (data, status, xhr) {
+      if (lazy_plugin_pending(xhr, "ADS")) {
+        return;
+      }
       if (data.artefacts && data.artefacts.length > 0) {
         $("#ir_artefacts_body").html(
           `<table id="ir_artefacts_datatable" class="table-sm table-responsive table-hover table" cellspacing="0" width="100%"
@@ -1406,6 +1440,9 @@ function display_mbrscan(evidence_id) {
     },
 
     success: function (data, status, xhr) {
+      if (lazy_plugin_pending(xhr, "MBRScan")) {
+        return;
+      }
       if (data.artefacts && data.artefacts.length > 0) {
         $("#ir_artefacts_body").html(
           `<table id="ir_artefacts_datatable" class="table-sm table-responsive table-hover table" cellspacing="0" width="100%"
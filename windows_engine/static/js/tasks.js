@@ -141,6 +141,14 @@ function handles_task_result(result) {
   }
 }
 
+function lazy_plugin_task_result(result) {
+  if (result.status === "success") {
+    toastr.info(result.msg);
+  } else {
+    toastr.warning(result.msg);
+  }
+}
+
 function filedump_task_result(result) {
   if (result.status === "success" || result.status === "failed") {
     loot = result.msg;
@@ -1,6 +1,7 @@
 from celery import shared_task
 from volatility3.framework.renderers import datetime
-from evidences.models import Evidence
+from evidences.models import Evidence, filter_offsets
+from evidences.tasks import notify_evidence
 from windows_engine.models import PsTree
 from windows_engine.models import Loot, FileScan, Handles
 from channels.layers import get_channel_layer
@@ -34,113 +35,132 @@ def compute_handles(evidence_id, pid):
     )
 
 
-@shared_task
-def dump_process_pslist(evidence_id, pid):
-    channel_layer = get_channel_layer()
-    instance = PsTree.objects.get(evidence_id=evidence_id)
-    result = instance.pslist_dump(pid)
-    loot = Loot(
-        evidence=instance.evidence,
-        FileName=result if result != "Error outputting file" else "No Result",
-        Date=datetime.datetime.now().isoformat(),
-        Status=result != "Error outputting file",
-        Name=f"Process with PID {pid} - FileName: {result} - Dumped using PsList."
-        if result != "Error outputting file"
-        else f"Process with PID {pid} - Result: {result} - Dumped using PsList.",
-    )
+def save_loot(loot):
     loot.save()
     data = model_to_dict(loot)
     data["Date"] = loot.Date.isoformat()
-    async_to_sync(channel_layer.group_send)(
-        f"volatility_tasks_{evidence_id}",
-        {
-            "type": "send_notification",
-            "message": {
+    return data
+
+
+@shared_task
+def dump_process_pslist(evidence_id, pid):
+    dump_processes_pslist(evidence_id, [pid])
+
+
+@shared_task
+def dump_processes_pslist(evidence_id, pids):
+    """Dump the processes with a single run of PsList, with one loot item and notification per process."""
+    instance = PsTree.objects.get(evidence_id=evidence_id)
+    for pid, result in instance.pslist_dumps(pids):
+        loot = Loot(
+            evidence=instance.evidence,
+            FileName=result if result != "Error outputting file" else "No Result",
+            Date=datetime.datetime.now().isoformat(),
+            Status=result != "Error outputting file",
+            Name=(
+                f"Process with PID {pid} - FileName: {result} - Dumped using PsList."
+                if result != "Error outputting file"
+                else f"Process with PID {pid} - Result: {result} - Dumped using PsList."
+            ),
+        )
+        data = save_loot(loot)
+        notify_evidence(
+            evidence_id,
+            {
                 "name": "pslist_dump",
                 "pid": pid,
                 "status": "success" if loot.Status else "error",
                 "msg": data,
             },
-        },
-    )
+        )
 
 
 @shared_task
 def dump_process_memmap(evidence_id, pid):
-    channel_layer = get_channel_layer()
+    dump_processes_memmap(evidence_id, [pid])
+
+
+@shared_task
+def dump_processes_memmap(evidence_id, pids):
+    """Dump the processes using Memmap constructed once, with one loot item and notification per process."""
     instance = PsTree.objects.get(evidence_id=evidence_id)
-    result = instance.memmap_dump(pid)
-    loot = Loot(
-        evidence=instance.evidence,
-        FileName=result,
-        Date=datetime.datetime.now().isoformat(),
-        Name=f"Process with PID {pid} - FileName: {result} - Dumped using Memmap.",
-        Status=result != "Error outputting file",
-    )
-    loot.save()
-    data = model_to_dict(loot)
-    data["Date"] = loot.Date.isoformat()
-    status = "success" if loot.Status else "error"
-    async_to_sync(channel_layer.group_send)(
-        f"volatility_tasks_{evidence_id}",
-        {
-            "type": "send_notification",
-            "message": {
+    for pid, result in instance.memmap_dumps(pids):
+        loot = Loot(
+            evidence=instance.evidence,
+            FileName=result,
+            Date=datetime.datetime.now().isoformat(),
+            Name=f"Process with PID {pid} - FileName: {result} - Dumped using Memmap.",
+            Status=result != "Error outputting file",
+        )
+        data = save_loot(loot)
+        notify_evidence(
+            evidence_id,
+            {
                 "name": "memmap_dump",
                 "pid": pid,
-                "status": status,
+                "status": "success" if loot.Status else "error",
                 "msg": data,
             },
-        },
-    )
+        )
 
 
 @shared_task
 def dump_file(evidence_id, offset):
-    channel_layer = get_channel_layer()
+    dump_files(evidence_id, [offset])
+
+
+@shared_task
+def dump_files(evidence_id, offsets):
+    """Dump the files using DumpFiles constructed once, with one loot item and notification per dumped file."""
     instance = Evidence.objects.get(dump_id=evidence_id)
     try:
         file_obj = FileScan.objects.get(evidence_id=evidence_id)
-        filename = next(
-            (d["Name"] for d in file_obj.artefacts if d["Offset"] == offset), None
+    except FileScan.DoesNotExist:
+        notify_evidence(
+            evidence_id,
+            {
+                "name": "file_dump",
+                "status": "error",
+                "msg": "The file you are trying to dump doesn't exist.",
+            },
         )
-        result = file_obj.file_dump(offset)
-        if not result:
-            raise ValueError("File dump failed (data not available)")
-
-        for file in result:
-            loot = Loot(evidence=instance, Date=datetime.datetime.now().isoformat())
-            if file["Result"] != "Error dumping file":
-                loot.Name = f"File {filename} - found in {file['Cache']} and dumped as {file['FileName']}."
-                loot.Status = True
-                loot.FileName = file["Result"]
-            else:
-                loot.Name = f"File {filename} - not found in {file['Cache']}."
-                loot.Status = False
-                loot.FileName = file["Result"]
-            loot.save()
-            data = model_to_dict(loot)
-            data["Date"] = loot.Date.isoformat()
-            async_to_sync(channel_layer.group_send)(
-                f"volatility_tasks_{evidence_id}",
-                {
-                    "type": "send_notification",
-                    "message": {
+        return
+    # The names are resolved in a single pass, a compressed FileScan result is only decompressed once.
+    names = {
+        offset: next((row["Name"] for row in rows), None)
+        for offset, rows in filter_offsets(FileScan, evidence_id, offsets).items()
+    }
+    for offset, result in file_obj.file_dumps(offsets):
+        try:
+            filename = names.get(offset)
+            if not result:
+                raise ValueError("File dump failed (data not available)")
+
+            for file in result:
+                loot = Loot(evidence=instance, Date=datetime.datetime.now().isoformat())
+                if file["Result"] != "Error dumping file":
+                    loot.Name = f"File {filename} - found in {file['Cache']} and dumped as {file['FileName']}."
+                    loot.Status = True
+                    loot.FileName = file["Result"]
+                else:
+                    loot.Name = f"File {filename} - not found in {file['Cache']}."
+                    loot.Status = False
+                    loot.FileName = file["Result"]
+                data = save_loot(loot)
+                notify_evidence(
+                    evidence_id,
+                    {
                         "name": "file_dump",
                         "status": "success" if loot.Status else "failed",
                         "msg": data,
                     },
-                },
-            )
-    except Exception as e:
-        async_to_sync(channel_layer.group_send)(
-            f"volatility_tasks_{evidence_id}",
-            {
-                "type": "send_notification",
-                "message": {
+                )
+        except Exception as e:
+            notify_evidence(
+                evidence_id,
+                {
                     "name": "file_dump",
                     "status": "error",
                     "msg": str(e) or "The file you are trying to dump doesn't exist.",
                 },
-            },
-        )
+            )
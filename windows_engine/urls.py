@@ -8,6 +8,7 @@ urlpatterns = [
     path("api/windows/<int:dump_id>/pstree/", views.PsTreeApiView.as_view()),
     path("api/windows/<int:dump_id>/timeline/", views.TimelineChartApiView.as_view()),
     path("api/windows/<int:dump_id>/timeliner/", views.TimelineDataApiView.as_view()),
+    path("api/windows/<int:dump_id>/process/<int:pid>/", views.ProcessApiView.as_view()),
     path(
         "api/windows/<int:dump_id>/timeliner/<int:artifact_id>/<str:tag>/",
         views.TimelineDataApiView.as_view(),
@@ -67,6 +68,10 @@ urlpatterns = [
     path("api/windows/<int:dump_id>/mbrscan/", views.MBRScanApiView.as_view()),
     path("api/windows/<int:dump_id>/driverirp/", views.DriverIrpApiView.as_view()),
     path("api/windows/<int:dump_id>/iat/", views.IATApiView.as_view()),
+    path(
+        "api/windows/<int:dump_id>/skeletonkeycheck/",
+        views.SkeletonKeyCheckApiView.as_view(),
+    ),
     path(
         "tasks/windows/<int:dump_id>/handles/<int:pid>/",
         views.HandlesApiView.as_view(),
@@ -83,6 +88,18 @@ urlpatterns = [
         "tasks/windows/<int:dump_id>/dump/<int:offset>/filescan/",
         views.FileScanDumpApiView.as_view(),
     ),
+    path(
+        "tasks/windows/<int:dump_id>/dump/pslist/",
+        views.PsListBatchDumpApiView.as_view(),
+    ),
+    path(
+        "tasks/windows/<int:dump_id>/dump/memmap/",
+        views.MemmapBatchDumpApiView.as_view(),
+    ),
+    path(
+        "tasks/windows/<int:dump_id>/dump/filescan/",
+        views.FileScanBatchDumpApiView.as_view(),
+    ),
     path("api/windows/<int:dump_id>/filescan/", views.FileScanApiView.as_view()),
     path(
         "api/windows/<int:dump_id>/filescan/<int:artifact_id>/<str:tag>/",
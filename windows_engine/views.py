@@ -8,17 +8,27 @@ from windows_engine.tasks import (
     dump_process_pslist,
     dump_process_memmap,
     dump_file,
+    dump_processes_pslist,
+    dump_processes_memmap,
+    dump_files,
 )
 from windows_engine.models import *
-from evidences.models import Evidence
+from evidences.models import (
+    Evidence,
+    filter_artefacts,
+    filter_process,
+    search_timeline,
+)
+from evidences.export import artefacts_response, plugin_roots
+from evidences.tasks import request_plugin
 from django_celery_results.models import TaskResult
 from windows_engine.serializers import *
 from rest_framework.views import APIView
 from rest_framework import permissions
 from rest_framework import status
 from rest_framework.response import Response
-from django.core.paginator import Paginator
 from django.db.models import Q
+from itertools import chain
 
 
 @login_required
@@ -85,6 +95,8 @@ class MBRScanApiView(APIView):
         Return the requested MBRScan data.
         """
         data = self.get_object(dump_id)
+        if data is None and request_plugin(MBRScan, dump_id):
+            return Response({}, status=status.HTTP_201_CREATED)
         serializer = MBRScanSerializer(data)
         return Response(serializer.data, status=status.HTTP_200_OK)
 
@@ -105,6 +117,8 @@ class ADSApiView(APIView):
         Return the requested ADS.
         """
         data = self.get_object(dump_id)
+        if data is None and request_plugin(ADS, dump_id):
+            return Response({}, status=status.HTTP_201_CREATED)
         serializer = ADSSerializer(data)
         return Response(serializer.data, status=status.HTTP_200_OK)
 
@@ -128,195 +142,55 @@ class TimelineChartApiView(APIView):
         return Response(serializer.data, status=status.HTTP_200_OK)
 
 
-def build_search_query(field, condition, value1, value2):
-    condition_mapping = {
-        "=": lambda x: x == value1,
-        "!=": lambda x: x != value1,
-        "starts": lambda x: x.startswith(value1),
-        "ends": lambda x: x.endswith(value1),
-        ">": lambda x: x > value1,
-        "<": lambda x: x < value1,
-        "contains": lambda x: value1 in x,
-        "!contains": lambda x: value1 not in x,
-        "!ends": lambda x: not x.endswith(value1),
-        "!starts": lambda x: not x.startswith(value1),
-        "null": lambda x: x is None,
-        "!null": lambda x: x is not None,
-    }
-    if condition == "between" or condition == "!between":
-        if condition == "between":
-            return lambda x: value1 <= x <= value2
-        else:
-            return lambda x: not (value1 <= x <= value2)
-    if condition in condition_mapping:
-        return condition_mapping[condition]
-    else:
-        return None
-
-
-def get_fields_maps(field):
-    if field == "Plugin":
-        return "Plugin"
-    if field == "Description":
-        return "Description"
-    if field == "Changed Date":
-        return "Changed Date"
-    if field == "Created Date":
-        return "Created Date"
-    if field == "Accessed Date":
-        return "Accessed Date"
-    if field == "Modified Date":
-        return "Modified Date"
-    return None
-
-
-
 class TimelineDataApiView(APIView):
     permission_classes = [permissions.IsAuthenticated]
     authentication_classes = [SessionAuthentication, TokenAuthentication]
 
-    def get_object(self, dump_id):
-        try:
-            return Timeliner.objects.get(evidence_id=dump_id)
-        except Timeliner.DoesNotExist:
-            return None
-
     def get(self, request, dump_id, *args, **kwargs):
         """
         Serve the requested timeline data with server-side processing.
         """
-        data = self.get_object(dump_id)
-        if not data:
+        if not Timeliner.objects.filter(evidence_id=dump_id).exists():
             return Response({}, status=status.HTTP_404_NOT_FOUND)
-        draw = int(request.query_params.get("draw", 0))
-        start = int(request.query_params.get("start", 0))
-        length = int(request.query_params.get("length", 25))
-        search_value = request.GET.get("search[value]", "")
-        timestamp_min = request.query_params.get("timestamp_min", None)
-        timestamp_max = request.query_params.get("timestamp_max", None)
-
-        timeliner_qset = data.artefacts
-        search_criterias = request.GET.dict()
-        queries = []
-
-        if search_criterias.get("searchBuilder[logic]", None):
-            logic = search_criterias["searchBuilder[logic]"]
-            for n in range(0, 10):
-                condition = search_criterias.get(
-                    f"searchBuilder[criteria][{n}][condition]", None
-                )
-                if condition:
-                    if "null" not in condition:
-                        value1 = search_criterias[
-                            f"searchBuilder[criteria][{n}][value1]"
-                        ]
-                    else:
-                        value1 = None
-                    if condition == "between" or condition == "!between":
-                        value2 = search_criterias[
-                            f"searchBuilder[criteria][{n}][value2]"
-                        ]
-                    else:
-                        value2 = None
-                    field = search_criterias[f"searchBuilder[criteria][{n}][data]"]
-                    field = get_fields_maps(field)
-                    if field and value1 is not None:
-                        queries.append(
-                            (field, build_search_query(field, condition, value1, value2))
-                        )
-            if queries:
-                if logic == "OR":
-                    timeliner_qset = [
-                        item
-                        for item in timeliner_qset
-                        if any(query(item[field]) for field, query in queries)
-                    ]
-                else:
-                    timeliner_qset = [
-                        item
-                        for item in timeliner_qset
-                        if all(query(item[field]) for field, query in queries)
-                    ]
-        total_records = len(timeliner_qset)
-
-        if search_value:
-            timeliner_qset = [
-                item
-                for item in timeliner_qset
-                if search_value.lower() in item["Plugin"].lower()
-                or search_value.lower() in item["Description"].lower()
-                or search_value.lower() in item["Changed Date"].lower()
-                or search_value.lower() in item["Created Date"].lower()
-                or search_value.lower() in item["Accessed Date"].lower()
-                or search_value.lower() in item["Modified Date"].lower()
-            ]
-
-        columns_map = [
-            "Plugin",
-            "Description",
-            "Changed Date",
-            "Created Date",
-            "Accessed Date",
-            "Modified Date",
-        ]
-        order_column_index = request.GET.get(
-            "order[0][column]", ""
-        )  # Index of the column to sort
-        order_dir = request.GET.get("order[0][dir]", "")  # Sorting direction
-
         try:
-            order_column = columns_map[int(order_column_index)]
-        except (IndexError, ValueError):
-            order_column = None  # Fallback column or default sorting
-
-        if order_column:
-            # Applying sorting
-            timeliner_qset.sort(
-                key=lambda x: x[order_column],
-                reverse=True if order_dir == "desc" else False,
-            )
+            # Used by DataTables to ensure that the Ajax returns from server-side processing are drawn in sequence
+            draw = int(request.query_params.get("draw", 0))
+        except ValueError:
+            draw = 0
+        response = search_timeline(dump_id, request.query_params)
+        response["draw"] = draw
+        return Response(response, status=status.HTTP_200_OK)
 
-        filtered_data = []
 
-        if timestamp_min and timestamp_max:
-            for artefact in timeliner_qset:
-                created_date = artefact.get("Created Date")
-                if created_date and timestamp_min <= created_date <= timestamp_max:
-                    filtered_data.append(artefact)
-        else:
-            filtered_data = timeliner_qset
+# Plugins whose rows are scoped to a process.
+PROCESS_PLUGINS = [CmdLine, GetSIDs, Privs, Envars, DllList, Sessions]
 
-        paginator = Paginator(filtered_data, length)
-        page_data = paginator.get_page((start // length) + 1)
 
-        total_records_filtered = len(timeliner_qset)
-        response = {
-            "draw": draw,
-            "recordsTotal": total_records,
-            "recordsFiltered": total_records_filtered,
-            "data": page_data.object_list,
-        }
+class ProcessApiView(APIView):
+    permission_classes = [permissions.IsAuthenticated]
+    authentication_classes = [SessionAuthentication, TokenAuthentication]
 
-        return Response(response, status=status.HTTP_200_OK)
+    def get(self, request, dump_id, pid, *args, **kwargs):
+        """
+        Return the rows of every process-scoped plugin for the given pid in a single response.
+        Plugins without a result are given as null.
+        """
+        if not Evidence.objects.filter(dump_id=dump_id).exists():
+            return Response({}, status=status.HTTP_404_NOT_FOUND)
+        data = filter_process(PROCESS_PLUGINS, dump_id, pid)
+        return Response(data, status=status.HTTP_200_OK)
 
 
 class CmdLineApiView(APIView):
     permission_classes = [permissions.IsAuthenticated]
     authentication_classes = [SessionAuthentication, TokenAuthentication]
 
-    def get_object(self, dump_id):
-        try:
-            return CmdLine.objects.get(evidence_id=dump_id)
-        except CmdLine.DoesNotExist:
-            return None
-
     def get(self, request, dump_id, pid, *args, **kwargs):
         """
         Return the requested cmdline from the given pid.
         """
-        data = self.get_object(dump_id)
-        if data.artefacts:
-            filtered_data = [d for d in data.artefacts if d["PID"] == pid]
+        filtered_data = filter_artefacts(CmdLine, dump_id, pid=pid)
+        if filtered_data is not None:
             return Response(filtered_data, status=status.HTTP_200_OK)
         else:
             return Response({}, status=status.HTTP_404_NOT_FOUND)
@@ -326,19 +200,12 @@ class GetSIDsApiView(APIView):
     permission_classes = [permissions.IsAuthenticated]
     authentication_classes = [SessionAuthentication, TokenAuthentication]
 
-    def get_object(self, dump_id):
-        try:
-            return GetSIDs.objects.get(evidence_id=dump_id)
-        except GetSIDs.DoesNotExist:
-            return None
-
     def get(self, request, dump_id, pid, *args, **kwargs):
         """
         Return the requested sids from the given pid.
         """
-        data = self.get_object(dump_id)
-        if data.artefacts:
-            filtered_data = [d for d in data.artefacts if d["PID"] == pid]
+        filtered_data = filter_artefacts(GetSIDs, dump_id, pid=pid)
+        if filtered_data is not None:
             return Response(filtered_data, status=status.HTTP_200_OK)
         else:
             return Response({}, status=status.HTTP_404_NOT_FOUND)
@@ -348,19 +215,12 @@ class PrivsApiView(APIView):
     permission_classes = [permissions.IsAuthenticated]
     authentication_classes = [SessionAuthentication, TokenAuthentication]
 
-    def get_object(self, dump_id):
-        try:
-            return Privs.objects.get(evidence_id=dump_id)
-        except Privs.DoesNotExist:
-            return None
-
     def get(self, request, dump_id, pid, *args, **kwargs):
         """
         Return the requested Privileges from the given pid.
         """
-        data = self.get_object(dump_id)
-        if data.artefacts:
-            filtered_data = [d for d in data.artefacts if d["PID"] == pid]
+        filtered_data = filter_artefacts(Privs, dump_id, pid=pid)
+        if filtered_data is not None:
             return Response(filtered_data, status=status.HTTP_200_OK)
         else:
             return Response({}, status=status.HTTP_404_NOT_FOUND)
@@ -370,19 +230,12 @@ class EnvarsApiView(APIView):
     permission_classes = [permissions.IsAuthenticated]
     authentication_classes = [SessionAuthentication, TokenAuthentication]
 
-    def get_object(self, dump_id):
-        try:
-            return Envars.objects.get(evidence_id=dump_id)
-        except Envars.DoesNotExist:
-            return None
-
     def get(self, request, dump_id, pid, *args, **kwargs):
         """
         Return the requested envars from the pid.
         """
-        data = self.get_object(dump_id)
-        if data.artefacts:
-            filtered_data = [d for d in data.artefacts if d["PID"] == pid]
+        filtered_data = filter_artefacts(Envars, dump_id, pid=pid)
+        if filtered_data is not None:
             return Response(filtered_data, status=status.HTTP_200_OK)
         else:
             return Response({}, status=status.HTTP_404_NOT_FOUND)
@@ -392,40 +245,28 @@ class PsScanApiView(APIView):
     permission_classes = [permissions.IsAuthenticated]
     authentication_classes = [SessionAuthentication, TokenAuthentication]
 
-    def get_object(self, dump_id):
-        try:
-            return PsScan.objects.get(evidence_id=dump_id)
-        except PsScan.DoesNotExist:
-            return None
-
     def get(self, request, dump_id, *args, **kwargs):
         """
         Return the requested psscan data.
+        The rows are streamed as they are read from the database.
         """
-        data = self.get_object(dump_id)
-        if data.artefacts:
-            return Response(data.artefacts, status=status.HTTP_200_OK)
-        else:
+        roots = plugin_roots(PsScan, dump_id)
+        first = next(roots, None)
+        if first is None:
             return Response({}, status=status.HTTP_404_NOT_FOUND)
+        return artefacts_response(request, chain([first], roots))
 
 
 class DllListApiView(APIView):
     permission_classes = [permissions.IsAuthenticated]
     authentication_classes = [SessionAuthentication, TokenAuthentication]
 
-    def get_object(self, dump_id):
-        try:
-            return DllList.objects.get(evidence_id=dump_id)
-        except DllList.DoesNotExist:
-            return None
-
     def get(self, request, dump_id, pid, *args, **kwargs):
         """
         Return the requested dlllist from the pid.
         """
-        data = self.get_object(dump_id)
-        if data.artefacts:
-            filtered_data = [d for d in data.artefacts if d["PID"] == pid]
+        filtered_data = filter_artefacts(DllList, dump_id, pid=pid)
+        if filtered_data is not None:
             return Response(filtered_data, status=status.HTTP_200_OK)
         else:
             return Response({}, status=status.HTTP_404_NOT_FOUND)
@@ -435,19 +276,12 @@ class SessionsApiView(APIView):
     permission_classes = [permissions.IsAuthenticated]
     authentication_classes = [SessionAuthentication, TokenAuthentication]
 
-    def get_object(self, dump_id):
-        try:
-            return Sessions.objects.get(evidence_id=dump_id)
-        except Sessions.DoesNotExist:
-            return None
-
     def get(self, request, dump_id, pid, *args, **kwargs):
         """
         Return the requested session from the pid.
         """
-        data = self.get_object(dump_id)
-        if data.artefacts:
-            filtered_data = [d for d in data.artefacts if d["Process ID"] == pid]
+        filtered_data = filter_artefacts(Sessions, dump_id, pid=pid)
+        if filtered_data is not None:
             return Response(filtered_data, status=status.HTTP_200_OK)
         else:
             return Response({}, status=status.HTTP_404_NOT_FOUND)
@@ -609,19 +443,23 @@ class MalfindApiView(APIView):
     permission_classes = [permissions.IsAuthenticated]
     authentication_classes = [SessionAuthentication, TokenAuthentication]
 
-    def get_object(self, dump_id):
-        try:
-            return Malfind.objects.get(evidence_id=dump_id)
-        except Malfind.DoesNotExist:
-            return None
-
     def get(self, request, dump_id, *args, **kwargs):
         """
         Return the requested malfind data
+        The rows are streamed as they are read from the database.
         """
-        data = self.get_object(dump_id)
-        serializer = MalfindSerializer(data)
-        return Response(serializer.data, status=status.HTTP_200_OK)
+        pk = (
+            Malfind.objects.filter(evidence_id=dump_id)
+            .values_list("id", flat=True)
+            .first()
+        )
+        if pk is None:
+            return Response({}, status=status.HTTP_404_NOT_FOUND)
+        return artefacts_response(
+            request,
+            plugin_roots(Malfind, dump_id),
+            envelope={"id": pk, "evidence": dump_id},
+        )
 
 
 class LdrModulesApiView(APIView):
@@ -677,6 +515,8 @@ class SSDTApiView(APIView):
         Return the requested SSDT data
         """
         data = self.get_object(dump_id)
+        if data is None and request_plugin(SSDT, dump_id):
+            return Response({}, status=status.HTTP_201_CREATED)
         serializer = SSDTSerializer(data)
         return Response(serializer.data, status=status.HTTP_200_OK)
 
@@ -695,6 +535,8 @@ class DriverIrpApiView(APIView):
         Return the requested DriverIrp data
         """
         data = self.get_object(dump_id)
+        if data is None and request_plugin(DriverIrp, dump_id):
+            return Response({}, status=status.HTTP_201_CREATED)
         serializer = DriverIrpSerializer(data)
         return Response(serializer.data, status=status.HTTP_200_OK)
 
@@ -714,47 +556,69 @@ class IATApiView(APIView):
         Return the requested DriverIrp data
         """
         data = self.get_object(dump_id)
+        if data is None and request_plugin(IAT, dump_id):
+            return Response({}, status=status.HTTP_201_CREATED)
         serializer = IATSerializer(data)
         return Response(serializer.data, status=status.HTTP_200_OK)
 
 
-class ThrdScanApiView(APIView):
+class SkeletonKeyCheckApiView(APIView):
     permission_classes = [permissions.IsAuthenticated]
     authentication_classes = [SessionAuthentication, TokenAuthentication]
 
     def get_object(self, dump_id):
         try:
-            return ThrdScan.objects.get(evidence_id=dump_id)
-        except ThrdScan.DoesNotExist:
+            return SkeletonKeyCheck.objects.get(evidence_id=dump_id)
+        except SkeletonKeyCheck.DoesNotExist:
             return None
 
     def get(self, request, dump_id, *args, **kwargs):
         """
-        Return the requested thrdscan data.
+        Return the requested SkeletonKeyCheck data
         """
         data = self.get_object(dump_id)
-        if data.artefacts:
-            return Response(data.artefacts, status=status.HTTP_200_OK)
-        else:
+        if data is None and request_plugin(SkeletonKeyCheck, dump_id):
+            return Response({}, status=status.HTTP_201_CREATED)
+        serializer = SkeletonKeyCheckSerializer(data)
+        return Response(serializer.data, status=status.HTTP_200_OK)
+
+
+class ThrdScanApiView(APIView):
+    permission_classes = [permissions.IsAuthenticated]
+    authentication_classes = [SessionAuthentication, TokenAuthentication]
+
+    def get(self, request, dump_id, *args, **kwargs):
+        """
+        Return the requested thrdscan data.
+        The rows are streamed as they are read from the database.
+        """
+        roots = plugin_roots(ThrdScan, dump_id)
+        first = next(roots, None)
+        if first is None:
             return Response({}, status=status.HTTP_404_NOT_FOUND)
+        return artefacts_response(request, chain([first], roots))
 
 class FileScanApiView(APIView):
     permission_classes = [permissions.IsAuthenticated]
     authentication_classes = [SessionAuthentication, TokenAuthentication]
 
-    def get_object(self, dump_id):
-        try:
-            return FileScan.objects.get(evidence_id=dump_id)
-        except FileScan.DoesNotExist:
-            return None
-
     def get(self, request, dump_id, *args, **kwargs):
         """
         Return the requested FileScan data
+        The rows are streamed as they are read from the database.
         """
-        data = self.get_object(dump_id)
-        serializer = FileScanSerializer(data)
-        return Response(serializer.data, status=status.HTTP_200_OK)
+        pk = (
+            FileScan.objects.filter(evidence_id=dump_id)
+            .values_list("id", flat=True)
+            .first()
+        )
+        if pk is None:
+            return Response({}, status=status.HTTP_404_NOT_FOUND)
+        return artefacts_response(
+            request,
+            plugin_roots(FileScan, dump_id),
+            envelope={"id": pk, "evidence": dump_id},
+        )
 
 
 class HandlesApiView(APIView):
@@ -823,6 +687,82 @@ class MemmapDumpApiView(APIView):
         return Response({}, status=status.HTTP_201_CREATED)
 
 
+def int_list(request, key):
+    """Read a non-empty list of integers from the request body.
+    Return : The list, or None if the body does not hold one.
+    """
+    values = request.data.get(key)
+    if not isinstance(values, list) or not values:
+        return None
+    try:
+        return [int(value) for value in values]
+    except (TypeError, ValueError):
+        return None
+
+
+class PsListBatchDumpApiView(APIView):
+    permission_classes = [permissions.IsAuthenticated]
+    authentication_classes = [SessionAuthentication, TokenAuthentication]
+
+    def post(self, request, dump_id, *args, **kwargs):
+        """
+        Dump the processes whose PID are listed in "pids" with a single run of the pslist plugin
+        """
+        pids = int_list(request, "pids")
+        if pids is None:
+            return Response(
+                {"error": "pids must be a non-empty list of PID"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        dump_processes_pslist.apply_async(
+            args=[dump_id, pids],
+            priority=1,
+        )
+        return Response({}, status=status.HTTP_201_CREATED)
+
+
+class MemmapBatchDumpApiView(APIView):
+    permission_classes = [permissions.IsAuthenticated]
+    authentication_classes = [SessionAuthentication, TokenAuthentication]
+
+    def post(self, request, dump_id, *args, **kwargs):
+        """
+        Dump the processes whose PID are listed in "pids" using the memmap plugin constructed once
+        """
+        pids = int_list(request, "pids")
+        if pids is None:
+            return Response(
+                {"error": "pids must be a non-empty list of PID"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        dump_processes_memmap.apply_async(
+            args=[dump_id, pids],
+            priority=1,
+        )
+        return Response({}, status=status.HTTP_201_CREATED)
+
+
+class FileScanBatchDumpApiView(APIView):
+    permission_classes = [permissions.IsAuthenticated]
+    authentication_classes = [SessionAuthentication, TokenAuthentication]
+
+    def post(self, request, dump_id, *args, **kwargs):
+        """
+        Dump the files whose offsets are listed in "offsets" using the dumpfiles plugin constructed once
+        """
+        offsets = int_list(request, "offsets")
+        if offsets is None:
+            return Response(
+                {"error": "offsets must be a non-empty list of file offsets"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        dump_files.apply_async(
+            args=[dump_id, offsets],
+            priority=1,
+        )
+        return Response({}, status=status.HTTP_201_CREATED)
+
+
 class TasksApiView(APIView):
     permission_classes = [permissions.IsAuthenticated]
     authentication_classes = [SessionAuthentication, TokenAuthentication]